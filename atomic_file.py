@@ -0,0 +1,181 @@
+# =============================================================================
+# MIT License
+# 
+# Copyright (c) 2022 luckytyphlosion
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# =============================================================================
+
+import os
+import pathlib
+import tempfile
+import time
+
+# Files are written to a temp file in the same directory and then renamed over the destination,
+# so a crash or a reader in the middle of a write only ever sees the old file or the new one.
+
+TEMP_FILE_SUFFIX = ".editfolder-tmp"
+# temp files this old can't belong to a write that's still running
+STALE_TEMP_FILE_AGE = 60 * 60
+
+FSYNC_ALWAYS = "always"
+FSYNC_BATCH = "batch"
+FSYNC_NEVER = "never"
+FSYNC_POLICIES = (FSYNC_ALWAYS, FSYNC_BATCH, FSYNC_NEVER)
+DEFAULT_FSYNC_BATCH_SIZE = 64
+
+def get_umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+# mkstemp makes files only the owner can read, so give the temp file the permissions
+# the file it replaces has, or would have had if it were created normally
+def get_file_mode(filepath):
+    try:
+        return filepath.stat().st_mode & 0o7777
+    except OSError:
+        return 0o666 & ~get_umask()
+
+# Writes data to a new temp file next to filepath and returns the temp file's path.
+def stage_file(filepath, data, fsync=True):
+    filepath = pathlib.Path(filepath)
+    file_mode = get_file_mode(filepath)
+    temp_fd, temp_filename = tempfile.mkstemp(suffix=TEMP_FILE_SUFFIX, prefix=f".{filepath.name}.", dir=filepath.parent)
+    try:
+        if os.name != "nt":
+            os.chmod(temp_fd, file_mode)
+        with os.fdopen(temp_fd, "wb") as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+    except BaseException:
+        remove_file_if_exists(temp_filename)
+        raise
+
+    return pathlib.Path(temp_filename)
+
+def remove_file_if_exists(filepath):
+    try:
+        os.remove(filepath)
+    except FileNotFoundError:
+        pass
+
+def fsync_filepath(filepath):
+    # Windows can only flush files opened for writing
+    with open(filepath, "rb+") as f:
+        os.fsync(f.fileno())
+
+# makes renames in the directory durable, not possible (or needed) on Windows
+def fsync_dirpath(dirpath):
+    if os.name == "nt":
+        return
+
+    dir_fd = os.open(dirpath, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+def commit_file(temp_filepath, filepath):
+    try:
+        os.replace(temp_filepath, filepath)
+    except BaseException:
+        remove_file_if_exists(temp_filepath)
+        raise
+
+def write_file_atomic(filepath, data, fsync=True):
+    temp_filepath = stage_file(filepath, data, fsync)
+    commit_file(temp_filepath, filepath)
+    if fsync:
+        fsync_dirpath(pathlib.Path(filepath).parent)
+
+# For bulk writes: files are staged without syncing, then every batch_size files they're synced
+# with one os.sync (or an fsync each where there's no os.sync, i.e. Windows) and renamed together,
+# with one directory sync per batch instead of one per file.
+class BatchedFileCommitter:
+    __slots__ = ("batch_size", "fsync", "pending")
+
+    def __init__(self, batch_size=DEFAULT_FSYNC_BATCH_SIZE, fsync=True):
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self.pending = []
+
+    # key is returned with the failures from commit, to tell which write failed
+    def add(self, temp_filepath, filepath, key=None):
+        self.pending.append((pathlib.Path(temp_filepath), pathlib.Path(filepath), key))
+
+    def is_full(self):
+        return len(self.pending) >= self.batch_size
+
+    # returns [(filepath, key, error)] for the files that couldn't be committed
+    def commit(self):
+        failures = []
+        committed_dirpaths = set()
+
+        sync_each_file = self.fsync and not hasattr(os, "sync")
+        if self.fsync and not sync_each_file:
+            # one sync flushes every staged file, instead of opening and fsyncing each of them
+            os.sync()
+
+        for temp_filepath, filepath, key in self.pending:
+            try:
+                if sync_each_file:
+                    fsync_filepath(temp_filepath)
+                commit_file(temp_filepath, filepath)
+            except OSError as e:
+                remove_file_if_exists(temp_filepath)
+                failures.append((filepath, key, e))
+            else:
+                committed_dirpaths.add(filepath.parent)
+
+        if self.fsync:
+            for dirpath in committed_dirpaths:
+                fsync_dirpath(dirpath)
+
+        self.pending = []
+        return failures
+
+    # for when the batch is abandoned
+    def discard(self):
+        for temp_filepath, filepath, key in self.pending:
+            remove_file_if_exists(temp_filepath)
+
+        self.pending = []
+
+# Temp files left behind by a writer that was killed.
+def remove_stale_temp_files(dirpath, max_age=STALE_TEMP_FILE_AGE):
+    now = time.time()
+    removed_filepaths = []
+
+    try:
+        temp_filepaths = [filepath for filepath in pathlib.Path(dirpath).iterdir() if filepath.name.endswith(TEMP_FILE_SUFFIX)]
+    except OSError:
+        return removed_filepaths
+
+    for temp_filepath in temp_filepaths:
+        try:
+            if now - temp_filepath.stat().st_mtime >= max_age:
+                temp_filepath.unlink()
+                removed_filepaths.append(temp_filepath)
+        except OSError:
+            pass
+
+    return removed_filepaths
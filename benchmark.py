@@ -0,0 +1,1133 @@
+# =============================================================================
+# MIT License
+# 
+# Copyright (c) 2022 luckytyphlosion
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# =============================================================================
+
+import sys
+import collections
+import glob
+import contextlib
+import io
+import os
+import time
+import itertools
+import random
+import struct
+import pathlib
+import shutil
+import tempfile
+import tarfile
+import json
+import multiprocessing
+import subprocess
+import threading
+
+import save_codec
+import atomic_file
+import game_profiles
+import edit_folder
+import name_matcher
+import chip_database
+import folder_codec
+import diagnostics
+import folder_stream
+import folder_server
+import folder_client
+import chip_usage
+import fake_tango
+import folder_store
+import chip_pairs
+import testing_support
+
+EXE45_PROFILE = game_profiles.BN45_US_PVP
+
+def time_repeated(func, min_duration=0.5):
+    num_runs = 0
+    start_time = time.perf_counter()
+    while True:
+        func()
+        num_runs += 1
+        elapsed_time = time.perf_counter() - start_time
+        if elapsed_time >= min_duration:
+            return elapsed_time / num_runs
+
+def bench_mask():
+    mask_offset = EXE45_PROFILE.mask_offset
+    save_size = EXE45_PROFILE.save_size
+
+    with open(EXE45_PROFILE.template_save_filename, "rb") as f:
+        template_save_data = f.read()
+
+    expected_save_data = bytearray(template_save_data)
+    save_codec.mask_save(expected_save_data, mask_offset, save_size, save_codec.mask_bytes_loop)
+
+    print(f"Masking {save_size} bytes of {EXE45_PROFILE.template_save_filename}")
+    for backend_name in save_codec.MASK_BACKENDS.keys():
+        if not save_codec.is_mask_backend_available(backend_name):
+            print(f"{backend_name: >9} | unavailable")
+            continue
+
+        mask_backend = save_codec.MASK_BACKENDS[backend_name]
+        save_data = bytearray(template_save_data)
+        save_codec.mask_save(save_data, mask_offset, save_size, mask_backend)
+        if save_data != expected_save_data:
+            raise RuntimeError(f"Mask backend {backend_name} produced different output from the loop backend!")
+
+        seconds_per_run = time_repeated(lambda: save_codec.mask_save(save_data, mask_offset, save_size, mask_backend))
+        megabytes_per_second = save_size / seconds_per_run / 1e6
+        print(f"{backend_name: >9} | {seconds_per_run * 1e6: >10.2f}us | {megabytes_per_second: >10.2f} MB/s")
+
+def bench_checksum():
+    # there's no Gregar template, but the Falzar one checksums the same way with a different adjust
+    checksum_variants = (
+        (game_profiles.BN45_US_PVP, game_profiles.BN45_US_PVP),
+        (game_profiles.BN6F, game_profiles.BN6F),
+        (game_profiles.BN6G, game_profiles.BN6F),
+    )
+
+    rng = random.Random(0x4b88)
+
+    for profile, template_profile in checksum_variants:
+        variant_name = profile.name
+        mask_offset = profile.mask_offset
+        checksum_offset = profile.checksum_offset
+        save_size = profile.save_size
+        checksum_adjust = profile.checksum_adjust
+
+        with open(template_profile.template_save_filename, "rb") as f:
+            save_data = bytearray(f.read())[profile.sram_start_offset:]
+
+        save_codec.mask_save(save_data, mask_offset, save_size)
+
+        reference_result = testing_support.calc_checksum_and_expected_checksum_reference(save_data, checksum_offset, save_size, checksum_adjust)
+        fast_result = save_codec.calc_checksum_and_expected_checksum(save_data, checksum_offset, save_size, checksum_adjust)
+        if fast_result != reference_result:
+            raise RuntimeError(f"{variant_name}: fast checksum {fast_result} != reference checksum {reference_result}!")
+
+        checksum_tracker = save_codec.ChecksumTracker(save_data, fast_result[0], checksum_offset, save_size)
+
+        # random edits, including ones touching the checksum field and bytes past the checksummed area
+        # the first half marks its edits as dirty, the second half relies on diffing the whole save
+        for edit_num in range(200):
+            edit_size = rng.randint(1, 64)
+            edit_offset = rng.randrange(0, len(save_data) - edit_size)
+            if edit_num % 20 == 0:
+                edit_offset = checksum_offset - rng.randint(0, 3)
+            save_data[edit_offset:edit_offset+edit_size] = bytes(rng.randrange(256) for i in range(edit_size))
+            if edit_num < 100:
+                checksum_tracker.mark_dirty(edit_offset, edit_offset + edit_size)
+
+            if edit_num % 3 == 0 or edit_num == 99:
+                incremental_checksum = checksum_tracker.update(save_data)
+                reference_checksum = testing_support.calc_checksum_and_expected_checksum_reference(save_data, checksum_offset, save_size, checksum_adjust)[0]
+                if incremental_checksum != reference_checksum:
+                    raise RuntimeError(f"{variant_name}: incremental checksum 0x{incremental_checksum:08x} != reference checksum 0x{reference_checksum:08x} after edit {edit_num}!")
+
+        reference_seconds = time_repeated(lambda: testing_support.calc_checksum_and_expected_checksum_reference(save_data, checksum_offset, save_size, checksum_adjust))
+        fast_seconds = time_repeated(lambda: save_codec.calc_checksum_and_expected_checksum(save_data, checksum_offset, save_size, checksum_adjust))
+
+        folder_offset = save_size // 2
+        def edit_folder_and_update():
+            save_data[folder_offset] ^= 1
+            checksum_tracker.mark_dirty(folder_offset, folder_offset + 60)
+            checksum_tracker.update(save_data)
+
+        incremental_seconds = time_repeated(edit_folder_and_update)
+
+        print(f"{variant_name} (+0x{checksum_adjust:x}): results match reference")
+        print(f"  reference   | {reference_seconds * 1e6: >10.2f}us")
+        print(f"  fast        | {fast_seconds * 1e6: >10.2f}us")
+        print(f"  incremental | {incremental_seconds * 1e6: >10.2f}us (60 dirty bytes)")
+
+def time_once(func):
+    start_time = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start_time, result
+
+def bench_batch():
+    profile = EXE45_PROFILE
+    num_folder_copies = 10
+    num_saves = 100
+    parallel_jobs = max(os.cpu_count(), 2)
+
+    with tempfile.TemporaryDirectory() as tmp_dirname:
+        tmp_dirpath = pathlib.Path(tmp_dirname)
+
+        # the template's folders are all valid, so extracting them gives a corpus of folders to convert
+        template_folder_dirpath = edit_folder.extract_save_folders(pathlib.Path(profile.template_save_filename), profile, tmp_dirpath, verbose=False)
+        folders_dirpath = tmp_dirpath / "folders"
+        saves_dirpath = tmp_dirpath / "saves"
+        folders_dirpath.mkdir()
+        saves_dirpath.mkdir()
+
+        folder_filepaths = []
+        for i in range(num_folder_copies):
+            for template_folder_filepath in sorted(template_folder_dirpath.iterdir()):
+                folder_filepath = folders_dirpath / f"{i}_{template_folder_filepath.name}"
+                shutil.copyfile(template_folder_filepath, folder_filepath)
+                folder_filepaths.append(folder_filepath)
+
+        save_filepaths = []
+        for i in range(num_saves):
+            save_filepath = saves_dirpath / f"save_{i}.sav"
+            shutil.copyfile(profile.template_save_filename, save_filepath)
+            save_filepaths.append(save_filepath)
+
+        context = edit_folder.load_conversion_context(profile, tmp_dirpath / "tango_saves")
+
+        print(f"{len(folder_filepaths)} folders, {len(save_filepaths)} saves, {os.cpu_count()} CPUs")
+        for batch_name, num_items, run_batch in (
+            ("convert", len(folder_filepaths), lambda jobs: edit_folder.convert_folders_to_saves(folder_filepaths, context, jobs, verbose=False)),
+            ("extract", len(save_filepaths), lambda jobs: edit_folder.extract_saves_folders(save_filepaths, tmp_dirpath / f"extracted_{jobs}", jobs, verbose=False)),
+        ):
+            serial_seconds, serial_report_entries = time_once(lambda: run_batch(1))
+            parallel_seconds, parallel_report_entries = time_once(lambda: run_batch(parallel_jobs))
+            if not all(report_entry["ok"] for report_entry in serial_report_entries + parallel_report_entries):
+                raise RuntimeError(f"Batch {batch_name} had failures!")
+
+            print(f"{batch_name: >9} | jobs=1  | {serial_seconds: >8.3f}s | {num_items / serial_seconds: >8.1f}/s")
+            print(f"{batch_name: >9} | jobs={parallel_jobs: <2} | {parallel_seconds: >8.3f}s | {num_items / parallel_seconds: >8.1f}/s | speedup {serial_seconds / parallel_seconds:.2f}x")
+
+def bench_matcher():
+    rng = random.Random(6)
+    chips_uncased = chip_database.load_chip_db(EXE45_PROFILE).chips_uncased
+    chip_names = list(chips_uncased.keys())
+    chip_matcher = name_matcher.LcsNameMatcher(chips_uncased)
+
+    queries = [testing_support.make_typo(chip_name, rng, rng.randrange(4)) for chip_name in chip_names]
+    queries.extend(("", "zzzzzz", "x"))
+    chip_code_tiebreaks = [rng.choice(folder_codec.ALL_CHIP_CODES) if rng.randrange(2) else None for query in queries]
+
+    for query, chip_code_tiebreak in zip(queries, chip_code_tiebreaks):
+        expected_match = edit_folder.get_most_similar_from_dict_lcs(query, chips_uncased, chip_code_tiebreak=chip_code_tiebreak, exe45_chips_uncased=chips_uncased)
+        match = chip_matcher.get_most_similar(query, chip_code_tiebreak=chip_code_tiebreak, exe45_chips_uncased=chips_uncased)
+        if match != expected_match:
+            raise RuntimeError(f"Indexed matcher returned {match} for {query!r}, full scan returned {expected_match}!")
+
+    def match_all_full_scan():
+        for query, chip_code_tiebreak in zip(queries, chip_code_tiebreaks):
+            edit_folder.get_most_similar_from_dict_lcs(query, chips_uncased, chip_code_tiebreak=chip_code_tiebreak, exe45_chips_uncased=chips_uncased)
+
+    def match_all_indexed():
+        for query, chip_code_tiebreak in zip(queries, chip_code_tiebreaks):
+            chip_matcher.get_most_similar(query, chip_code_tiebreak=chip_code_tiebreak, exe45_chips_uncased=chips_uncased)
+
+    full_scan_seconds = time_repeated(match_all_full_scan, 2)
+    indexed_seconds = time_repeated(match_all_indexed, 2)
+
+    print(f"{len(queries)} queries against {len(chip_names)} chip names, results identical")
+    print(f"  full scan | {full_scan_seconds / len(queries) * 1e6: >10.2f}us/query")
+    print(f"  indexed   | {indexed_seconds / len(queries) * 1e6: >10.2f}us/query | speedup {full_scan_seconds / indexed_seconds:.2f}x")
+
+def bench_kernels():
+    rng = random.Random(7)
+    chip_names = [chip_name.casefold() for chip_name in EXE45_PROFILE.load_chips().keys()]
+    typo_names = [testing_support.make_typo(chip_name, rng, rng.randrange(1, 4)) for chip_name in chip_names]
+    # every chip name against every chip name, plus typos and the empty string
+    name_pairs = list(itertools.product(chip_names + typo_names + [""], chip_names + [""]))
+
+    # the kernels are checked against the matrix implementations in test_name_matcher.py
+    timed_name_pairs = rng.sample(name_pairs, 2000)
+    for kernel_name, kernel in (
+        ("lcs matrix", testing_support.lcs_length_reference),
+        ("lcs bit-parallel", name_matcher.lcs_length),
+        ("osa matrix", testing_support.osa_distance_reference),
+        ("osa bit-parallel", name_matcher.osa_distance),
+    ):
+        seconds_per_run = time_repeated(lambda: [kernel(a, b) for a, b in timed_name_pairs])
+        print(f"{kernel_name: >16} | {seconds_per_run / len(timed_name_pairs) * 1e6: >8.2f}us/pair")
+
+def bench_suggestion_cache():
+    profile = EXE45_PROFILE
+    rng = random.Random(8)
+    num_folders = 200
+
+    with tempfile.TemporaryDirectory() as tmp_dirname:
+        tmp_dirpath = pathlib.Path(tmp_dirname)
+        template_folder_dirpath = edit_folder.extract_save_folders(pathlib.Path(profile.template_save_filename), profile, tmp_dirpath, verbose=False)
+        template_folder_texts = [template_folder_filepath.read_text() for template_folder_filepath in sorted(template_folder_dirpath.iterdir())]
+
+        # players keep making the same few typos, so draw them from a small pool
+        chip_names = sorted(set(line.rpartition(" ")[0] for template_folder_text in template_folder_texts for line in template_folder_text.splitlines()))
+        typos = {}
+        for chip_name in rng.sample(chip_names, min(40, len(chip_names))):
+            typos[chip_name] = testing_support.make_typo(chip_name, rng, 1)
+
+        folder_texts = []
+        for i in range(num_folders):
+            folder_lines = rng.choice(template_folder_texts).splitlines()
+            for line_index, line in enumerate(folder_lines):
+                chip_name, _, chip_code = line.rpartition(" ")
+                if chip_name in typos and rng.randrange(2) == 0:
+                    folder_lines[line_index] = f"{typos[chip_name]} {chip_code}"
+            folder_texts.append("\n".join(folder_lines))
+
+        uncached_context = edit_folder.load_conversion_context(profile, tmp_dirpath / "tango_saves")
+        suggestion_cache_filepath = tmp_dirpath / "suggestion_cache.json"
+
+        def convert_all(context):
+            return [edit_folder.convert_folder_text(folder_text, context) for folder_text in folder_texts]
+
+        uncached_seconds, uncached_results = time_once(lambda: convert_all(uncached_context))
+        cold_context = edit_folder.load_conversion_context(profile, tmp_dirpath / "tango_saves", suggestion_cache_filepath)
+        cold_seconds, cold_results = time_once(lambda: convert_all(cold_context))
+        cold_stats = cold_context.suggestion_cache.get_stats()
+        cold_context.suggestion_cache.save()
+        warm_context = edit_folder.load_conversion_context(profile, tmp_dirpath / "tango_saves", suggestion_cache_filepath)
+        warm_seconds, warm_results = time_once(lambda: convert_all(warm_context))
+        warm_stats = warm_context.suggestion_cache.get_stats()
+
+        for results in (cold_results, warm_results):
+            for uncached_result, result in zip(uncached_results, results):
+                if result.save_data != uncached_result.save_data or result.warnings != uncached_result.warnings or result.render_error_message() != uncached_result.render_error_message():
+                    raise RuntimeError("Cached suggestions changed the conversion result!")
+
+        print(f"{num_folders} folders with typos, results identical")
+        print(f"  no cache   | {uncached_seconds: >8.3f}s")
+        print(f"  cold cache | {cold_seconds: >8.3f}s | {cold_stats['hits']} hits, {cold_stats['misses']} misses")
+        print(f"  warm cache | {warm_seconds: >8.3f}s | {warm_stats['hits']} hits, {warm_stats['misses']} misses")
+
+def get_record_fields(record):
+    return tuple(getattr(record, field_name) for field_name in record.__slots__)
+
+def bench_chip_db():
+    for profile in game_profiles.GAME_PROFILES.values():
+        if not os.path.isfile(profile.chips_filename):
+            continue
+
+        json_chip_db = chip_database.parse_sources(*chip_database.read_sources(profile), b"")
+        chip_db = chip_database.load_chip_db(profile)
+        for json_records, records in ((json_chip_db.chips, chip_db.chips), (json_chip_db.navis, chip_db.navis)):
+            if list(records.keys()) != list(json_records.keys()) or any(get_record_fields(record) != get_record_fields(json_record) for record, json_record in zip(records.values(), json_records.values())):
+                raise RuntimeError(f"Compiled chip database for {profile.name} differs from its JSON!")
+
+    profile = EXE45_PROFILE
+
+    # what startup used to do
+    def load_json_tables():
+        navis = profile.load_navis()
+        exe45_chips = profile.load_chips()
+        navis_uncased = {navi_name.casefold(): navi for navi_name, navi in navis.items()}
+        exe45_chips_uncased = {chip_name.casefold(): chip_info for chip_name, chip_info in exe45_chips.items()}
+        exe45_chip_ids_to_chip_names = {chip_info["id"]: chip_name for chip_name, chip_info in exe45_chips.items()}
+
+    with tempfile.TemporaryDirectory() as tmp_dirname:
+        chip_db_filepath = pathlib.Path(tmp_dirname) / "exe45_chips.chipdb"
+        json_seconds = time_repeated(load_json_tables)
+        rebuild_seconds = time_repeated(lambda: chip_database.build_chip_db(profile, chip_db_filepath))
+        compiled_seconds = time_repeated(lambda: chip_database.load_compiled_chip_db(profile, chip_db_filepath))
+
+    print(f"Compiled chip databases match their JSON")
+    print(f"  json     | {json_seconds * 1e6: >10.2f}us")
+    print(f"  compiled | {compiled_seconds * 1e6: >10.2f}us | speedup {json_seconds / compiled_seconds:.2f}x")
+    print(f"  rebuild  | {rebuild_seconds * 1e6: >10.2f}us")
+
+def bench_codes():
+    chip_db = chip_database.load_chip_db(EXE45_PROFILE)
+    chip_codes = chip_database.ALL_CHIP_CODES + chip_database.ALL_CHIP_CODES.lower()
+
+    for chip_info in chip_db.chips.values():
+        if chip_database.mask_to_codes(chip_info.code_mask) != tuple(sorted(chip_info.codes, key=chip_database.ALL_CHIP_CODES.index)):
+            raise RuntimeError(f"Code mask of {chip_info.name} doesn't match its codes!")
+        for chip_code in chip_codes:
+            if (chip_info.code_mask & chip_database.CHIP_CODE_TO_MASK.get(chip_code, 0) != 0) != (chip_code in chip_info.codes):
+                raise RuntimeError(f"Code mask of {chip_info.name} disagrees with its codes on {chip_code}!")
+
+    for chip_code in chip_codes:
+        if chip_db.get_chips_in_code(chip_code) != tuple(chip_info for chip_info in chip_db.chips.values() if chip_code in chip_info.codes):
+            raise RuntimeError(f"Chips in code {chip_code} don't match the chips' codes!")
+
+    chip_infos = list(chip_db.chips.values())
+    list_seconds = time_repeated(lambda: [chip_code in chip_info.codes for chip_info in chip_infos for chip_code in chip_codes])
+    chip_code_to_mask = chip_database.CHIP_CODE_TO_MASK
+    mask_seconds = time_repeated(lambda: [chip_info.code_mask & chip_code_to_mask.get(chip_code, 0) != 0 for chip_info in chip_infos for chip_code in chip_codes])
+    list_query_seconds = time_repeated(lambda: [[chip_info for chip_info in chip_infos if chip_code in chip_info.codes] for chip_code in chip_codes])
+    mask_query_seconds = time_repeated(lambda: [chip_db.get_chips_in_code(chip_code) for chip_code in chip_codes])
+    num_checks = len(chip_infos) * len(chip_codes)
+
+    print(f"{len(chip_infos)} chips x {len(chip_codes)} codes, code masks match the code lists")
+    print(f"  check list  | {list_seconds / num_checks * 1e9: >8.1f}ns/check")
+    print(f"  check mask  | {mask_seconds / num_checks * 1e9: >8.1f}ns/check")
+    print(f"  query list  | {list_query_seconds / len(chip_codes) * 1e6: >8.2f}us/code")
+    print(f"  query mask  | {mask_query_seconds / len(chip_codes) * 1e6: >8.2f}us/code")
+
+def make_folder_corpus(profile, num_saves, num_navis, rng, valid_codes_only):
+    with open(profile.template_save_filename, "rb") as f:
+        template_save_data = f.read()
+
+    corpus = []
+    for i in range(num_saves):
+        save_data = bytearray(template_save_data)
+        for navi_id in range(num_navis):
+            for chip_slot in range(game_profiles.NUM_FOLDER_CHIPS):
+                chip_code_as_num = rng.randrange(len(folder_codec.ALL_CHIP_CODES) if valid_codes_only else 0x80)
+                game_profiles.CHIP_AND_CODE_STRUCT.pack_into(save_data, profile.get_folder_chip_offset(navi_id, chip_slot), rng.randrange(0x200) | chip_code_as_num << 9)
+        corpus.append(save_data)
+
+    return corpus
+
+def bench_folder_decode():
+    profile = EXE45_PROFILE
+    rng = random.Random(11)
+    chip_db = chip_database.load_chip_db(profile)
+    chip_ids_to_chip_names = {chip_info.id: chip_name for chip_name, chip_info in chip_db.chips.items()}
+    num_navis = len(chip_db.navis)
+
+    # raw fields, including invalid codes
+    for save_data in make_folder_corpus(profile, 20, num_navis, rng, False):
+        decoded_folders = folder_codec.decode_folders(save_data, profile, 0, num_navis)
+        for navi_id in range(num_navis):
+            chip_ids, chip_codes_as_nums = decoded_folders.get_folder(navi_id)
+            for chip_slot in range(game_profiles.NUM_FOLDER_CHIPS):
+                chip_and_code_packed = game_profiles.CHIP_AND_CODE_STRUCT.unpack_from(save_data, profile.get_folder_chip_offset(navi_id, chip_slot))[0]
+                if (chip_ids[chip_slot], chip_codes_as_nums[chip_slot]) != (chip_and_code_packed & 0x1ff, chip_and_code_packed >> 9):
+                    raise RuntimeError(f"Decoded folder differs at navi {navi_id} slot {chip_slot}!")
+
+    corpus = make_folder_corpus(profile, 200, num_navis, rng, True)
+
+    def decode_per_slot():
+        for save_data in corpus:
+            for navi_id in range(num_navis):
+                [testing_support.get_folder_chip_reference(save_data, profile, navi_id, chip_slot, chip_ids_to_chip_names) for chip_slot in range(game_profiles.NUM_FOLDER_CHIPS)]
+
+    def decode_bulk():
+        for save_data in corpus:
+            decoded_folders = folder_codec.decode_folders(save_data, profile, 0, num_navis)
+            for navi_id in range(num_navis):
+                chip_ids, chip_codes_as_nums = decoded_folders.get_folder(navi_id)
+                [(chip_ids_to_chip_names.get(chip_id), folder_codec.CHIP_CODE_STRS[chip_code_as_num]) for chip_id, chip_code_as_num in zip(chip_ids, chip_codes_as_nums)]
+
+    def decode_bulk_raw():
+        for save_data in corpus:
+            folder_codec.decode_folders(save_data, profile, 0, num_navis)
+
+    per_slot_seconds = time_repeated(decode_per_slot)
+    bulk_seconds = time_repeated(decode_bulk)
+    bulk_raw_seconds = time_repeated(decode_bulk_raw)
+
+    print(f"{len(corpus)} saves x {num_navis} navis, bulk decoder matches per-slot unpacking")
+    print(f"  per slot           | {per_slot_seconds / len(corpus) * 1e6: >8.2f}us/save")
+    print(f"  bulk + names       | {bulk_seconds / len(corpus) * 1e6: >8.2f}us/save | speedup {per_slot_seconds / bulk_seconds:.2f}x")
+    print(f"  bulk ids and codes | {bulk_raw_seconds / len(corpus) * 1e6: >8.2f}us/save | speedup {per_slot_seconds / bulk_raw_seconds:.2f}x")
+
+def bench_folder_encode():
+    profile = EXE45_PROFILE
+    rng = random.Random(12)
+    context = edit_folder.load_conversion_context(profile, pathlib.Path("tango_saves"))
+    chip_infos = list(context.chip_db.chips.values())
+    num_navis = len(context.chip_db.navis)
+
+    # a generated save is a folder (and reg) for every navi
+    saves = []
+    for i in range(50):
+        folders = []
+        for navi_id in range(num_navis):
+            folder_chip_infos = [rng.choice(chip_infos) for chip_slot in range(game_profiles.NUM_FOLDER_CHIPS)]
+            folder_chip_codes = [rng.choice(chip_info.codes) for chip_info in folder_chip_infos]
+            folders.append((navi_id, folder_chip_infos, folder_chip_codes, rng.choice((0xff, rng.randrange(game_profiles.NUM_FOLDER_CHIPS)))))
+        saves.append(folders)
+
+    def generate_per_slot(folders):
+        save_data, checksum_tracker = context.new_save_data()
+        for navi_id, folder_chip_infos, folder_chip_codes, reg_slot in folders:
+            for chip_slot, (chip_info, chip_code) in enumerate(zip(folder_chip_infos, folder_chip_codes)):
+                testing_support.edit_folder_chip_reference(save_data, profile, navi_id, chip_slot, chip_info, chip_code)
+            edit_folder.edit_reg(save_data, profile, navi_id, reg_slot)
+        return save_data, checksum_tracker.update(save_data)
+
+    # parsing and validation happen before encoding, so they aren't timed
+    encoded_saves = [[(navi_id, [chip_info.id for chip_info in folder_chip_infos], [folder_codec.chip_code_to_num(chip_code) for chip_code in folder_chip_codes], reg_slot) for navi_id, folder_chip_infos, folder_chip_codes, reg_slot in folders] for folders in saves]
+
+    def generate_bulk(encoded_folders):
+        save_data, checksum_tracker = context.new_save_data()
+        for navi_id, chip_ids, chip_codes_as_nums, reg_slot in encoded_folders:
+            folder_codec.encode_folder(save_data, profile, navi_id, chip_ids, chip_codes_as_nums, reg_slot, checksum_tracker)
+        return save_data, checksum_tracker.update(save_data)
+
+    for folders, encoded_folders in zip(saves, encoded_saves):
+        per_slot_save_data, per_slot_checksum = generate_per_slot(folders)
+        bulk_save_data, bulk_checksum = generate_bulk(encoded_folders)
+        if bulk_save_data != per_slot_save_data or bulk_checksum != per_slot_checksum or bulk_checksum != save_codec.calc_checksum(bulk_save_data, profile.checksum_offset, profile.save_size, profile.checksum_adjust):
+            raise RuntimeError("Bulk encoder produced a different save!")
+
+    per_slot_seconds = time_repeated(lambda: [generate_per_slot(folders) for folders in saves])
+    bulk_seconds = time_repeated(lambda: [generate_bulk(encoded_folders) for encoded_folders in encoded_saves])
+
+    print(f"{len(saves)} saves x {num_navis} folders, bulk encoder matches per-slot writes")
+    print(f"  per slot + full diff     | {per_slot_seconds / len(saves) * 1e6: >8.2f}us/save")
+    print(f"  bulk + dirty ranges only | {bulk_seconds / len(saves) * 1e6: >8.2f}us/save | speedup {per_slot_seconds / bulk_seconds:.2f}x")
+
+def bench_stamp():
+    profile = EXE45_PROFILE
+    num_saves = 200
+
+    with tempfile.TemporaryDirectory() as tmp_dirname:
+        tmp_dirpath = pathlib.Path(tmp_dirname)
+        context = edit_folder.load_conversion_context(profile, tmp_dirpath)
+        template_folder_dirpath = edit_folder.extract_save_folders(pathlib.Path(profile.template_save_filename), profile, tmp_dirpath, verbose=False)
+        template_folder_filepaths = sorted(template_folder_dirpath.iterdir())
+
+        # stamp Roll's folder over MegaMan's, so every stamp changes something
+        with open(template_folder_filepaths[1], "r") as f:
+            result = edit_folder.convert_folder_text(f.read(), context)
+        if result.has_errors:
+            raise RuntimeError(result.render_error_message())
+        edits = edit_folder.get_folder_stamp_edits(result, profile)
+
+        rewrite_dirpath = tmp_dirpath / "rewrite"
+        stamp_dirpath = tmp_dirpath / "stamp"
+        rewrite_dirpath.mkdir()
+        stamp_dirpath.mkdir()
+
+        def rewrite_all():
+            for i in range(num_saves):
+                save_filepath = rewrite_dirpath / f"save_{i}.sav"
+                save_data, checksum_tracker = edit_folder.read_save_from_file(save_filepath, profile, "", "")
+                for offset, new_data in edits:
+                    save_data[offset:offset+len(new_data)] = new_data
+                edit_folder.write_save_to_file(save_data, save_filepath, profile, checksum_tracker)
+
+        def stamp_all():
+            for i in range(num_saves):
+                edit_folder.stamp_save_file(stamp_dirpath / f"save_{i}.sav", edits, profile)
+
+        for save_dirpath in (rewrite_dirpath, stamp_dirpath):
+            for i in range(num_saves):
+                shutil.copyfile(profile.template_save_filename, save_dirpath / f"save_{i}.sav")
+
+        rewrite_seconds, _ = time_once(rewrite_all)
+        stamp_seconds, _ = time_once(stamp_all)
+
+        for i in range(num_saves):
+            if (rewrite_dirpath / f"save_{i}.sav").read_bytes() != (stamp_dirpath / f"save_{i}.sav").read_bytes():
+                raise RuntimeError(f"Stamped save {i} differs from the rewritten save!")
+
+        print(f"{num_saves} saves, stamped saves are identical to rewritten ones")
+        print(f"  read + rewrite | {rewrite_seconds / num_saves * 1e6: >8.2f}us/save")
+        print(f"  mmap stamp     | {stamp_seconds / num_saves * 1e6: >8.2f}us/save | speedup {rewrite_seconds / stamp_seconds:.2f}x")
+
+def bench_crash():
+    profile = EXE45_PROFILE
+    num_saves = 8
+    num_kills = 20
+    rng = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as tmp_dirname:
+        tmp_dirpath = pathlib.Path(tmp_dirname)
+
+        # kill a writer at a random point while it rewrites the same saves over and over
+        for atomic in (True, False):
+            saves_dirpath = tmp_dirpath / ("atomic" if atomic else "plain")
+            saves_dirpath.mkdir()
+            num_torn_saves = 0
+            num_leftover_temp_files = 0
+
+            for kill_num in range(num_kills):
+                writer = multiprocessing.Process(target=testing_support.write_saves_forever, args=(saves_dirpath, profile, num_saves, atomic))
+                writer.start()
+                time.sleep(0.05 + rng.random() * 0.1)
+                writer.kill()
+                writer.join()
+                num_torn_saves += testing_support.count_torn_saves(saves_dirpath, profile)
+                num_leftover_temp_files += len(atomic_file.remove_stale_temp_files(saves_dirpath, 0))
+
+            leftover_filepaths = [filepath for filepath in saves_dirpath.iterdir() if filepath.suffix != ".sav"]
+            if len(leftover_filepaths) != 0:
+                raise RuntimeError(f"Files left behind after cleanup: {leftover_filepaths}")
+
+            print(f"{'atomic' if atomic else 'plain': <6} writes | {num_kills} kills | {num_torn_saves} torn saves | {num_leftover_temp_files} temp files cleaned up")
+            if atomic and num_torn_saves != 0:
+                raise RuntimeError("Killing an atomic writer left torn saves!")
+
+        template_folder_dirpath = edit_folder.extract_save_folders(pathlib.Path(profile.template_save_filename), profile, tmp_dirpath, verbose=False)
+        folder_filepaths = sorted(template_folder_dirpath.iterdir()) * 10
+
+        for fsync_policy in atomic_file.FSYNC_POLICIES:
+            saves_dirpath = tmp_dirpath / f"tango_saves_{fsync_policy}"
+            saves_dirpath.mkdir()
+            context = edit_folder.load_conversion_context(profile, saves_dirpath)
+            seconds, report_entries = time_once(lambda: edit_folder.convert_folders_to_saves(folder_filepaths, context, verbose=False, fsync_policy=fsync_policy))
+            if not all(report_entry["ok"] for report_entry in report_entries):
+                raise RuntimeError(f"Batch with fsync {fsync_policy} had failures!")
+            print(f"  fsync {fsync_policy: <6} | {seconds / len(folder_filepaths) * 1e6: >8.2f}us/folder")
+
+def bench_server():
+    profile = EXE45_PROFILE
+    num_requests = 100
+    num_cold_starts = 5
+
+    with tempfile.TemporaryDirectory() as tmp_dirname:
+        tmp_dirpath = pathlib.Path(tmp_dirname)
+        template_folder_dirpath = edit_folder.extract_save_folders(pathlib.Path(profile.template_save_filename), profile, tmp_dirpath, verbose=False)
+        folder_filepath = sorted(template_folder_dirpath.iterdir())[0]
+        saves_dirpath = tmp_dirpath / "tango_saves"
+        saves_dirpath.mkdir()
+
+        context = edit_folder.load_conversion_context(profile, saves_dirpath)
+        server = folder_server.FolderEditorServer(0, profile, context)
+        server_thread = threading.Thread(target=server.serve_forever)
+        server_thread.start()
+
+        try:
+            def request_conversions():
+                for i in range(num_requests):
+                    exit_code, output = folder_client.request_run_single(folder_filepath, profile, tmp_dirpath, server.server_port)
+                    if exit_code != 0:
+                        raise RuntimeError(f"Server conversion failed: {output}")
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                in_process_seconds, _ = time_once(lambda: [edit_folder.convert_folder_to_save(folder_filepath, profile, context) for i in range(num_requests)])
+            server_seconds, _ = time_once(request_conversions)
+        finally:
+            server.shutdown()
+            server.server_close()
+            server_thread.join()
+
+        # what a drag and drop costs without a server: a new process that loads everything
+        # (the Tango saves directory won't be found here, so this stops just short of writing the save)
+        def cold_start():
+            for i in range(num_cold_starts):
+                subprocess.run((sys.executable, "edit_folder.py", str(folder_filepath)), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=dict(os.environ, XDG_DATA_HOME=str(tmp_dirpath), APPDATA=str(tmp_dirpath)))
+
+        cold_start_seconds, _ = time_once(cold_start)
+
+        print(f"  new process     | {cold_start_seconds / num_cold_starts * 1e3: >8.2f}ms/folder")
+        print(f"  server request  | {server_seconds / num_requests * 1e3: >8.2f}ms/folder | speedup {cold_start_seconds / num_cold_starts / (server_seconds / num_requests):.1f}x")
+        print(f"  in process      | {in_process_seconds / num_requests * 1e3: >8.2f}ms/folder")
+
+def bench_check():
+    profile = EXE45_PROFILE
+    rng = random.Random(17)
+    num_folders = 300
+
+    with tempfile.TemporaryDirectory() as tmp_dirname:
+        tmp_dirpath = pathlib.Path(tmp_dirname)
+        template_folder_dirpath = edit_folder.extract_save_folders(pathlib.Path(profile.template_save_filename), profile, tmp_dirpath, verbose=False)
+        template_folder_texts = [template_folder_filepath.read_text() for template_folder_filepath in sorted(template_folder_dirpath.iterdir())]
+
+        folder_texts = []
+        for i in range(num_folders):
+            folder_lines = rng.choice(template_folder_texts).splitlines()
+            for line_index, line in enumerate(folder_lines):
+                if rng.randrange(20) == 0:
+                    chip_name, _, chip_code = line.rpartition(" ")
+                    folder_lines[line_index] = f"{testing_support.make_typo(chip_name, rng, 1)} {chip_code}"
+            folder_texts.append("\n".join(folder_lines))
+
+        conversion_context = edit_folder.load_conversion_context(profile, tmp_dirpath)
+        # what a check run pays before it can validate anything
+        context_seconds = time_repeated(lambda: edit_folder.load_conversion_context(profile, tmp_dirpath))
+        validation_context_seconds = time_repeated(lambda: edit_folder.load_validation_context(profile))
+        validation_context = edit_folder.load_validation_context(profile)
+
+        for folder_text in folder_texts:
+            result = edit_folder.convert_folder_text(folder_text, conversion_context)
+            validation = edit_folder.validate_folder_text(folder_text, validation_context)
+            if result.render_error_message() != validation.render_error_message() or result.warnings != validation.warnings:
+                raise RuntimeError(f"Validation differs from conversion for folder:\n{folder_text}")
+
+        convert_seconds = time_repeated(lambda: [edit_folder.convert_folder_text(folder_text, conversion_context) for folder_text in folder_texts])
+        validate_seconds = time_repeated(lambda: [edit_folder.validate_folder_text(folder_text, validation_context) for folder_text in folder_texts])
+
+        print(f"{num_folders} folders, validation matches conversion")
+        print(f"  load conversion context | {context_seconds * 1e3: >8.2f}ms")
+        print(f"  load validation context | {validation_context_seconds * 1e3: >8.2f}ms")
+        print(f"  convert folder          | {convert_seconds / num_folders * 1e6: >8.2f}us/folder")
+        print(f"  validate folder         | {validate_seconds / num_folders * 1e6: >8.2f}us/folder | speedup {convert_seconds / validate_seconds:.2f}x")
+
+def bench_diagnostics():
+    profile = EXE45_PROFILE
+    rng = random.Random(18)
+    num_folders = 2000
+
+    with tempfile.TemporaryDirectory() as tmp_dirname:
+        tmp_dirpath = pathlib.Path(tmp_dirname)
+        template_folder_dirpath = edit_folder.extract_save_folders(pathlib.Path(profile.template_save_filename), profile, tmp_dirpath, verbose=False)
+        template_folder_texts = [template_folder_filepath.read_text() for template_folder_filepath in sorted(template_folder_dirpath.iterdir())]
+
+    # bad submissions: typos, missing codes and extra copies
+    folder_texts = []
+    for i in range(num_folders):
+        folder_lines = rng.choice(template_folder_texts).splitlines()
+        for line_index in range(1, len(folder_lines)):
+            chip_name, _, chip_code = folder_lines[line_index].rpartition(" ")
+            mistake_kind = rng.randrange(8)
+            if mistake_kind == 0:
+                folder_lines[line_index] = f"{testing_support.make_typo(chip_name, rng, 1)} {chip_code}"
+            elif mistake_kind == 1:
+                folder_lines[line_index] = chip_name
+            elif mistake_kind == 2:
+                folder_lines[line_index] = folder_lines[1]
+        folder_texts.append("\n".join(folder_lines))
+
+    context = edit_folder.load_validation_context(profile)
+    validations = [edit_folder.validate_folder_text(folder_text, context) for folder_text in folder_texts]
+    report_entries = []
+    for validation in validations:
+        report_entry = {}
+        edit_folder.set_report_entry_diagnostics(report_entry, validation.diagnostics)
+        report_entries.append(report_entry)
+
+    num_diagnostics = sum(len(validation.diagnostics) for validation in validations)
+    render_seconds = time_repeated(lambda: [validation.render_error_message() for validation in validations])
+    report_seconds = time_repeated(lambda: [edit_folder.set_report_entry_diagnostics({}, validation.diagnostics) for validation in validations])
+    dump_seconds = time_repeated(lambda: json.dumps(report_entries))
+    count_seconds = time_repeated(lambda: diagnostics.count_diagnostic_codes(report_entries))
+
+    print(f"{num_folders} folders, {num_diagnostics} diagnostics")
+    for step_name, seconds in (("render text", render_seconds), ("report entries", report_seconds), ("dump JSON", dump_seconds), ("count codes", count_seconds)):
+        print(f"  {step_name: <14} | {seconds / num_diagnostics * 1e9: >8.1f}ns/diagnostic")
+
+def bench_stream():
+    profile = EXE45_PROFILE
+    num_saves = 300
+
+    with tempfile.TemporaryDirectory() as tmp_dirname:
+        tmp_dirpath = pathlib.Path(tmp_dirname)
+        saves_dirpath = tmp_dirpath / "saves"
+        saves_dirpath.mkdir()
+        save_filepaths = []
+        for i in range(num_saves):
+            save_filepath = saves_dirpath / f"save_{i}.sav"
+            shutil.copyfile(profile.template_save_filename, save_filepath)
+            save_filepaths.append(save_filepath)
+
+        def extract_to_stream(output_pathname):
+            folder_writer = folder_stream.open_folder_writer(str(output_pathname))
+            try:
+                return edit_folder.extract_saves_to_stream(save_filepaths, folder_writer, verbose=False)
+            finally:
+                folder_writer.close()
+
+        directories_seconds, _ = time_once(lambda: edit_folder.extract_saves_folders(save_filepaths, tmp_dirpath / "extracted", verbose=False))
+        jsonl_seconds, _ = time_once(lambda: extract_to_stream(tmp_dirpath / "extracted.jsonl"))
+        tar_seconds, _ = time_once(lambda: extract_to_stream(tmp_dirpath / "extracted.tar"))
+
+        with tarfile.open(tmp_dirpath / "extracted.tar") as tar_file:
+            for tar_info in tar_file:
+                if tar_file.extractfile(tar_info).read() != (tmp_dirpath / "extracted" / tar_info.name).read_bytes():
+                    raise RuntimeError(f"{tar_info.name} in the tar differs from the extracted file!")
+
+        with open(tmp_dirpath / "extracted.jsonl", "r") as f:
+            for line in f:
+                save_json = json.loads(line)
+                save_filepath = pathlib.Path(save_json["save"])
+                for navi_name, folder_text in save_json["folders"].items():
+                    if folder_text != (tmp_dirpath / "extracted" / save_filepath.stem / f"{save_filepath.stem}_{navi_name}.txt").read_text():
+                        raise RuntimeError(f"{save_filepath.stem} {navi_name} in the JSONL differs from the extracted file!")
+
+        print(f"{num_saves} saves, streamed folders are identical to extracted files")
+        for output_name, seconds in (("directories", directories_seconds), ("jsonl", jsonl_seconds), ("tar", tar_seconds)):
+            print(f"  {output_name: <11} | {seconds / num_saves * 1e6: >8.2f}us/save | speedup {directories_seconds / seconds:.2f}x")
+
+def swap_folder_chips(save_filepath, profile, navi_id, chip_slot_a, chip_slot_b):
+    save_data, checksum_tracker = edit_folder.read_save_from_file(save_filepath, profile, "Wrong save!", "Wrong checksum!")
+    chip_offset_a = profile.get_folder_chip_offset(navi_id, chip_slot_a)
+    chip_offset_b = profile.get_folder_chip_offset(navi_id, chip_slot_b)
+    chip_size = game_profiles.CHIP_AND_CODE_STRUCT.size
+    chip_a = save_data[chip_offset_a:chip_offset_a+chip_size]
+    save_data[chip_offset_a:chip_offset_a+chip_size] = save_data[chip_offset_b:chip_offset_b+chip_size]
+    save_data[chip_offset_b:chip_offset_b+chip_size] = chip_a
+    edit_folder.write_save_to_file(save_data, save_filepath, profile, checksum_tracker, fsync=False)
+
+def set_old_mtimes(filepaths):
+    old_time = time.time() - 3600
+    for filepath in filepaths:
+        os.utime(filepath, (old_time, old_time))
+
+def bench_incremental_extraction():
+    profile = EXE45_PROFILE
+    num_saves = 300
+    num_changed_saves = num_saves // 10
+
+    with tempfile.TemporaryDirectory() as tmp_dirname:
+        tmp_dirpath = pathlib.Path(tmp_dirname)
+        saves_dirpath = tmp_dirpath / "saves"
+        saves_dirpath.mkdir()
+        save_filepaths = []
+        for i in range(num_saves):
+            save_filepath = saves_dirpath / f"save_{i}.sav"
+            shutil.copyfile(profile.template_save_filename, save_filepath)
+            save_filepaths.append(save_filepath)
+
+        set_old_mtimes(save_filepaths)
+        extracted_dirpath = tmp_dirpath / "extracted"
+        extracted_dirpath.mkdir()
+
+        def extract_incremental():
+            manifest = edit_folder.load_extraction_manifest(extracted_dirpath)
+            edit_folder.extract_saves_folders(save_filepaths, extracted_dirpath, verbose=False, manifest=manifest)
+            return manifest
+
+        # the first extraction also loads the chip tables
+        edit_folder.extract_saves_folders(save_filepaths[:1], tmp_dirpath / "warmup", verbose=False)
+        full_seconds, _ = time_once(lambda: edit_folder.extract_saves_folders(save_filepaths, tmp_dirpath / "full", verbose=False))
+        first_seconds, first_manifest = time_once(extract_incremental)
+        unchanged_seconds, unchanged_manifest = time_once(extract_incremental)
+
+        # e.g. the saves were copied again, so only their folders tell that they're the same
+        set_old_mtimes(save_filepaths[:-1])
+        touched_seconds, touched_manifest = time_once(extract_incremental)
+
+        for save_filepath in save_filepaths[:num_changed_saves]:
+            swap_folder_chips(save_filepath, profile, 0, 0, 29)
+        set_old_mtimes(save_filepaths)
+        changed_seconds, changed_manifest = time_once(extract_incremental)
+
+        edit_folder.extract_saves_folders(save_filepaths, tmp_dirpath / "full", verbose=False)
+        for save_filepath in save_filepaths:
+            for full_filepath in (tmp_dirpath / "full" / save_filepath.stem).iterdir():
+                if full_filepath.read_bytes() != (extracted_dirpath / save_filepath.stem / full_filepath.name).read_bytes():
+                    raise RuntimeError(f"{full_filepath.name} differs from a full extraction!")
+
+        print(f"{num_saves} saves, incrementally extracted folders are identical to a full extraction")
+        for run_name, seconds, manifest in (("first run", first_seconds, first_manifest), ("unchanged", unchanged_seconds, unchanged_manifest), ("touched", touched_seconds, touched_manifest), (f"{num_changed_saves} changed", changed_seconds, changed_manifest)):
+            stats = manifest.get_stats()
+            print(f"  {run_name: <10} | {seconds / num_saves * 1e6: >8.2f}us/save | speedup {full_seconds / seconds:6.2f}x | {stats['unchanged']} unchanged, {stats['same_folders']} same folders, {stats['extracted']} extracted, {stats['files_written']} files written")
+
+FAKE_WRAM_SIZE = 0x40000
+
+def make_fake_replay_wram(template_save_data, profile, navi_id, rng):
+    wram_data = bytearray(FAKE_WRAM_SIZE)
+    wram_data[:len(template_save_data)] = template_save_data
+    wram_data[profile.navi_id_offset] = navi_id
+    for chip_slot in range(game_profiles.NUM_FOLDER_CHIPS):
+        other_chip_slot = rng.randrange(game_profiles.NUM_FOLDER_CHIPS)
+        chip_offset = profile.get_folder_chip_offset(navi_id, chip_slot)
+        other_chip_offset = profile.get_folder_chip_offset(navi_id, other_chip_slot)
+        chip_size = game_profiles.CHIP_AND_CODE_STRUCT.size
+        chip = wram_data[chip_offset:chip_offset+chip_size]
+        wram_data[chip_offset:chip_offset+chip_size] = wram_data[other_chip_offset:other_chip_offset+chip_size]
+        wram_data[other_chip_offset:other_chip_offset+chip_size] = chip
+
+    return wram_data
+
+def make_fake_replays(replays_dirpath, profile, num_replays, first_replay_index=0):
+    template_save_data, checksum_tracker = edit_folder.read_save_from_file(profile.template_save_filename, profile, "Wrong save!", "Wrong checksum!")
+    navi_ids = [navi["id"] for navi in profile.load_navis().values()]
+    rng = random.Random(45 + first_replay_index)
+    replay_filepaths = []
+
+    for i in range(first_replay_index, first_replay_index + num_replays):
+        local_side = {"game_info": {"patch": {"name": profile.patch_names[0], "version": rng.choice(("0.2.0", "0.6.0"))}}}
+        remote_side = {"game_info": {"patch": {"name": profile.patch_names[0], "version": rng.choice(("0.2.0", "0.6.0"))}}}
+        metadata = {"ts": 1660000000000 + i, "local_side": local_side, "remote_side": remote_side}
+        replay_filepath = replays_dirpath / f"replay_{i}.tangoreplay"
+        fake_tango.write_fake_replay(replay_filepath, metadata, make_fake_replay_wram(template_save_data, profile, rng.choice(navi_ids), rng), make_fake_replay_wram(template_save_data, profile, rng.choice(navi_ids), rng))
+        replay_filepaths.append(replay_filepath)
+
+    return replay_filepaths
+
+# The separate extract_wrams, extract_wrams_opponent and extract_metadatas passes, then
+# decoding the files they leave behind like dump_raw_stats_as_json
+def extract_replay_folder_infos_in_passes(tango_command, folder_info_tables):
+    chip_usage.extract_wrams(tango_command)
+    chip_usage.extract_wrams_opponent(tango_command)
+    chip_usage.extract_metadatas(tango_command)
+
+    all_folder_info = {}
+    for wram_filepath in pathlib.Path("replaywram").glob("*.bin"):
+        with open(wram_filepath, "rb") as f, open(f"metadata/{wram_filepath.stem}.json", "r") as f2:
+            all_folder_info[wram_filepath.stem] = chip_usage.get_folder_info(bytearray(f.read()), json.load(f2), wram_filepath.name, *folder_info_tables)
+
+    return all_folder_info
+
+def bench_replays():
+    profile = EXE45_PROFILE
+    num_replays = 24
+    tango_delay = 0.05
+    tango_command = (sys.executable, str(pathlib.Path("fake_tango.py").resolve()))
+    folder_info_tables = chip_usage.load_folder_info_tables()
+    old_cwd = os.getcwd()
+    old_tango_delay = os.environ.get(fake_tango.FAKE_TANGO_DELAY_ENV_VAR)
+
+    with tempfile.TemporaryDirectory() as tmp_dirname:
+        tmp_dirpath = pathlib.Path(tmp_dirname)
+        for dirname in ("done_replays", "inverted_replays", "replaywram", "metadata"):
+            (tmp_dirpath / dirname).mkdir()
+
+        replay_filepaths = make_fake_replays(tmp_dirpath / "done_replays", profile, num_replays)
+        os.environ[fake_tango.FAKE_TANGO_DELAY_ENV_VAR] = str(tango_delay)
+        try:
+            # the passes only work on the directories in the current directory
+            os.chdir(tmp_dirpath)
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    passes_seconds, passes_folder_info = time_once(lambda: extract_replay_folder_infos_in_passes(tango_command, folder_info_tables))
+            finally:
+                os.chdir(old_cwd)
+
+            pipeline_results = [(jobs, *time_once(lambda: chip_usage.extract_replay_folder_infos(replay_filepaths, tango_command, jobs, verbose=False))) for jobs in (1, 4, 8)]
+        finally:
+            if old_tango_delay is None:
+                del os.environ[fake_tango.FAKE_TANGO_DELAY_ENV_VAR]
+            else:
+                os.environ[fake_tango.FAKE_TANGO_DELAY_ENV_VAR] = old_tango_delay
+
+    for jobs, seconds, all_folder_info in pipeline_results:
+        if all_folder_info != passes_folder_info:
+            raise RuntimeError(f"Pipeline with {jobs} jobs decoded different folders than the separate passes!")
+
+    print(f"{num_replays} replays ({len(passes_folder_info)} folders), fake tango taking {tango_delay * 1000:.0f}ms per command, pipeline folders are identical to the separate passes")
+    print(f"  passes             | {passes_seconds / num_replays * 1000: >8.2f}ms/replay | speedup 1.00x")
+    for jobs, seconds, all_folder_info in pipeline_results:
+        print(f"  pipeline, {jobs} job{'s' if jobs != 1 else ' '} | {seconds / num_replays * 1000: >8.2f}ms/replay | speedup {passes_seconds / seconds:.2f}x")
+
+SIMPLE_STATS_FILENAMES = ("exe45_simple_chip_usage.txt", "exe45_simple_chip_usage_update_2.txt", "exe45_simple_chip_usage_by_navi.txt", "exe45_simple_chip_usage_by_navi_update_2.txt")
+
+def read_simple_stats_files():
+    return {simple_stats_filename: pathlib.Path(simple_stats_filename).read_text() for simple_stats_filename in SIMPLE_STATS_FILENAMES}
+
+# what a run took before the ledger: every replay through tango, then the stats from the all folder info json
+def rebuild_replay_stats(tango_command):
+    replay_filepaths = [pathlib.Path(replay_filename) for replay_filename in glob.glob("done_replays/*.tangoreplay")]
+    chip_usage.dump_all_folder_info(chip_usage.extract_replay_folder_infos(replay_filepaths, tango_command, verbose=False))
+    chip_usage.dump_simple_stats()
+    chip_usage.dump_simple_stats_update_2()
+    chip_usage.dump_simple_stats_by_navi()
+    chip_usage.dump_simple_stats_by_navi(True)
+    return read_simple_stats_files()
+
+def bench_replay_ledger():
+    profile = EXE45_PROFILE
+    num_replays = 40
+    num_new_replays = 4
+    tango_command = (sys.executable, str(pathlib.Path("fake_tango.py").resolve()))
+    old_cwd = os.getcwd()
+
+    with tempfile.TemporaryDirectory() as tmp_dirname:
+        tmp_dirpath = pathlib.Path(tmp_dirname)
+        shutil.copytree("data", tmp_dirpath / "data")
+        (tmp_dirpath / "done_replays").mkdir()
+        make_fake_replays(tmp_dirpath / "done_replays", profile, num_replays)
+
+        os.chdir(tmp_dirpath)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                first_seconds, num_extracted = time_once(lambda: chip_usage.update_replay_stats(tango_command, verbose=False))
+                unchanged_seconds, num_unchanged_extracted = time_once(lambda: chip_usage.update_replay_stats(tango_command, verbose=False))
+                make_fake_replays(pathlib.Path("done_replays"), profile, num_new_replays, num_replays)
+                new_seconds, num_new_extracted = time_once(lambda: chip_usage.update_replay_stats(tango_command, verbose=False))
+                incremental_simple_stats = read_simple_stats_files()
+                rebuild_seconds, rebuilt_simple_stats = time_once(lambda: rebuild_replay_stats(tango_command))
+
+                # counted again from the ledger when the saved counts are behind it
+                pathlib.Path(chip_usage.REPLAY_STATS_FILENAME).unlink()
+                recount_seconds, num_recount_extracted = time_once(lambda: chip_usage.update_replay_stats(tango_command, verbose=False))
+                recounted_simple_stats = read_simple_stats_files()
+        finally:
+            os.chdir(old_cwd)
+
+    if (num_extracted, num_unchanged_extracted, num_new_extracted, num_recount_extracted) != (num_replays, 0, num_new_replays, 0):
+        raise RuntimeError(f"Extracted {num_extracted}, {num_unchanged_extracted}, {num_new_extracted} and {num_recount_extracted} replays!")
+    if incremental_simple_stats != rebuilt_simple_stats or recounted_simple_stats != rebuilt_simple_stats:
+        raise RuntimeError("Stats from the ledger differ from a full rebuild!")
+
+    print(f"{num_replays} + {num_new_replays} replays, stats from the ledger are identical to a full rebuild")
+    for run_name, seconds in (("full rebuild", rebuild_seconds), ("first run", first_seconds), ("no new", unchanged_seconds), (f"{num_new_replays} new", new_seconds), ("recount", recount_seconds)):
+        print(f"  {run_name: <12} | {seconds * 1000: >9.2f}ms | speedup {rebuild_seconds / seconds:7.2f}x")
+
+def dump_simple_stats_from_json():
+    chip_usage.dump_simple_stats()
+    chip_usage.dump_simple_stats_update_2()
+    chip_usage.dump_simple_stats_by_navi()
+    chip_usage.dump_simple_stats_by_navi(True)
+    return read_simple_stats_files()
+
+def bench_folder_store():
+    num_json_folders = 20000
+    num_store_folders = 300000
+    folder_info_tables = chip_usage.load_folder_info_tables()
+    old_cwd = os.getcwd()
+
+    with tempfile.TemporaryDirectory() as tmp_dirname:
+        tmp_dirpath = pathlib.Path(tmp_dirname)
+        shutil.copytree("data", tmp_dirpath / "data")
+        all_folder_info = {f"replay_{i}": testing_support.folder_record_to_folder_info(folder_record, *folder_info_tables) for i, folder_record in enumerate(testing_support.make_fake_folder_records(num_json_folders, *folder_info_tables))}
+
+        os.chdir(tmp_dirpath)
+        try:
+            chip_usage.dump_all_folder_info(all_folder_info)
+            json_seconds, json_simple_stats = time_once(dump_simple_stats_from_json)
+            store_seconds, store_simple_stats = time_once(lambda: (chip_usage.dump_simple_stats_from_folder_store(), read_simple_stats_files())[1])
+            json_size = pathlib.Path("exe45_pvp_all_folder_info.json").stat().st_size
+            store_size = pathlib.Path(chip_usage.FOLDER_STORE_FILENAME).stat().st_size
+        finally:
+            os.chdir(old_cwd)
+
+        if store_simple_stats != json_simple_stats:
+            raise RuntimeError("Stats from the folder store differ from the ones from the json!")
+
+        with folder_store.FolderStore.open(tmp_dirpath / chip_usage.FOLDER_STORE_FILENAME) as store:
+            stored_folder_records = sorted((store.columns["timestamps"][i], store.versions[store.columns["version_ids"][i]], store.columns["navi_ids"][i], store.columns["reg_slots"][i], store.get_chip_words(i)) for i in range(len(store)))
+            if stored_folder_records != sorted(chip_usage.folder_info_to_store_record(cur_folder_info) for cur_folder_info in all_folder_info.values()):
+                raise RuntimeError("Folder store doesn't have the same folders as the json!")
+
+        print(f"{num_json_folders} folders, stats from the folder store are identical to the ones from the json (json {json_size / 1e6:.1f}MB, store {store_size / 1e6:.1f}MB)")
+        print(f"  4 stats files from json  | {json_seconds * 1000: >8.2f}ms")
+        print(f"  4 stats files from store | {store_seconds * 1000: >8.2f}ms | speedup {json_seconds / store_seconds:.2f}x")
+
+        store_filepath = tmp_dirpath / "large.fldstore"
+        folder_records = testing_support.make_fake_folder_records(num_store_folders, *folder_info_tables)
+        write_seconds, _ = time_once(lambda: folder_store.write_folder_store(store_filepath, folder_records))
+        with folder_store.FolderStore.open(store_filepath) as store:
+            by_group_seconds, chip_usage_by_group = time_once(lambda: store.count_chip_usage_by_group())
+
+        expected_chip_usage_by_group = collections.defaultdict(collections.Counter)
+        expected_total_folders_by_group = collections.Counter()
+        for timestamp, version, navi_id, reg_slot, chip_words in folder_records:
+            expected_total_folders_by_group[(version, navi_id)] += 1
+            expected_chip_usage_by_group[(version, navi_id)].update(set(chip_word & 0x1ff for chip_word in chip_words))
+        if {(version, navi_id): num_folders for version, navi_id, num_folders, chip_usage, chip_pairs in chip_usage_by_group} != expected_total_folders_by_group or {(version, navi_id): chip_usage for version, navi_id, num_folders, chip_usage, chip_pairs in chip_usage_by_group} != expected_chip_usage_by_group:
+            raise RuntimeError("Folder store chip usage counts are wrong!")
+
+        print(f"{num_store_folders} folders ({store_filepath.stat().st_size / 1e6:.1f}MB store, {len(chip_usage_by_group)} version and navi groups)")
+        print(f"  write                  | {write_seconds * 1000: >8.2f}ms")
+        print(f"  chip usage by group    | {by_group_seconds * 1000: >8.2f}ms")
+
+# the 4 simple stats files, plus a total and by navi file for every version on its own
+def get_chip_usage_bench_reports():
+    reports = list(chip_usage.ALL_SIMPLE_STATS_REPORTS)
+    for version in testing_support.FAKE_FOLDER_VERSIONS:
+        reports.append(chip_usage.ChipUsageReport(f"exe45_simple_chip_usage_{version}.txt", (version,)))
+        reports.append(chip_usage.ChipUsageReport(f"exe45_simple_chip_usage_by_navi_{version}.txt", (version,), by_navi=True))
+
+    return reports
+
+def read_chip_usage_report_files(reports):
+    return {report.filename: pathlib.Path(report.filename).read_text() for report in reports}
+
+def bench_chip_usage_reports():
+    num_folders = 20000
+    folder_info_tables = chip_usage.load_folder_info_tables()
+    reports = get_chip_usage_bench_reports()
+    old_cwd = os.getcwd()
+
+    with tempfile.TemporaryDirectory() as tmp_dirname:
+        tmp_dirpath = pathlib.Path(tmp_dirname)
+        shutil.copytree("data", tmp_dirpath / "data")
+        all_folder_info = {f"replay_{i}": testing_support.folder_record_to_folder_info(folder_record, *folder_info_tables) for i, folder_record in enumerate(testing_support.make_fake_folder_records(num_folders, *folder_info_tables))}
+
+        os.chdir(tmp_dirpath)
+        try:
+            chip_usage.dump_all_folder_info(all_folder_info)
+            # one mode per stats file, each loading and counting the json again
+            modes_seconds, modes_simple_stats = time_once(dump_simple_stats_from_json)
+            json_seconds, json_reports = time_once(lambda: (chip_usage.dump_all_simple_stats(reports), read_chip_usage_report_files(reports))[1])
+            store_seconds, store_reports = time_once(lambda: (chip_usage.dump_simple_stats_from_folder_store(reports=reports), read_chip_usage_report_files(reports))[1])
+        finally:
+            os.chdir(old_cwd)
+
+    if store_reports != json_reports:
+        raise RuntimeError("Reports from the folder store differ from the ones from the json!")
+    if any(json_reports[simple_stats_filename] != simple_stats for simple_stats_filename, simple_stats in modes_simple_stats.items()):
+        raise RuntimeError("Reports from one pass differ from the ones from the separate modes!")
+
+    print(f"{num_folders} folders, reports from one pass are identical to the separate modes")
+    print(f"  4 reports, 1 mode each      | {modes_seconds * 1000: >8.2f}ms")
+    print(f"  {len(reports)} reports, 1 pass (json)  | {json_seconds * 1000: >8.2f}ms | speedup {modes_seconds / json_seconds:.2f}x")
+    print(f"  {len(reports)} reports, 1 pass (store) | {store_seconds * 1000: >8.2f}ms | speedup {modes_seconds / store_seconds:.2f}x")
+
+# what counting the pairs folder by folder takes: every pair of distinct chips in every folder
+def count_chip_pairs_by_folder(folder_records):
+    pair_stats = chip_pairs.ChipPairStats()
+    for timestamp, version, navi_id, reg_slot, chip_words in folder_records:
+        folder_chip_ids = sorted(set(chip_word & 0x1ff for chip_word in chip_words))
+        chip_pairs_in_folder = [(chip_id, other_chip_id) for i, chip_id in enumerate(folder_chip_ids) for other_chip_id in folder_chip_ids[i+1:]]
+        pair_stats.add_counts(version, navi_id, 1, folder_chip_ids, chip_pairs_in_folder)
+
+    return pair_stats
+
+def bench_chip_pairs():
+    num_folders = 300000
+    folder_info_tables = chip_usage.load_folder_info_tables()
+    folder_records = testing_support.make_fake_folder_records(num_folders, *folder_info_tables)
+
+    with tempfile.TemporaryDirectory() as tmp_dirname:
+        store_filepath = pathlib.Path(tmp_dirname) / "large.fldstore"
+        folder_store.write_folder_store(store_filepath, folder_records)
+        with folder_store.FolderStore.open(store_filepath) as store:
+            usage_seconds, _ = time_once(lambda: chip_usage.count_folder_store_chip_usage_stats(store, *folder_info_tables))
+            pair_stats = chip_pairs.ChipPairStats()
+            pairs_seconds, _ = time_once(lambda: chip_usage.count_folder_store_chip_usage_stats(store, *folder_info_tables, pair_stats))
+
+    by_folder_seconds, expected_pair_stats = time_once(lambda: count_chip_pairs_by_folder(folder_records))
+    for group_key, expected_pair_counts in expected_pair_stats.groups.items():
+        pair_counts = pair_stats.groups[group_key]
+        if (pair_counts.num_folders, pair_counts.chip_usage, pair_counts.chip_pairs) != (expected_pair_counts.num_folders, expected_pair_counts.chip_usage, expected_pair_counts.chip_pairs):
+            raise RuntimeError(f"Chip pair counts of {group_key} are wrong!")
+    if len(pair_stats.groups) != len(expected_pair_stats.groups):
+        raise RuntimeError("Chip pair counts have extra groups!")
+
+    reports = (chip_usage.CHIP_PAIRS_REPORT, chip_usage.CHIP_PAIRS_BY_VERSION_REPORT, chip_usage.CHIP_PAIRS_BY_NAVI_REPORT, chip_usage.CHIP_PAIR_MATRIX_REPORT)
+    report_seconds = []
+    for report in reports:
+        seconds, output = time_once(lambda: report.format(pair_stats, *folder_info_tables))
+        report_seconds.append((report.filename, seconds, len(output)))
+
+    all_pair_counts = pair_stats.get_pair_counts()
+    print(f"{num_folders} folders, {len(pair_stats.groups)} version and navi groups, {len(all_pair_counts.chip_pairs)} chip pairs, counts are identical to counting folder by folder")
+    print(f"  by folder                 | {by_folder_seconds * 1000: >9.2f}ms")
+    print(f"  chip usage only (store)   | {usage_seconds * 1000: >9.2f}ms")
+    print(f"  chip usage + pairs (store)| {pairs_seconds * 1000: >9.2f}ms | speedup {by_folder_seconds / pairs_seconds:.2f}x over by folder")
+    for report_filename, seconds, output_len in report_seconds:
+        print(f"  {report_filename: <38} | {seconds * 1000: >9.2f}ms | {output_len / 1e3:.0f}KB")
+
+BENCHMARKS = {
+    "mask": bench_mask,
+    "checksum": bench_checksum,
+    "batch": bench_batch,
+    "matcher": bench_matcher,
+    "kernels": bench_kernels,
+    "suggestions": bench_suggestion_cache,
+    "chipdb": bench_chip_db,
+    "codes": bench_codes,
+    "decode": bench_folder_decode,
+    "encode": bench_folder_encode,
+    "stamp": bench_stamp,
+    "crash": bench_crash,
+    "server": bench_server,
+    "check": bench_check,
+    "diagnostics": bench_diagnostics,
+    "stream": bench_stream,
+    "incremental": bench_incremental_extraction,
+    "replays": bench_replays,
+    "ledger": bench_replay_ledger,
+    "store": bench_folder_store,
+    "reports": bench_chip_usage_reports,
+    "pairs": bench_chip_pairs,
+}
+
+def main():
+    benchmark_names = sys.argv[1:] if len(sys.argv) > 1 else list(BENCHMARKS.keys())
+
+    for benchmark_name in benchmark_names:
+        benchmark = BENCHMARKS.get(benchmark_name)
+        if benchmark is None:
+            print(f"Unknown benchmark {benchmark_name}! Available: {', '.join(BENCHMARKS.keys())}")
+            sys.exit(1)
+
+        print(f"=== {benchmark_name} ===")
+        benchmark()
+
+if __name__ == "__main__":
+    main()
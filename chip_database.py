@@ -0,0 +1,293 @@
+# =============================================================================
+# MIT License
+# 
+# Copyright (c) 2022 luckytyphlosion
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# =============================================================================
+
+import hashlib
+import json
+import mmap
+import os
+import pathlib
+import struct
+
+import game_profiles
+import atomic_file
+
+# Compiled form of a profile's chip and navi JSON, so that startup doesn't have to parse JSON
+# and casefold every name. The file is rebuilt whenever the JSON it came from changes.
+#
+# Layout: header, then one column per chip field and per navi field, then every string
+# (library names, chip names, casefolded chip names, chip codes, navi names, casefolded
+# navi names) as UTF-8 joined by NULs. Each column is decoded with a single unpack.
+
+CHIP_DB_MAGIC = b"MMBNCHDB"
+CHIP_DB_VERSION = 1
+CHIP_DB_SUFFIX = ".chipdb"
+
+# magic, version, num chips, num navis, num libraries, sha1 of the sources,
+# then mtime_ns and size of the chips and navis JSON
+CHIP_DB_HEADER_STRUCT = struct.Struct("<8sHHHH20sqqqq")
+# field type of each column: chip id, mb, library index, code mask
+CHIP_COLUMN_TYPES = ("H", "B", "B", "I")
+# navi id, mb, megafolder, gigafolder, buster level
+NAVI_COLUMN_TYPES = ("B", "B", "B", "B", "B")
+
+ALL_CHIP_CODES = "ABCDEFGHIJKLMNOPQRSTUVWXYZ*"
+CHIP_CODE_TO_MASK = {chip_code: 1 << i for i, chip_code in enumerate(ALL_CHIP_CODES)}
+
+def codes_to_mask(codes):
+    code_mask = 0
+    for chip_code in codes:
+        code_mask |= CHIP_CODE_TO_MASK[chip_code]
+
+    return code_mask
+
+def mask_to_codes(code_mask):
+    return tuple(chip_code for chip_code, chip_code_mask in CHIP_CODE_TO_MASK.items() if code_mask & chip_code_mask)
+
+class ChipInfo:
+    __slots__ = ("id", "name", "name_uncased", "codes", "code_mask", "mb", "library")
+
+    def __init__(self, id, name, name_uncased, codes, code_mask, mb, library):
+        self.id = id
+        self.name = name
+        self.name_uncased = name_uncased
+        self.codes = codes
+        # a single code check is faster as `chip_code in codes`, the mask is for queries over many chips
+        self.code_mask = code_mask
+        self.mb = mb
+        self.library = library
+
+class NaviInfo:
+    __slots__ = ("id", "name", "name_uncased", "mb", "megafolder", "gigafolder", "buster_level")
+
+    def __init__(self, id, name, name_uncased, mb, megafolder, gigafolder, buster_level):
+        self.id = id
+        self.name = name
+        self.name_uncased = name_uncased
+        self.mb = mb
+        self.megafolder = megafolder
+        self.gigafolder = gigafolder
+        self.buster_level = buster_level
+
+class ChipDatabase:
+    __slots__ = ("chips", "chips_uncased", "chips_by_id", "navis", "navis_uncased", "source_fingerprint", "chips_with_code_mask")
+
+    # chips and navis are keyed by name, in the same order as the JSON
+    def __init__(self, chips, navis, source_fingerprint):
+        self.chips = chips
+        self.chips_uncased = {chip_info.name_uncased: chip_info for chip_info in chips.values()}
+        self.chips_by_id = {chip_info.id: chip_info for chip_info in chips.values()}
+        self.navis = navis
+        self.navis_uncased = {navi.name_uncased: navi for navi in navis.values()}
+        self.source_fingerprint = source_fingerprint
+        self.chips_with_code_mask = {}
+
+    # chips that come in any of the codes in code_mask, in table order
+    def get_chips_with_code_mask(self, code_mask):
+        chips_with_code_mask = self.chips_with_code_mask.get(code_mask)
+        if chips_with_code_mask is None:
+            chips_with_code_mask = tuple(chip_info for chip_info in self.chips.values() if chip_info.code_mask & code_mask)
+            self.chips_with_code_mask[code_mask] = chips_with_code_mask
+
+        return chips_with_code_mask
+
+    def get_chips_in_code(self, chip_code):
+        return self.get_chips_with_code_mask(CHIP_CODE_TO_MASK.get(chip_code, 0))
+
+def get_chip_db_filepath(profile):
+    return pathlib.Path(profile.chips_filename).with_suffix(CHIP_DB_SUFFIX)
+
+def stat_source(filename):
+    if filename is None:
+        return 0, 0
+
+    source_stat = os.stat(filename)
+    return source_stat.st_mtime_ns, source_stat.st_size
+
+def read_sources(profile):
+    with open(profile.chips_filename, "rb") as f:
+        chips_json_bytes = f.read()
+
+    if profile.navis_filename is not None:
+        with open(profile.navis_filename, "rb") as f:
+            navis_json_bytes = f.read()
+    else:
+        navis_json_bytes = json.dumps(profile.builtin_navis).encode("utf-8")
+
+    return chips_json_bytes, navis_json_bytes
+
+def fingerprint_sources(chips_json_bytes, navis_json_bytes):
+    fingerprint = hashlib.sha1(chips_json_bytes)
+    fingerprint.update(navis_json_bytes)
+    return fingerprint.digest()
+
+def parse_sources(chips_json_bytes, navis_json_bytes, source_fingerprint):
+    chips = {}
+    for chip_name, chip_json in json.loads(chips_json_bytes).items():
+        codes = tuple(chip_json["codes"])
+        chips[chip_name] = ChipInfo(chip_json["id"], chip_json["name"], chip_name.casefold(), codes, codes_to_mask(codes), chip_json["mb"], chip_json["library"])
+
+    navis = {}
+    for navi_name, navi_json in json.loads(navis_json_bytes).items():
+        navis[navi_name] = NaviInfo(navi_json["id"], navi_json["name"], navi_name.casefold(), navi_json["mb"], navi_json["megafolder"], navi_json["gigafolder"], navi_json.get("busterLevel", 0))
+
+    return ChipDatabase(chips, navis, source_fingerprint)
+
+def compile_chip_db(chip_db, chips_source_stat, navis_source_stat):
+    chips = chip_db.chips.values()
+    navis = chip_db.navis.values()
+    libraries = list(dict.fromkeys(chip_info.library for chip_info in chips))
+    library_indices = {library: library_index for library_index, library in enumerate(libraries)}
+
+    chip_columns = (
+        [chip_info.id for chip_info in chips],
+        [chip_info.mb for chip_info in chips],
+        [library_indices[chip_info.library] for chip_info in chips],
+        [chip_info.code_mask for chip_info in chips]
+    )
+    navi_columns = (
+        [navi.id for navi in navis],
+        [navi.mb for navi in navis],
+        [navi.megafolder for navi in navis],
+        [navi.gigafolder for navi in navis],
+        [navi.buster_level for navi in navis]
+    )
+    # the key is the name everywhere in the JSON, so only the keys are stored
+    strings = libraries + list(chip_db.chips.keys()) + [chip_info.name_uncased for chip_info in chips] + ["".join(chip_info.codes) for chip_info in chips] + list(chip_db.navis.keys()) + [navi.name_uncased for navi in navis]
+
+    compiled_chip_db = [CHIP_DB_HEADER_STRUCT.pack(CHIP_DB_MAGIC, CHIP_DB_VERSION, len(chips), len(navis), len(libraries), chip_db.source_fingerprint, *chips_source_stat, *navis_source_stat)]
+    for column_type, column in zip(CHIP_COLUMN_TYPES, chip_columns):
+        compiled_chip_db.append(struct.pack(f"<{len(chips)}{column_type}", *column))
+    for column_type, column in zip(NAVI_COLUMN_TYPES, navi_columns):
+        compiled_chip_db.append(struct.pack(f"<{len(navis)}{column_type}", *column))
+    compiled_chip_db.append("\0".join(strings).encode("utf-8"))
+
+    return b"".join(compiled_chip_db)
+
+def read_chip_db_header(chip_db_view):
+    if len(chip_db_view) < CHIP_DB_HEADER_STRUCT.size:
+        return None
+
+    header = CHIP_DB_HEADER_STRUCT.unpack_from(chip_db_view, 0)
+    if header[0] != CHIP_DB_MAGIC or header[1] != CHIP_DB_VERSION:
+        return None
+
+    return header
+
+def unpack_columns(chip_db_view, offset, num_rows, column_types):
+    columns = []
+    for column_type in column_types:
+        column_struct = struct.Struct(f"<{num_rows}{column_type}")
+        columns.append(column_struct.unpack_from(chip_db_view, offset))
+        offset += column_struct.size
+
+    return columns, offset
+
+def decode_chip_db(chip_db_view, header):
+    num_chips, num_navis, num_libraries = header[2:5]
+    chip_columns, offset = unpack_columns(chip_db_view, CHIP_DB_HEADER_STRUCT.size, num_chips, CHIP_COLUMN_TYPES)
+    navi_columns, offset = unpack_columns(chip_db_view, offset, num_navis, NAVI_COLUMN_TYPES)
+    strings = str(chip_db_view[offset:], "utf-8").split("\0")
+    if len(strings) != num_libraries + num_chips * 3 + num_navis * 2:
+        raise ValueError("Chip database strings don't match the header!")
+
+    libraries = strings[:num_libraries]
+    chip_names = strings[num_libraries:num_libraries+num_chips]
+    chip_names_uncased = strings[num_libraries+num_chips:num_libraries+num_chips*2]
+    chip_codes = strings[num_libraries+num_chips*2:num_libraries+num_chips*3]
+    navi_names = strings[num_libraries+num_chips*3:num_libraries+num_chips*3+num_navis]
+    navi_names_uncased = strings[num_libraries+num_chips*3+num_navis:]
+
+    chip_ids, chip_mbs, chip_library_indices, chip_code_masks = chip_columns
+    chip_libraries = [libraries[library_index] for library_index in chip_library_indices]
+    chips = dict(zip(chip_names, map(ChipInfo, chip_ids, chip_names, chip_names_uncased, map(tuple, chip_codes), chip_code_masks, chip_mbs, chip_libraries)))
+    navis = dict(zip(navi_names, map(NaviInfo, navi_columns[0], navi_names, navi_names_uncased, *navi_columns[1:])))
+
+    return ChipDatabase(chips, navis, header[5])
+
+def build_chip_db(profile, chip_db_filepath=None):
+    if chip_db_filepath is None:
+        chip_db_filepath = get_chip_db_filepath(profile)
+
+    chips_source_stat = stat_source(profile.chips_filename)
+    navis_source_stat = stat_source(profile.navis_filename)
+    chips_json_bytes, navis_json_bytes = read_sources(profile)
+    chip_db = parse_sources(chips_json_bytes, navis_json_bytes, fingerprint_sources(chips_json_bytes, navis_json_bytes))
+    compiled_chip_db = compile_chip_db(chip_db, chips_source_stat, navis_source_stat)
+
+    # other processes may be rebuilding or mmapping the same database, so it must never be seen half written
+    try:
+        atomic_file.write_file_atomic(chip_db_filepath, compiled_chip_db, fsync=False)
+    except OSError:
+        # e.g. a read-only install, or the old database is mapped on Windows, just use the JSON this time
+        pass
+
+    return chip_db
+
+def load_compiled_chip_db(profile, chip_db_filepath):
+    try:
+        f = open(chip_db_filepath, "rb")
+    except OSError:
+        return None
+
+    with f:
+        try:
+            chip_db_mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # empty file
+            return None
+
+    with chip_db_mmap, memoryview(chip_db_mmap) as chip_db_view:
+        header = read_chip_db_header(chip_db_view)
+        if header is None:
+            return None
+
+        # any change to the JSON changes its mtime, so the JSON only needs to be read when rebuilding
+        if header[6:8] != stat_source(profile.chips_filename) or header[8:10] != stat_source(profile.navis_filename):
+            return None
+
+        try:
+            return decode_chip_db(chip_db_view, header)
+        except (struct.error, ValueError, IndexError):
+            return None
+
+def load_chip_db(profile):
+    chip_db_filepath = get_chip_db_filepath(profile)
+    chip_db = load_compiled_chip_db(profile, chip_db_filepath)
+    if chip_db is None:
+        chip_db = build_chip_db(profile, chip_db_filepath)
+
+    return chip_db
+
+def main():
+    for profile in game_profiles.GAME_PROFILES.values():
+        chip_db_filepath = get_chip_db_filepath(profile)
+        if not os.path.isfile(profile.chips_filename):
+            print(f"Skipping {profile.name}, {profile.chips_filename} doesn't exist")
+            continue
+
+        build_chip_db(profile, chip_db_filepath)
+        print(f"Wrote {chip_db_filepath} for {profile.name}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# =============================================================================
+# MIT License
+# 
+# Copyright (c) 2022 luckytyphlosion
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# =============================================================================
+
+# Which chips are run together. For each pair of chips, the number of folders that have both,
+# along with how many folders have each chip, so conditional probabilities and lift can be
+# worked out for any version or navi filter after the pairs are counted once.
+
+import collections
+
+class ChipPairCounts:
+    __slots__ = ("num_folders", "chip_usage", "chip_pairs")
+
+    def __init__(self):
+        self.num_folders = 0
+        # {chip id: number of folders with the chip}
+        self.chip_usage = collections.Counter()
+        # {(chip id, other chip id): number of folders with both}, with chip id < other chip id
+        self.chip_pairs = collections.Counter()
+
+    def add_counts(self, num_folders, chip_usage, chip_pairs):
+        self.num_folders += num_folders
+        self.chip_usage.update(chip_usage)
+        self.chip_pairs.update(chip_pairs)
+
+    def update(self, other):
+        self.add_counts(other.num_folders, other.chip_usage, other.chip_pairs)
+
+    def get_pair_count(self, chip_id, other_chip_id):
+        if chip_id == other_chip_id:
+            return self.chip_usage.get(chip_id, 0)
+        elif chip_id < other_chip_id:
+            return self.chip_pairs.get((chip_id, other_chip_id), 0)
+        else:
+            return self.chip_pairs.get((other_chip_id, chip_id), 0)
+
+    # Probability that a folder with chip_id also has other_chip_id
+    def get_conditional_probability(self, chip_id, other_chip_id):
+        amount_used = self.chip_usage.get(chip_id, 0)
+        if amount_used == 0:
+            return 0.0
+
+        return self.get_pair_count(chip_id, other_chip_id) / amount_used
+
+    # How many times more often the chips are in a folder together than they would be
+    # if each folder picked them independently. 1 is no synergy.
+    def get_lift(self, chip_id, other_chip_id):
+        expected_amount_used_together = self.chip_usage.get(chip_id, 0) * self.chip_usage.get(other_chip_id, 0)
+        if expected_amount_used_together == 0:
+            return 0.0
+
+        return self.get_pair_count(chip_id, other_chip_id) * self.num_folders / expected_amount_used_together
+
+    # Yields (chip id, other chip id, number of folders with both, P(other chip | chip), P(chip | other chip), lift)
+    # for the pairs in at least min_together folders
+    def iter_pair_stats(self, min_together=1):
+        num_folders = self.num_folders
+        chip_usage = self.chip_usage
+
+        for (chip_id, other_chip_id), amount_used_together in self.chip_pairs.items():
+            if amount_used_together < min_together:
+                continue
+
+            amount_used = chip_usage[chip_id]
+            other_amount_used = chip_usage[other_chip_id]
+            yield (chip_id, other_chip_id, amount_used_together, amount_used_together / amount_used, amount_used_together / other_amount_used, amount_used_together * num_folders / (amount_used * other_amount_used))
+
+    # Dense chips x chips matrix of the counts, rows and columns in the order of chip_ids.
+    # The diagonal is the number of folders with each chip.
+    def get_matrix(self, chip_ids):
+        return [[self.get_pair_count(chip_id, other_chip_id) for other_chip_id in chip_ids] for chip_id in chip_ids]
+
+# Chip pair counts for each (version, navi id), so they can be limited to some versions
+# or navis afterwards without counting the pairs again.
+class ChipPairStats:
+    __slots__ = ("groups",)
+
+    def __init__(self):
+        # {(version, navi id): ChipPairCounts}
+        self.groups = {}
+
+    def add_counts(self, version, navi_id, num_folders, chip_usage, chip_pairs):
+        pair_counts = self.groups.get((version, navi_id))
+        if pair_counts is None:
+            pair_counts = ChipPairCounts()
+            self.groups[(version, navi_id)] = pair_counts
+
+        pair_counts.add_counts(num_folders, chip_usage, chip_pairs)
+
+    # in the order they were added
+    def get_versions(self):
+        return list(dict.fromkeys(version for version, navi_id in self.groups.keys()))
+
+    def get_navi_ids(self):
+        return sorted(set(navi_id for version, navi_id in self.groups.keys()))
+
+    # The counts of the folders of the given versions and navi ids, or all of them if None
+    def get_pair_counts(self, versions=None, navi_ids=None):
+        pair_counts = ChipPairCounts()
+        for (version, navi_id), group_pair_counts in self.groups.items():
+            if (versions is None or version in versions) and (navi_ids is None or navi_id in navi_ids):
+                pair_counts.update(group_pair_counts)
+
+        return pair_counts
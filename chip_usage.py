@@ -28,18 +28,24 @@ import pathlib
 import shutil
 import json
 import collections
-import struct
-
-MASK_OFFSET = 0x3c84
-GAME_NAME_OFFSET = 0x4ba8
-CHECKSUM_OFFSET = 0x4b88
-REG_STRUCTURE_OFFSET = 0x8530
-SAVE_SIZE = 0xc7a8
-FOLDER_OFFSET = 0x7500
-
-def extract_wrams():
+import concurrent.futures
+import itertools
+import contextlib
+import tempfile
+
+import game_profiles
+import folder_codec
+import replay_ledger
+import atomic_file
+import folder_store
+import chip_pairs
+
+# fake_tango.py can stand in for tango, e.g. (sys.executable, "fake_tango.py")
+TANGO_COMMAND = ("C:/Users/User/AppData/Local/Programs/Tango/tango.exe",)
+
+def extract_wrams(tango_command=TANGO_COMMAND):
     for replay_filename in glob.glob("done_replays/*.tangoreplay"):
-        replay_wram = subprocess.check_output(("C:/Users/User/AppData/Local/Programs/Tango/tango.exe", replay_filename, "wram"))
+        replay_wram = subprocess.check_output((*tango_command, replay_filename, "wram"))
         wram_filename = f"replaywram/{pathlib.Path(replay_filename).stem}.bin"
         with open(wram_filename, "wb+") as f:
             f.write(replay_wram)
@@ -52,55 +58,96 @@ def fix_wram_names():
         shutil.move(wram_filename, fixed_wram_filename)
         print(f"Renamed {wram_filename}!")
 
-def extract_wrams_opponent():
+def extract_wrams_opponent(tango_command=TANGO_COMMAND):
     for replay_filename in glob.glob("done_replays/*.tangoreplay"):
         invert_filename = f"inverted_replays/{pathlib.Path(replay_filename).stem}_opp.tangoreplay"
-        subprocess.run(("C:/Users/User/AppData/Local/Programs/Tango/tango.exe", replay_filename, "invert", invert_filename), check=True)
-        invert_replay_wram = subprocess.check_output(("C:/Users/User/AppData/Local/Programs/Tango/tango.exe", invert_filename, "wram"))
+        subprocess.run((*tango_command, replay_filename, "invert", invert_filename), check=True)
+        invert_replay_wram = subprocess.check_output((*tango_command, invert_filename, "wram"))
         invert_wram_filename = f"replaywram/{pathlib.Path(replay_filename).stem}_opp.bin"
         with open(invert_wram_filename, "wb+") as f:
             f.write(invert_replay_wram)
 
         print(f"Done {replay_filename} invert!")
 
-def extract_metadatas():
+def extract_metadatas(tango_command=TANGO_COMMAND):
     for replay_filename in glob.glob("done_replays/*.tangoreplay") + glob.glob("inverted_replays/*.tangoreplay"):
-        metadata = subprocess.check_output(("C:/Users/User/AppData/Local/Programs/Tango/tango.exe", replay_filename, "metadata")).decode("utf-8")
+        metadata = subprocess.check_output((*tango_command, replay_filename, "metadata")).decode("utf-8")
         metadata_filename = f"metadata/{pathlib.Path(replay_filename).stem}.json"
         with open(metadata_filename, "w+") as f:
             f.write(metadata)
 
         print(f"Done {replay_filename} metadata!")
 
-all_chip_codes = "ABCDEFGHIJKLMNOPQRSTUVWXYZ*"
+def get_reg(save_data, profile, navi_id):
+    return save_data[profile.get_reg_offset(navi_id)]
 
-def get_folder_chip(save_data, navi_id, chip_slot, chip_ids_to_chip_names):
-    folder_chip_base_offset = FOLDER_OFFSET + (30 * 2) * navi_id + chip_slot * 2
+def load_folder_info_tables():
+    exe45_chips = game_profiles.BN45_US_PVP.load_chips()
+    navis = game_profiles.BN45_US_PVP.load_navis()
 
-    chip_and_code_packed = struct.unpack("<H", save_data[folder_chip_base_offset:folder_chip_base_offset+2])[0]
-    chip_id = chip_and_code_packed & 0x1ff
-    chip_code_as_num = chip_and_code_packed >> 9
+    exe45_chip_ids_to_chip_names = {chip_info["id"]: chip_name for chip_name, chip_info in exe45_chips.items()}
+    exe45_navi_ids_to_navis = {navi["id"]: navi for navi in navis.values()}
+    return exe45_chip_ids_to_chip_names, exe45_navi_ids_to_navis
+
+def get_chip_name(exe45_chip_ids_to_chip_names, chip_id):
+    return exe45_chip_ids_to_chip_names.get(chip_id, f"BdChp{chip_id:03X}")
+
+def get_folder_info(wram_data, cur_metadata, wram_name, exe45_chip_ids_to_chip_names, exe45_navi_ids_to_navis):
+    patch = cur_metadata["local_side"]["game_info"]["patch"]
+    profile = game_profiles.PATCH_NAME_TO_PROFILE.get(patch["name"])
+    if profile is None:
+        raise RuntimeError(f"Unknown patch {patch['name']} for {wram_name}!")
+    version = patch["version"]
+
+    #if local_side is None:
+    #    raise RuntimeError(f"Error for {wram_name}! local_side is None!")
+
+    navi_id = wram_data[profile.navi_id_offset]
+    cur_folder_info = {}
+    cur_folder_info["ts"] = cur_metadata["ts"]
+    cur_folder_info["version"] = version
+    navi = exe45_navi_ids_to_navis[navi_id]
+    cur_folder_info["navi"] = {"id": navi_id, "name": navi["name"]}
+    reg_slot = get_reg(wram_data, profile, navi_id)
+    cur_folder_info["reg"] = reg_slot
+    cur_folder_data = []
+
+    chip_ids, chip_codes_as_nums = folder_codec.decode_folders(wram_data, profile, navi_id).get_folder(navi_id)
+    for chip_slot, (chip_id, chip_code_as_num) in enumerate(zip(chip_ids, chip_codes_as_nums)):
+        chip_name = get_chip_name(exe45_chip_ids_to_chip_names, chip_id)
+        if not folder_codec.is_valid_chip_code_as_num(chip_code_as_num):
+            print(f"Invalid chip code detected for navi {navi_id} at chip slot {chip_slot} (0-in)!")
+        cur_chip = {"id": chip_id, "name": chip_name, "code": folder_codec.CHIP_CODE_STRS[chip_code_as_num], "is_reg": False}
+        cur_folder_data.append(cur_chip)
+
+    if reg_slot != 0xff:
+        cur_folder_data[reg_slot]["is_reg"] = True
+
+    cur_folder_info["contents"] = cur_folder_data
+    return cur_folder_info
+
+FOLDER_STORE_FILENAME = "exe45_pvp_all_folder_info.fldstore"
+CHIP_CODE_STRS_TO_NUMS = {chip_code_str: chip_code_as_num for chip_code_as_num, chip_code_str in enumerate(folder_codec.CHIP_CODE_STRS)}
+
+def folder_info_to_store_record(cur_folder_info):
+    chip_words = [chip["id"] | CHIP_CODE_STRS_TO_NUMS[chip["code"]] << 9 for chip in cur_folder_info["contents"]]
+    return (cur_folder_info["ts"], cur_folder_info["version"], cur_folder_info["navi"]["id"], cur_folder_info["reg"], chip_words)
+
+def dump_folder_store(all_folder_info, store_filename=FOLDER_STORE_FILENAME):
+    folder_store.write_folder_store(store_filename, map(folder_info_to_store_record, all_folder_info.values()))
+
+def dump_all_folder_info(all_folder_info):
+    all_folder_info_sorted = {k: v for k, v in sorted(all_folder_info.items(), key=lambda x: x[1]["ts"], reverse=True)}
+    with open("exe45_pvp_all_folder_info_pretty.json", "w+") as f:
+        json.dump(all_folder_info_sorted, f, indent=2)
 
-    chip_name = chip_ids_to_chip_names.get(chip_id, f"BdChp{chip_id:03X}")
-    if chip_code_as_num < 0 or chip_code_as_num > 26:
-        print(f"Invalid chip code detected for navi {navi_id} at chip slot {chip_slot} (0-in)!")
-        chip_code = f"Code_0x{chip_code_as_num:x}"
-    else:
-        chip_code = all_chip_codes[chip_code_as_num]
-    return chip_name, chip_code, chip_id, chip_code_as_num
+    with open("exe45_pvp_all_folder_info.json", "w+") as f:
+        json.dump(all_folder_info_sorted, f, separators=(',', ':'))
 
-def get_reg(save_data, navi_id):
-    return save_data[REG_STRUCTURE_OFFSET + 0x40 * navi_id + 0x2f]
+    dump_folder_store(all_folder_info)
 
 def dump_raw_stats_as_json():
-    with open("data/exe45_chips.json", "r") as f:
-        exe45_chips = json.load(f)
-
-    with open("data/navis.json", "r") as f:
-        navis = json.load(f)
-
-    exe45_chip_ids_to_chip_names = {chip_info["id"]: chip_name for chip_name, chip_info in exe45_chips.items()}
-    exe45_navi_ids_to_navis = {navi["id"]: navi for navi in navis.values()}
+    exe45_chip_ids_to_chip_names, exe45_navi_ids_to_navis = load_folder_info_tables()
     all_folder_info = {}
 
     for wram_filename in glob.glob("replaywram/*.bin"):
@@ -108,155 +155,272 @@ def dump_raw_stats_as_json():
         print(f"Extracting {wram_filename}!")
         with open(wram_filename, "rb") as f, open(f"metadata/{wram_filestem}.json", "r") as f2:
             cur_metadata = json.load(f2)
-            patch = cur_metadata["local_side"]["game_info"]["patch"]
-            if patch["name"] not in ("exe45_pvp", "bn45_us_pvp"):
-                raise RuntimeError(f"Unknown patch {patch['name']} for {wram_filename}!")
-            version = patch["version"]
-
-            #if local_side is None:
-            #    raise RuntimeError(f"Error for {wram_filename}! local_side is None!")
-
             wram_data = bytearray(f.read())
-            navi_id = wram_data[0x4ad1]
-            cur_folder_info = {}
-            cur_folder_info["ts"] = cur_metadata["ts"]
-            cur_folder_info["version"] = version
-            navi = exe45_navi_ids_to_navis[navi_id]
-            cur_folder_info["navi"] = {"id": navi_id, "name": navi["name"]}
-            reg_slot = get_reg(wram_data, navi_id)
-            cur_folder_info["reg"] = reg_slot
-            cur_folder_data = []
-
-            for chip_slot in range(30):
-                chip_name, chip_code, chip_id, chip_code_as_num = get_folder_chip(wram_data, navi_id, chip_slot, exe45_chip_ids_to_chip_names)
-                cur_chip = {"id": chip_id, "name": chip_name, "code": chip_code, "is_reg": False}
-                cur_folder_data.append(cur_chip)
-
-            if reg_slot != 0xff:
-                cur_folder_data[reg_slot]["is_reg"] = True
-
-            cur_folder_info["contents"] = cur_folder_data
-            all_folder_info[wram_filestem] = cur_folder_info
+            all_folder_info[wram_filestem] = get_folder_info(wram_data, cur_metadata, wram_filename, exe45_chip_ids_to_chip_names, exe45_navi_ids_to_navis)
+
+    dump_all_folder_info(all_folder_info)
+
+def run_tango(tango_command, *args):
+    return subprocess.run((*tango_command, *args), stdout=subprocess.PIPE, check=True).stdout
+
+# Everything extract_wrams, extract_wrams_opponent and extract_metadatas do for one replay.
+# Returns ((name, wram, metadata) for the replay, the same for the inverted replay).
+# The wrams and metadatas are only written to replaywram/ and metadata/ if keep_files is set.
+def extract_replay_sides(replay_filepath, tango_command, inverted_replays_dirpath, keep_files=False):
+    replay_name = replay_filepath.stem
+    invert_name = f"{replay_name}_opp"
+    invert_filepath = inverted_replays_dirpath / f"{invert_name}.tangoreplay"
+
+    run_tango(tango_command, str(replay_filepath), "invert", str(invert_filepath))
+    replay_sides = []
+    for side_name, side_replay_filepath in ((replay_name, replay_filepath), (invert_name, invert_filepath)):
+        wram_data = run_tango(tango_command, str(side_replay_filepath), "wram")
+        metadata = run_tango(tango_command, str(side_replay_filepath), "metadata")
+        if keep_files:
+            with open(f"replaywram/{side_name}.bin", "wb+") as f:
+                f.write(wram_data)
+            with open(f"metadata/{side_name}.json", "wb+") as f:
+                f.write(metadata)
+
+        replay_sides.append((side_name, wram_data, json.loads(metadata)))
+
+    return tuple(replay_sides)
+
+# Runs jobs replays through tango at a time (each one a separate tango process, so threads
+# are enough) and decodes their folders as they finish, instead of a pass over every
+# replay per tango command and then one over the wram files.
+# Only a few more replays than jobs are queued at a time, so if the caller stops early, only
+# the replays already running are waited for.
+# A replay that tango or the decoding fails on is printed and skipped.
+# Inverted replays go to a temporary directory unless keep_files is set.
+# Yields (replay filepath, {name: folder info}) in the order the replays finish.
+def iter_replay_folder_infos(replay_filepaths, tango_command=TANGO_COMMAND, jobs=4, keep_files=False, verbose=True):
+    exe45_chip_ids_to_chip_names, exe45_navi_ids_to_navis = load_folder_info_tables()
+
+    with contextlib.ExitStack() as exit_stack:
+        if keep_files:
+            inverted_replays_dirpath = pathlib.Path("inverted_replays")
+        else:
+            inverted_replays_dirpath = pathlib.Path(exit_stack.enter_context(tempfile.TemporaryDirectory()))
+
+        executor = exit_stack.enter_context(concurrent.futures.ThreadPoolExecutor(jobs))
+        replay_filepaths_iter = iter(replay_filepaths)
+        max_queued_replays = jobs * 2
+        replay_futures = {}
+
+        try:
+            while True:
+                for replay_filepath in itertools.islice(replay_filepaths_iter, max_queued_replays - len(replay_futures)):
+                    replay_futures[executor.submit(extract_replay_sides, replay_filepath, tango_command, inverted_replays_dirpath, keep_files)] = replay_filepath
+
+                if len(replay_futures) == 0:
+                    break
+
+                done_replay_futures, not_done_replay_futures = concurrent.futures.wait(replay_futures, return_when=concurrent.futures.FIRST_COMPLETED)
+                for replay_future in done_replay_futures:
+                    replay_filepath = replay_futures.pop(replay_future)
+                    try:
+                        replay_sides = replay_future.result()
+                        replay_folder_infos = {side_name: get_folder_info(wram_data, cur_metadata, side_name, exe45_chip_ids_to_chip_names, exe45_navi_ids_to_navis) for side_name, wram_data, cur_metadata in replay_sides}
+                    except (subprocess.CalledProcessError, OSError, ValueError, RuntimeError, KeyError, IndexError) as e:
+                        print(f"Failed {replay_filepath}: {e!r}")
+                        continue
+
+                    if verbose:
+                        print(f"Done {replay_filepath}!")
+
+                    yield replay_filepath, replay_folder_infos
+        finally:
+            # the queued replays that haven't started
+            for replay_future in replay_futures:
+                replay_future.cancel()
+
+def extract_replay_folder_infos(replay_filepaths, tango_command=TANGO_COMMAND, jobs=4, keep_files=False, verbose=True):
+    all_folder_info = {}
+    for replay_filepath, replay_folder_infos in iter_replay_folder_infos(replay_filepaths, tango_command, jobs, keep_files, verbose):
+        all_folder_info.update(replay_folder_infos)
 
-    all_folder_info_sorted = {k: v for k, v in sorted(all_folder_info.items(), key=lambda x: x[1]["ts"], reverse=True)}
-    with open("exe45_pvp_all_folder_info_pretty.json", "w+") as f:
-        json.dump(all_folder_info_sorted, f, indent=2)
+    return all_folder_info
 
-    with open("exe45_pvp_all_folder_info.json", "w+") as f:
-        json.dump(all_folder_info_sorted, f, separators=(',', ':'))
+def dump_raw_stats_from_replays(tango_command=TANGO_COMMAND, jobs=4):
+    replay_filepaths = [pathlib.Path(replay_filename) for replay_filename in glob.glob("done_replays/*.tangoreplay")]
+    dump_all_folder_info(extract_replay_folder_infos(replay_filepaths, tango_command, jobs))
 
-def dump_simple_stats():
-    with open("exe45_pvp_all_folder_info.json", "r") as f:
-        all_folder_info = json.load(f)
+UPDATE_2_VERSIONS = ("0.3.0", "0.4.0", "0.5.0", "0.6.0")
 
+def load_chip_and_navi_names():
     with open("data/exe45_chips.json", "r") as f:
         exe45_chips = json.load(f)
 
-    chip_usage = {}
-    for chip_name in exe45_chips.keys():
-        chip_usage[chip_name] = 0
+    with open("data/navis.json", "r") as f:
+        navis = json.load(f)
+
+    return list(exe45_chips.keys()), list(navis.keys())
+
+CHIP_USAGE_STATS_VERSION = 1
+
+# Chip usage counts for each patch version, so they can be added to as folders come in and
+# still be limited to some versions afterwards.
+class ChipUsageStats:
+    __slots__ = ("num_records", "versions")
 
+    def __init__(self):
+        self.num_records = 0
+        # version: {"folders": n, "folders_by_navi": {navi name: n}, "chip_usage_by_navi": {navi name: {chip name: n}}}
+        self.versions = {}
+
+    def get_version_stats(self, version):
+        version_stats = self.versions.get(version)
+        if version_stats is None:
+            version_stats = {"folders": 0, "folders_by_navi": collections.Counter(), "chip_usage_by_navi": collections.defaultdict(collections.Counter)}
+            self.versions[version] = version_stats
+
+        return version_stats
+
+    def add_folder_info(self, cur_folder_info):
+        version_stats = self.get_version_stats(cur_folder_info["version"])
+        cur_navi_name = cur_folder_info["navi"]["name"]
+        version_stats["folders"] += 1
+        version_stats["folders_by_navi"][cur_navi_name] += 1
+        version_stats["chip_usage_by_navi"][cur_navi_name].update(set(chip["name"] for chip in cur_folder_info["contents"]))
+
+    # Adds the counts of many folders of one version and navi at once.
+    # chip_usage is {chip name: number of folders with the chip}
+    def add_counts(self, version, navi_name, num_folders, chip_usage):
+        version_stats = self.get_version_stats(version)
+        version_stats["folders"] += num_folders
+        version_stats["folders_by_navi"][navi_name] += num_folders
+        version_stats["chip_usage_by_navi"][navi_name].update(chip_usage)
+
+    def add_record(self, record):
+        for cur_folder_info in record["folders"].values():
+            self.add_folder_info(cur_folder_info)
+
+        self.num_records += 1
+
+    def iter_version_stats(self, versions=None):
+        for version, version_stats in self.versions.items():
+            if versions is None or version in versions:
+                yield version_stats
+
+    def get_total_folders_by_navi(self, versions=None):
+        total_folders_by_navi = collections.Counter()
+        for version_stats in self.iter_version_stats(versions):
+            total_folders_by_navi.update(version_stats["folders_by_navi"])
+
+        return total_folders_by_navi
+
+    def get_chip_usage_by_navi(self, versions=None):
+        chip_usage_by_navi = collections.defaultdict(collections.Counter)
+        for version_stats in self.iter_version_stats(versions):
+            for navi_name, chip_usage in version_stats["chip_usage_by_navi"].items():
+                chip_usage_by_navi[navi_name].update(chip_usage)
+
+        return chip_usage_by_navi
+
+    def to_json(self):
+        return {"version": CHIP_USAGE_STATS_VERSION, "num_records": self.num_records, "versions": self.versions}
+
+    @classmethod
+    def from_json(cls, stats_json):
+        stats = cls()
+        stats.num_records = stats_json["num_records"]
+        for version, version_stats in stats_json["versions"].items():
+            stats.versions[version] = {
+                "folders": version_stats["folders"],
+                "folders_by_navi": collections.Counter(version_stats["folders_by_navi"]),
+                "chip_usage_by_navi": collections.defaultdict(collections.Counter, {navi_name: collections.Counter(chip_usage) for navi_name, chip_usage in version_stats["chip_usage_by_navi"].items()})
+            }
+
+        return stats
+
+    def save(self, filepath):
+        atomic_file.write_file_atomic(filepath, json.dumps(self.to_json()).encode("utf-8"), fsync=False)
+
+# The saved counts if they include exactly the ledger's records, otherwise they're counted again
+# from the ledger (e.g. the last run was killed after appending to the ledger).
+def load_chip_usage_stats(filepath, ledger):
+    try:
+        with open(filepath, "r") as f:
+            stats_json = json.load(f)
+    except (OSError, ValueError):
+        stats_json = None
+
+    if isinstance(stats_json, dict) and stats_json.get("version") == CHIP_USAGE_STATS_VERSION and stats_json.get("num_records") == len(ledger):
+        return ChipUsageStats.from_json(stats_json)
+
+    stats = ChipUsageStats()
+    for record in ledger.records.values():
+        stats.add_record(record)
+
+    return stats
+
+# Every count the reports need is in a ChipUsageStats, which keeps them per version, so
+# the folders are only gone through once no matter how many reports there are.
+def count_chip_usage_stats(all_folder_info):
+    stats = ChipUsageStats()
     for cur_folder_info in all_folder_info.values():
-        cur_folder_data = cur_folder_info["contents"]
-        used_chips_in_folder = set(chip["name"] for chip in cur_folder_data)
-        for used_chip in used_chips_in_folder:
-            chip_usage[used_chip] += 1
+        stats.add_folder_info(cur_folder_info)
 
-    sorted_chip_usage = sorted(chip_usage.items(), key=lambda x: x[1], reverse=True)
+    return stats
 
-    total_folders = len(all_folder_info)
-    output = f"Number of folders: {total_folders}\n"
-    output += "=========================================\n"
+# If pair_stats is a ChipPairStats, the chip pairs are counted into it in the same pass
+def count_folder_store_chip_usage_stats(store, exe45_chip_ids_to_chip_names, exe45_navi_ids_to_navis, pair_stats=None):
+    stats = ChipUsageStats()
+    for version, navi_id, num_folders, chip_usage_by_chip_id, chip_pairs_by_chip_id in store.count_chip_usage_by_group(pair_stats is not None):
+        chip_usage = collections.Counter()
+        for chip_id, amount_used in chip_usage_by_chip_id.items():
+            chip_usage[get_chip_name(exe45_chip_ids_to_chip_names, chip_id)] += amount_used
 
-    for chip, amount_used in sorted_chip_usage:
-        use_percent = (amount_used * 100)/total_folders
-        output += f"{chip: >9} | {use_percent: >8.5f}% | {amount_used: >5}\n"
+        stats.add_counts(version, exe45_navi_ids_to_navis[navi_id]["name"], num_folders, chip_usage)
+        if pair_stats is not None:
+            pair_stats.add_counts(version, navi_id, num_folders, chip_usage_by_chip_id, chip_pairs_by_chip_id)
 
-    with open("exe45_simple_chip_usage.txt", "w+") as f:
-        f.write(output)
+    return stats
 
-def dump_simple_stats_update_2():
+def load_all_folder_info_chip_usage_stats():
     with open("exe45_pvp_all_folder_info.json", "r") as f:
         all_folder_info = json.load(f)
 
-    with open("data/exe45_chips.json", "r") as f:
-        exe45_chips = json.load(f)
+    return count_chip_usage_stats(all_folder_info)
 
+def format_simple_stats(chip_names, total_folders, chip_usage_counts):
     chip_usage = {}
-    for chip_name in exe45_chips.keys():
+    for chip_name in chip_names:
         chip_usage[chip_name] = 0
 
-    total_folders = 0
-
-    for cur_folder_info in all_folder_info.values():
-        if cur_folder_info["version"] not in ("0.3.0", "0.4.0", "0.5.0", "0.6.0"):
-            continue
-
-        total_folders += 1
-        cur_folder_data = cur_folder_info["contents"]
-        used_chips_in_folder = set(chip["name"] for chip in cur_folder_data)
-        for used_chip in used_chips_in_folder:
-            chip_usage[used_chip] += 1
-
+    chip_usage.update(chip_usage_counts)
     sorted_chip_usage = sorted(chip_usage.items(), key=lambda x: x[1], reverse=True)
 
     output = f"Number of folders: {total_folders}\n"
     output += "=========================================\n"
 
     for chip, amount_used in sorted_chip_usage:
-        use_percent = (amount_used * 100)/total_folders
+        # e.g. no replays yet, or a version filter that matches nothing
+        use_percent = (amount_used * 100)/total_folders if total_folders != 0 else 0.0
         output += f"{chip: >9} | {use_percent: >8.5f}% | {amount_used: >5}\n"
 
-    with open("exe45_simple_chip_usage_update_2.txt", "w+") as f:
-        f.write(output)
-
-def dump_simple_stats_by_navi(update_2=False):
-    with open("exe45_pvp_all_folder_info.json", "r") as f:
-        all_folder_info = json.load(f)
-
-    with open("data/exe45_chips.json", "r") as f:
-        exe45_chips = json.load(f)
-
-    with open("data/navis.json", "r") as f:
-        navis = json.load(f)
-
-    chip_usage_by_navi = {}
-    total_folders_by_navi = {}
-
-    for navi_name in navis.keys():
-        chip_usage = {}
-        for chip_name in exe45_chips.keys():
-            chip_usage[chip_name] = 0
-
-        chip_usage_by_navi[navi_name] = chip_usage
-        total_folders_by_navi[navi_name] = 0
-
-    total_folders = 0
-
-    for cur_folder_info in all_folder_info.values():
-        if update_2 and cur_folder_info["version"] not in ("0.3.0", "0.4.0", "0.5.0", "0.6.0"):
-            continue
-
-        total_folders += 1
-        cur_folder_data = cur_folder_info["contents"]
-        cur_navi_name = cur_folder_info["navi"]["name"]
-        total_folders_by_navi[cur_navi_name] += 1
-        used_chips_in_folder = set(chip["name"] for chip in cur_folder_data)
-        for used_chip in used_chips_in_folder:
-            chip_usage_by_navi[cur_navi_name][used_chip] += 1
+    return output
 
+def format_simple_stats_by_navi(chip_names, navi_names, total_folders_by_navi, chip_usage_by_navi):
+    total_folders = sum(total_folders_by_navi.values())
     output = f"Number of folders: {total_folders}\n"
     output += "=========================================\n"
 
-    for navi_name, chip_usage in chip_usage_by_navi.items():
-        total_folders_for_navi = total_folders_by_navi[navi_name]
+    for navi_name in navi_names:
+        total_folders_for_navi = total_folders_by_navi.get(navi_name, 0)
         output += f"---------------- {navi_name} ({total_folders_for_navi} folders) ----------------\n"
 
+        chip_usage = {}
+        for chip_name in chip_names:
+            chip_usage[chip_name] = 0
+
+        chip_usage.update(chip_usage_by_navi.get(navi_name, {}))
         sorted_chip_usage = sorted(chip_usage.items(), key=lambda x: x[1], reverse=True)
         unused_chips = []
         for chip, amount_used in sorted_chip_usage:
             if amount_used > 0:
-                use_percent = (amount_used * 100)/total_folders_for_navi
+                use_percent = (amount_used * 100)/total_folders_for_navi if total_folders_for_navi != 0 else 0.0
                 output += f"{chip: >9} | {use_percent: >8.5f}% | {amount_used: >5}\n"
             else:
                 unused_chips.append(chip)
@@ -265,13 +429,202 @@ def dump_simple_stats_by_navi(update_2=False):
 
         output += "\n"
 
-    if update_2:
-        with open("exe45_simple_chip_usage_by_navi_update_2.txt", "w+") as f:
-            f.write(output)
-    else:
-        with open("exe45_simple_chip_usage_by_navi.txt", "w+") as f:
-            f.write(output)
-        
+    return output
+
+class ChipUsageReport:
+    __slots__ = ("filename", "versions", "by_navi")
+
+    # versions is the versions to count the folders of, or None for all of them
+    def __init__(self, filename, versions=None, by_navi=False):
+        self.filename = filename
+        self.versions = versions
+        self.by_navi = by_navi
+
+    def format(self, stats, chip_names, navi_names):
+        total_folders_by_navi = stats.get_total_folders_by_navi(self.versions)
+        chip_usage_by_navi = stats.get_chip_usage_by_navi(self.versions)
+
+        if self.by_navi:
+            return format_simple_stats_by_navi(chip_names, navi_names, total_folders_by_navi, chip_usage_by_navi)
+        else:
+            return format_simple_stats(chip_names, sum(total_folders_by_navi.values()), sum(chip_usage_by_navi.values(), collections.Counter()))
+
+SIMPLE_STATS_REPORT = ChipUsageReport("exe45_simple_chip_usage.txt")
+SIMPLE_STATS_UPDATE_2_REPORT = ChipUsageReport("exe45_simple_chip_usage_update_2.txt", UPDATE_2_VERSIONS)
+SIMPLE_STATS_BY_NAVI_REPORT = ChipUsageReport("exe45_simple_chip_usage_by_navi.txt", by_navi=True)
+SIMPLE_STATS_BY_NAVI_UPDATE_2_REPORT = ChipUsageReport("exe45_simple_chip_usage_by_navi_update_2.txt", UPDATE_2_VERSIONS, by_navi=True)
+
+ALL_SIMPLE_STATS_REPORTS = (SIMPLE_STATS_REPORT, SIMPLE_STATS_UPDATE_2_REPORT, SIMPLE_STATS_BY_NAVI_REPORT, SIMPLE_STATS_BY_NAVI_UPDATE_2_REPORT)
+
+def dump_chip_usage_reports(stats, reports=ALL_SIMPLE_STATS_REPORTS):
+    chip_names, navi_names = load_chip_and_navi_names()
+
+    for report in reports:
+        with open(report.filename, "w+") as f:
+            f.write(report.format(stats, chip_names, navi_names))
+
+def format_chip_pairs(exe45_chip_ids_to_chip_names, pair_counts, min_together=1, max_pairs=None):
+    # strongest synergy first
+    sorted_pair_stats = sorted(pair_counts.iter_pair_stats(min_together), key=lambda x: (x[5], x[2]), reverse=True)
+    if max_pairs is not None:
+        sorted_pair_stats = sorted_pair_stats[:max_pairs]
+
+    output = f"Number of folders: {pair_counts.num_folders}\n"
+    output += "=========================================\n"
+    output += f"{'chip': >9} | {'other': >9} | {'both': >5} | {'P(other|chip)': >13} | {'P(chip|other)': >13} | {'lift': >8}\n"
+
+    for chip_id, other_chip_id, amount_used_together, other_given_chip, chip_given_other, lift in sorted_pair_stats:
+        output += f"{get_chip_name(exe45_chip_ids_to_chip_names, chip_id): >9} | {get_chip_name(exe45_chip_ids_to_chip_names, other_chip_id): >9} | {amount_used_together: >5} | {other_given_chip * 100: >12.5f}% | {chip_given_other * 100: >12.5f}% | {lift: >8.4f}\n"
+
+    return output
+
+class ChipPairReport:
+    __slots__ = ("filename", "versions", "by_version", "by_navi", "min_together", "max_pairs")
+
+    # versions is the versions to count the folders of, or None for all of them.
+    # by_version and by_navi split the report into a section for each version and/or navi.
+    # Only pairs in at least min_together folders are listed, since the lift of rare pairs is noise.
+    def __init__(self, filename, versions=None, by_version=False, by_navi=False, min_together=20, max_pairs=100):
+        self.filename = filename
+        self.versions = versions
+        self.by_version = by_version
+        self.by_navi = by_navi
+        self.min_together = min_together
+        self.max_pairs = max_pairs
+
+    def format(self, pair_stats, exe45_chip_ids_to_chip_names, exe45_navi_ids_to_navis):
+        if self.by_version:
+            version_filters = [(version, (version,)) for version in pair_stats.get_versions() if self.versions is None or version in self.versions]
+        else:
+            version_filters = [(None, self.versions)]
+
+        if self.by_navi:
+            navi_filters = [(exe45_navi_ids_to_navis[navi_id]["name"], (navi_id,)) for navi_id in pair_stats.get_navi_ids()]
+        else:
+            navi_filters = [(None, None)]
+
+        output = ""
+        for version, versions in version_filters:
+            for navi_name, navi_ids in navi_filters:
+                pair_counts = pair_stats.get_pair_counts(versions, navi_ids)
+                if pair_counts.num_folders == 0:
+                    continue
+
+                section_name = " ".join(name for name in (version, navi_name) if name is not None)
+                if section_name != "":
+                    output += f"---------------- {section_name} ----------------\n"
+
+                output += format_chip_pairs(exe45_chip_ids_to_chip_names, pair_counts, self.min_together, self.max_pairs)
+                output += "\n"
+
+        return output
+
+# The whole chips x chips count matrix as csv, the diagonal being the number of folders with each chip
+class ChipPairMatrixReport:
+    __slots__ = ("filename", "versions", "navi_ids")
+
+    def __init__(self, filename, versions=None, navi_ids=None):
+        self.filename = filename
+        self.versions = versions
+        self.navi_ids = navi_ids
+
+    def format(self, pair_stats, exe45_chip_ids_to_chip_names, exe45_navi_ids_to_navis):
+        pair_counts = pair_stats.get_pair_counts(self.versions, self.navi_ids)
+        chip_ids = sorted(pair_counts.chip_usage.keys())
+        chip_names = [get_chip_name(exe45_chip_ids_to_chip_names, chip_id) for chip_id in chip_ids]
+
+        output = "," + ",".join(chip_names) + "\n"
+        for chip_name, row in zip(chip_names, pair_counts.get_matrix(chip_ids)):
+            output += chip_name + "," + ",".join(str(amount_used_together) for amount_used_together in row) + "\n"
+
+        return output
+
+CHIP_PAIRS_REPORT = ChipPairReport("exe45_chip_pairs.txt")
+CHIP_PAIRS_BY_VERSION_REPORT = ChipPairReport("exe45_chip_pairs_by_version.txt", by_version=True)
+CHIP_PAIRS_BY_NAVI_REPORT = ChipPairReport("exe45_chip_pairs_by_navi.txt", by_navi=True)
+CHIP_PAIRS_BY_NAVI_UPDATE_2_REPORT = ChipPairReport("exe45_chip_pairs_by_navi_update_2.txt", UPDATE_2_VERSIONS, by_navi=True)
+CHIP_PAIR_MATRIX_REPORT = ChipPairMatrixReport("exe45_chip_pair_matrix.csv")
+
+ALL_CHIP_PAIR_REPORTS = (CHIP_PAIRS_REPORT, CHIP_PAIRS_BY_VERSION_REPORT, CHIP_PAIRS_BY_NAVI_REPORT, CHIP_PAIRS_BY_NAVI_UPDATE_2_REPORT, CHIP_PAIR_MATRIX_REPORT)
+
+def dump_chip_pair_reports(pair_stats, reports=ALL_CHIP_PAIR_REPORTS):
+    exe45_chip_ids_to_chip_names, exe45_navi_ids_to_navis = load_folder_info_tables()
+
+    for report in reports:
+        with open(report.filename, "w+") as f:
+            f.write(report.format(pair_stats, exe45_chip_ids_to_chip_names, exe45_navi_ids_to_navis))
+
+def dump_simple_stats():
+    dump_chip_usage_reports(load_all_folder_info_chip_usage_stats(), (SIMPLE_STATS_REPORT,))
+
+def dump_simple_stats_update_2():
+    dump_chip_usage_reports(load_all_folder_info_chip_usage_stats(), (SIMPLE_STATS_UPDATE_2_REPORT,))
+
+def dump_simple_stats_by_navi(update_2=False):
+    dump_chip_usage_reports(load_all_folder_info_chip_usage_stats(), (SIMPLE_STATS_BY_NAVI_UPDATE_2_REPORT if update_2 else SIMPLE_STATS_BY_NAVI_REPORT,))
+
+# Same files as dump_simple_stats and the others, all counted in one go over the json
+def dump_all_simple_stats(reports=ALL_SIMPLE_STATS_REPORTS):
+    dump_chip_usage_reports(load_all_folder_info_chip_usage_stats(), reports)
+
+# Same files as dump_simple_stats and the others, from the folder store dump_all_folder_info writes.
+# The chip pairs are only counted if there are any pair_reports.
+def dump_simple_stats_from_folder_store(store_filename=FOLDER_STORE_FILENAME, reports=ALL_SIMPLE_STATS_REPORTS, pair_reports=()):
+    exe45_chip_ids_to_chip_names, exe45_navi_ids_to_navis = load_folder_info_tables()
+    pair_stats = chip_pairs.ChipPairStats() if len(pair_reports) != 0 else None
+    with folder_store.FolderStore.open(store_filename) as store:
+        stats = count_folder_store_chip_usage_stats(store, exe45_chip_ids_to_chip_names, exe45_navi_ids_to_navis, pair_stats)
+
+    dump_chip_usage_reports(stats, reports)
+    if pair_stats is not None:
+        dump_chip_pair_reports(pair_stats, pair_reports)
+
+def dump_chip_pairs_from_folder_store(store_filename=FOLDER_STORE_FILENAME):
+    dump_simple_stats_from_folder_store(store_filename, pair_reports=ALL_CHIP_PAIR_REPORTS)
+
+def dump_folder_store_from_json():
+    with open("exe45_pvp_all_folder_info.json", "r") as f:
+        all_folder_info = json.load(f)
+
+    dump_folder_store(all_folder_info)
+
+REPLAY_LEDGER_FILENAME = "replay_ledger.jsonl"
+REPLAY_STATS_FILENAME = "replay_chip_usage_stats.json"
+
+# Only extracts the replays in done_replays that aren't in the ledger yet, and adds their
+# folders to the saved chip usage counts instead of counting every folder again.
+# Returns the number of replays that were extracted.
+def update_replay_stats(tango_command=TANGO_COMMAND, jobs=4, ledger_filename=REPLAY_LEDGER_FILENAME, stats_filename=REPLAY_STATS_FILENAME, verbose=True):
+    ledger = replay_ledger.ReplayLedger(ledger_filename)
+    ledger.load()
+    stats = load_chip_usage_stats(stats_filename, ledger)
+
+    new_replays = {}
+    for replay_filename in glob.glob("done_replays/*.tangoreplay"):
+        replay_filepath = pathlib.Path(replay_filename)
+        replay_hash, stat_fields = ledger.get_replay_hash(replay_filepath)
+        if replay_hash not in ledger and replay_hash not in new_replays:
+            new_replays[replay_hash] = (replay_filepath, stat_fields)
+
+    replay_hashes = {replay_filepath: replay_hash for replay_hash, (replay_filepath, stat_fields) in new_replays.items()}
+    num_extracted = 0
+    # the counts are saved even if the run stops partway, so they always include every replay
+    # in the ledger and the next run doesn't have to count them again
+    try:
+        for replay_filepath, replay_folder_infos in iter_replay_folder_infos(list(replay_hashes.keys()), tango_command, jobs, verbose=verbose):
+            replay_hash = replay_hashes[replay_filepath]
+            record = ledger.append(replay_hash, replay_filepath, new_replays[replay_hash][1], replay_folder_infos)
+            stats.add_record(record)
+            num_extracted += 1
+    finally:
+        stats.save(stats_filename)
+        dump_chip_usage_reports(stats)
+
+    if verbose:
+        print(f"Extracted {num_extracted} of {len(replay_hashes)} new replays, {len(ledger)} replays in total")
+
+    return num_extracted
+
 def main():
     MODE = 8
     if MODE == 0:
@@ -292,6 +645,18 @@ def main():
         dump_simple_stats_by_navi()
     elif MODE == 8:
         dump_simple_stats_by_navi(True)
+    elif MODE == 9:
+        dump_raw_stats_from_replays()
+    elif MODE == 10:
+        update_replay_stats()
+    elif MODE == 11:
+        dump_folder_store_from_json()
+    elif MODE == 12:
+        dump_simple_stats_from_folder_store()
+    elif MODE == 13:
+        dump_all_simple_stats()
+    elif MODE == 14:
+        dump_chip_pairs_from_folder_store()
     else:
         print("no mode selected")
 
@@ -1,58 +1,33 @@
-import struct
-import itertools
+import save_codec
+import game_profiles
 
-MASK_OFFSET = 0x1064
-SAVE_SIZE = 0x6710
-CHECKSUM_OFFSET = 0x1c6c
+# decrypts a Falzar save and re-encrypts it with Gregar's checksum
+DECRYPT_PROFILE = game_profiles.BN6F
+ENCRYPT_PROFILE = game_profiles.BN6G
 
 def main():
     with open("bn6f.sav", "rb") as f:
         save_data = bytearray(f.read())
 
-    mask = save_data[MASK_OFFSET:MASK_OFFSET+4]
-    mask_first_byte = mask[0]
-
-    # "We only actually need to use the first byte of the mask, even though it's 32 bits long."
-    for i in range(SAVE_SIZE):
-        save_data[i] ^= mask_first_byte
-
-    save_data[MASK_OFFSET:MASK_OFFSET+4] = mask
+    save_codec.mask_save(save_data, DECRYPT_PROFILE.mask_offset, DECRYPT_PROFILE.save_size)
 
     with open("bn6f_decrypted.sav", "wb+") as f:
         f.write(save_data)
 
 def calc_checksum_and_expected_checksum(save_data):
-    checksum = 0
-
-    for byte in itertools.islice(save_data, SAVE_SIZE):
-        checksum = (checksum + byte) & 0xffffffff
-
-    expected_checksum = struct.unpack("<I", save_data[CHECKSUM_OFFSET:CHECKSUM_OFFSET+4])[0]
-    for i in range(4):
-        checksum = (checksum - save_data[CHECKSUM_OFFSET+i]) & 0xffffffff
-
-    checksum = (checksum + 0x72) & 0xffffffff
-
-    return checksum, expected_checksum
+    return save_codec.calc_checksum_and_expected_checksum(save_data, ENCRYPT_PROFILE.checksum_offset, ENCRYPT_PROFILE.save_size, ENCRYPT_PROFILE.checksum_adjust)
 
 def encrypt_save():
     with open("bn6f_decrypted.sav", "rb") as f:
         save_data = bytearray(f.read())
 
     checksum, expected_checksum = calc_checksum_and_expected_checksum(save_data)
-    save_data[CHECKSUM_OFFSET:CHECKSUM_OFFSET+4] = struct.pack("<I", checksum)
-
-    mask = save_data[MASK_OFFSET:MASK_OFFSET+4]
-    mask_first_byte = mask[0]
-
-    # "We only actually need to use the first byte of the mask, even though it's 32 bits long."
-    for i in range(SAVE_SIZE):
-        save_data[i] ^= mask_first_byte
+    game_profiles.CHECKSUM_STRUCT.pack_into(save_data, ENCRYPT_PROFILE.checksum_offset, checksum)
 
-    save_data[MASK_OFFSET:MASK_OFFSET+4] = mask
+    save_codec.mask_save(save_data, ENCRYPT_PROFILE.mask_offset, ENCRYPT_PROFILE.save_size)
 
     with open("bn6g_encrypted.sav", "wb+") as f:
         f.write(save_data)
 
 if __name__ == "__main__":
-    encrypt_save()
\ No newline at end of file
+    encrypt_save()
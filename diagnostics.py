@@ -0,0 +1,119 @@
+# =============================================================================
+# MIT License
+# 
+# Copyright (c) 2022 luckytyphlosion
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# =============================================================================
+
+# Structured problems found in a folder. Line numbers are 1-based like the messages, spans are
+# (start, end) columns within the line, end exclusive. Folder-wide diagnostics have no line.
+
+import collections
+
+SEVERITY_ERROR = "error"
+SEVERITY_WARNING = "warning"
+
+WRONG_LINE_COUNT = "wrong-line-count"
+UNKNOWN_NAVI = "unknown-navi"
+EMPTY_LINE = "empty-line"
+SPACES_IN_CHIP_NAME = "spaces-in-chip-name"
+MISSING_CHIP_CODE = "missing-chip-code"
+UNKNOWN_CHIP = "unknown-chip"
+WRONG_CHIP_CODE = "wrong-chip-code"
+UNKNOWN_TEXT_AFTER_CHIP = "unknown-text-after-chip"
+REG_ALREADY_SET = "reg-already-set"
+REG_OVER_CAPACITY = "reg-over-capacity"
+TOO_MANY_COPIES = "too-many-copies"
+TOO_MANY_MEGAS = "too-many-megas"
+TOO_MANY_GIGAS = "too-many-gigas"
+CANNOT_READ_FOLDER = "cannot-read-folder"
+CANNOT_WRITE_SAVE = "cannot-write-save"
+
+class Diagnostic:
+    __slots__ = ("code", "severity", "message", "line", "span", "suggestion")
+
+    def __init__(self, code, severity, message, line=None, span=None, suggestion=None):
+        self.code = code
+        self.severity = severity
+        self.message = message
+        self.line = line
+        self.span = span
+        self.suggestion = suggestion
+
+    @property
+    def is_error(self):
+        return self.severity == SEVERITY_ERROR
+
+    def to_json(self):
+        diagnostic_json = {"code": self.code, "severity": self.severity, "message": self.message}
+        if self.line is not None:
+            diagnostic_json["line"] = self.line
+        if self.span is not None:
+            diagnostic_json["span"] = self.span
+        if self.suggestion is not None:
+            diagnostic_json["suggestion"] = self.suggestion
+        return diagnostic_json
+
+def error(code, message, line=None, span=None, suggestion=None):
+    return Diagnostic(code, SEVERITY_ERROR, message, line, span, suggestion)
+
+def warning(code, message, line=None, span=None, suggestion=None):
+    return Diagnostic(code, SEVERITY_WARNING, message, line, span, suggestion)
+
+def has_errors(diagnostics):
+    return any(diagnostic.is_error for diagnostic in diagnostics)
+
+# [{"line": line_num, "messages": [...]}] for the errors on lines, in line order
+def get_line_errors(diagnostics):
+    line_errors = {}
+    for diagnostic in diagnostics:
+        if diagnostic.is_error and diagnostic.line is not None:
+            line_errors.setdefault(diagnostic.line, []).append(diagnostic.message)
+
+    return [{"line": line_num, "messages": messages} for line_num, messages in sorted(line_errors.items())]
+
+def get_folder_errors(diagnostics):
+    return [diagnostic.message for diagnostic in diagnostics if diagnostic.is_error and diagnostic.line is None]
+
+def get_warnings(diagnostics):
+    return [diagnostic.message for diagnostic in diagnostics if not diagnostic.is_error]
+
+# The human readable format, errors on lines first, then errors for the whole folder.
+def render_errors(diagnostics):
+    output_parts = ["Provided folder has errors:\n"]
+
+    for line_error in get_line_errors(diagnostics):
+        messages = line_error["messages"]
+        if len(messages) == 1:
+            output_parts.append(f"At line {line_error['line']}: {messages[0]}\n")
+        else:
+            output_parts.append(f"At line {line_error['line']}:\n")
+            output_parts.extend(f"    {message}\n" for message in messages)
+
+    output_parts.extend(f"{message}\n" for message in get_folder_errors(diagnostics))
+    return "".join(output_parts)
+
+# Counts by code over many report entries' "diagnostics", for summaries of big batches.
+def count_diagnostic_codes(report_entries):
+    diagnostic_code_counts = collections.Counter()
+    for report_entry in report_entries:
+        diagnostic_code_counts.update(diagnostic_json["code"] for diagnostic_json in report_entry.get("diagnostics", ()))
+
+    return dict(diagnostic_code_counts.most_common())
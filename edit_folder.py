@@ -22,30 +22,35 @@
 # SOFTWARE.
 # =============================================================================
 
+import argparse
+import contextlib
 import difflib
+import functools
+import glob
+import hashlib
+import mmap
+import multiprocessing
 import pathlib
 import json
 import collections
 import platform
 import os
 import sys
-import struct
-import itertools
 import errno
+import re
 
-MASK_OFFSET = 0x3c84
-GAME_NAME_OFFSET = 0x4ba8
-CHECKSUM_OFFSET = 0x4b88
-REG_STRUCTURE_OFFSET = 0x8530
-SAVE_SIZE = 0xc7a8
-FOLDER_OFFSET = 0x7500
+import save_codec
+import atomic_file
+import game_profiles
+import name_matcher
+import chip_database
+import folder_codec
+import diagnostics
+import folder_stream
+import extraction_manifest
 
-class ErrorMsg:
-    __slots__ = ("message", "line_num")
-
-    def __init__(self, message, line_num):
-        self.message = message
-        self.line_num = line_num
+class SaveError(Exception):
+    pass
 
 def get_platform():
     if platform.system() == "Windows":
@@ -80,170 +85,19 @@ def get_tango_config_filepath():
     tango_config_filepath = tango_config_dirpath / "config.json"
     return tango_config_filepath
 
-# Taken from https://github.com/jamesturk/jellyfish
-# License provided below
-# ================================================================================
-# Copyright (c) 2015, James Turk
-# Copyright (c) 2015, Sunlight Foundation
-# 
-# All rights reserved.
-# 
-# Redistribution and use in source and binary forms, with or without modification,
-# are permitted provided that the following conditions are met:
-# 
-#     * Redistributions of source code must retain the above copyright notice,
-#       this list of conditions and the following disclaimer.
-#     * Redistributions in binary form must reproduce the above copyright notice,
-#       this list of conditions and the following disclaimer in the documentation
-#       and/or other materials provided with the distribution.
-# 
-# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
-# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
-# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
-# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
-# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
-# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
-# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
-# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
-# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
-# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
-# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
-# ================================================================================
-def _check_type(s):
-    if not isinstance(s, str):
-        raise TypeError("expected str or unicode, got %s" % type(s).__name__)
-
-def damerau_levenshtein_distance(s1, s2):
-    _check_type(s1)
-    _check_type(s2)
-
-    len1 = len(s1)
-    len2 = len(s2)
-    infinite = len1 + len2
-
-    # character array
-    da = collections.defaultdict(int)
-
-    # distance matrix
-    score = [[0] * (len2 + 2) for x in range(len1 + 2)]
-
-    score[0][0] = infinite
-    for i in range(0, len1 + 1):
-        score[i + 1][0] = infinite
-        score[i + 1][1] = i
-    for i in range(0, len2 + 1):
-        score[0][i + 1] = infinite
-        score[1][i + 1] = i
-
-    for i in range(1, len1 + 1):
-        db = 0
-        for j in range(1, len2 + 1):
-            i1 = da[s2[j - 1]]
-            j1 = db
-            cost = 1
-            if s1[i - 1] == s2[j - 1]:
-                cost = 0
-                db = j
-
-            score[i + 1][j + 1] = min(
-                score[i][j] + cost,
-                score[i + 1][j] + 1,
-                score[i][j + 1] + 1,
-                score[i1][j1] + (i - i1 - 1) + 1 + (j - j1 - 1),
-            )
-        da[s1[i - 1]] = i
-
-    return score[len1 + 1][len2 + 1]
-
-# Taken from https://rosettacode.org/wiki/Longest_common_subsequence#Dynamic_Programming_7
-def lcs_length(a, b):
-    # generate matrix of length of longest common subsequence for substrings of both words
-    lengths = [[0] * (len(b)+1) for _ in range(len(a)+1)]
-    for i, x in enumerate(a):
-        for j, y in enumerate(b):
-            if x == y:
-                lengths[i+1][j+1] = lengths[i][j] + 1
-            else:
-                lengths[i+1][j+1] = max(lengths[i+1][j], lengths[i][j+1])
-
-    # read a substring from the matrix
-    result = ''
-    j = len(b)
-    for i in range(1, len(a)+1):
-        if lengths[i][j] != lengths[i-1][j]:
-            result += a[i-1]
-
-    return len(result)
-
 def get_most_similar_from_dict_lcs(unknown_name, all_names, chip_code_tiebreak=None, exe45_chips_uncased=None):
     most_similar_names = []
     most_similar_distance = 0
 
     for cur_name in all_names.keys():
-        cur_distance = lcs_length(unknown_name, cur_name)
+        cur_distance = name_matcher.lcs_length(unknown_name, cur_name)
         if cur_distance > most_similar_distance:
             most_similar_distance = cur_distance
             most_similar_names = [cur_name]
         elif cur_distance == most_similar_distance:
             most_similar_names.append(cur_name)
 
-    possible_most_similar_name_shortest_len = min(len(most_similar_name) for most_similar_name in most_similar_names)
-    unknown_name_len = len(unknown_name)
-
-    min_len = min(unknown_name_len, possible_most_similar_name_shortest_len)
-    min_len_minus_most_similar_distance = min_len - most_similar_distance
-    # some metric
-    # maybe will explain later
-    if min_len <= 4 and min_len_minus_most_similar_distance > 1 or min_len > 4 and min_len_minus_most_similar_distance > 2:
-        return None, (most_similar_distance, min_len_minus_most_similar_distance)
-    else:
-        if len(most_similar_names) == 1:
-            most_similar_name = most_similar_names[0]
-        else:
-            # tiebreak somehow
-            # pick the name with the least number of characters that do not appear in the unknown name
-            unknown_name_chars = set(unknown_name)
-            most_similar_names_round_2 = []
-            most_similar_name_num_uncommon_chars = 100
-
-            for most_similar_name_candidate in most_similar_names:
-                cur_similar_name_num_uncommon_chars = len(set(most_similar_name_candidate) - unknown_name_chars)
-                if cur_similar_name_num_uncommon_chars < most_similar_name_num_uncommon_chars:
-                    most_similar_names_round_2 = [most_similar_name_candidate]
-                    most_similar_name_num_uncommon_chars = cur_similar_name_num_uncommon_chars
-                elif cur_similar_name_num_uncommon_chars == most_similar_name_num_uncommon_chars:
-                    most_similar_names_round_2.append(most_similar_name_candidate)
-
-            if len(most_similar_names_round_2) != 1 and chip_code_tiebreak is not None:
-                most_similar_names_round_3 = []
-                for most_similar_name_candidate in most_similar_names_round_2:
-                    if chip_code_tiebreak in exe45_chips_uncased[most_similar_name_candidate]["codes"]:
-                        most_similar_names_round_3.append(most_similar_name_candidate)
-
-                if len(most_similar_names_round_3) != 0:
-                    most_similar_names_round_2 = most_similar_names_round_3
-
-            most_similar_name = most_similar_names_round_2[0]
-
-            min_len = min(unknown_name_len, len(most_similar_name))
-            min_len_minus_most_similar_distance = min_len - most_similar_distance
-
-        return most_similar_name, (most_similar_distance, min_len_minus_most_similar_distance)
-
-def get_most_similar_from_dict_damerau_levenshtein(unknown_name, all_names):
-    most_similar_name = None
-    most_similar_distance = 100000
-
-    for cur_name in all_names.keys():
-        cur_distance = damerau_levenshtein_distance(unknown_name, cur_name)
-        if cur_distance < most_similar_distance:
-            most_similar_distance = cur_distance
-            most_similar_name = cur_name
-
-    if most_similar_distance > 16:
-        return None, most_similar_distance
-    else:
-        return most_similar_name, most_similar_distance
+    return name_matcher.pick_most_similar_name(unknown_name, most_similar_names, most_similar_distance, chip_code_tiebreak, exe45_chips_uncased)
 
 #def get_most_similar_from_dict_lcs_and_damerau_levenshtein(unknown_name, all_names):
 #    most_similar_name = None
@@ -290,96 +144,87 @@ def get_most_similar_from_dict(unknown_name, all_names):
     else:
         return most_similar_name, most_similar_ratio
 
-all_chip_codes = "ABCDEFGHIJKLMNOPQRSTUVWXYZ*"
 all_chip_codes_set = set("ABCDEFGHIJKLMNOPQRSTUVWXYZ*".casefold())
 
-def edit_folder_chip(save_data, navi_id, chip_slot, chip_info, chip_code):
-    chip_code_as_num = 26 if chip_code == "*" else ord(chip_code.casefold()) - ord("a")
-    if chip_code_as_num > 26 or chip_code_as_num < 0:
-        raise RuntimeError()
-    chip_and_code_packed = struct.pack("<H", chip_info["id"] | chip_code_as_num << 9)
-
-    folder_chip_base_offset = FOLDER_OFFSET + (30 * 2) * navi_id + chip_slot * 2
-    save_data[folder_chip_base_offset:folder_chip_base_offset+2] = chip_and_code_packed
-
-def get_folder_chip(save_data, navi_id, chip_slot, chip_ids_to_chip_names):
-    folder_chip_base_offset = FOLDER_OFFSET + (30 * 2) * navi_id + chip_slot * 2
+def edit_reg(save_data, profile, navi_id, chip_slot):
+    if profile.reg_structure_offset is not None:
+        save_data[profile.get_reg_offset(navi_id)] = chip_slot
 
-    chip_and_code_packed = struct.unpack("<H", save_data[folder_chip_base_offset:folder_chip_base_offset+2])[0]
-    chip_id = chip_and_code_packed & 0x1ff
-    chip_code_as_num = chip_and_code_packed >> 9
+def edit_buster_level(save_data, profile, navi_id, buster_level):
+    save_data[profile.get_buster_level_offset(navi_id)] = buster_level
 
-    chip_name = chip_ids_to_chip_names.get(chip_id, f"BdChp{chip_id:03X}")
-    if chip_code_as_num < 0 or chip_code_as_num > 26:
-        print(f"Invalid chip code detected for navi {navi_id} at chip slot {chip_slot} (0-in)!")
-        chip_code = f"Code_0x{chip_code_as_num:x}"
+def get_reg(save_data, profile, navi_id):
+    if profile.reg_structure_offset is not None:
+        return save_data[profile.get_reg_offset(navi_id)]
     else:
-        chip_code = all_chip_codes[chip_code_as_num]
-    return chip_name, chip_code
+        return 0xff
 
-def edit_reg(save_data, navi_id, chip_slot):
-    save_data[REG_STRUCTURE_OFFSET + 0x40 * navi_id + 0x2f] = chip_slot
+def mask_save(save_data, profile):
+    save_codec.mask_save(save_data, profile.mask_offset, profile.save_size)
 
-def edit_buster_level(save_data, navi_id, buster_level):
-    save_data[REG_STRUCTURE_OFFSET + 0x40 * navi_id + 0x5] = buster_level
+def calc_checksum_and_expected_checksum(save_data, profile):
+    return save_codec.calc_checksum_and_expected_checksum(save_data, profile.checksum_offset, profile.save_size, profile.checksum_adjust)
 
-def get_reg(save_data, navi_id):
-    return save_data[REG_STRUCTURE_OFFSET + 0x40 * navi_id + 0x2f]
+def decode_save(raw_save_data, profile, wrong_save_error_message, wrong_checksum_error_message):
+    save_data = bytearray(raw_save_data[profile.sram_start_offset:])
+    if len(save_data) < profile.save_size:
+        raise SaveError(f"{wrong_save_error_message} Save is too small ({len(raw_save_data)} bytes).")
 
-def mask_save(save_data):
-    mask = save_data[MASK_OFFSET:MASK_OFFSET+4]
-    mask_first_byte = mask[0]
+    mask_save(save_data, profile)
+    if not profile.is_correct_savegame(save_data):
+        raise SaveError(f"{wrong_save_error_message} Got \"{profile.get_game_name(save_data)}\".")
 
-    # "We only actually need to use the first byte of the mask, even though it's 32 bits long."
-    for i in range(SAVE_SIZE):
-        save_data[i] ^= mask_first_byte
+    checksum, expected_checksum = calc_checksum_and_expected_checksum(save_data, profile)
 
-    save_data[MASK_OFFSET:MASK_OFFSET+4] = mask
-
-def is_correct_savegame(save_data):
-    game_str = save_data[GAME_NAME_OFFSET:GAME_NAME_OFFSET+20]
-    return game_str in (bytearray(b"ROCKMANEXE4RO 040607"), bytearray(b"ROCKMANEXE4RO 041217"))
-
-def calc_checksum_and_expected_checksum(save_data):
-    checksum = 0
-
-    for byte in itertools.islice(save_data, SAVE_SIZE):
-        checksum = (checksum + byte) & 0xffffffff
+    if checksum != expected_checksum:
+        raise SaveError(f"{wrong_checksum_error_message} Expected: 0x{expected_checksum:08x}, Actual: 0x{checksum:08x}.")
 
-    expected_checksum = struct.unpack("<I", save_data[CHECKSUM_OFFSET:CHECKSUM_OFFSET+4])[0]
-    for i in range(4):
-        checksum = (checksum - save_data[CHECKSUM_OFFSET+i]) & 0xffffffff
+    checksum_tracker = save_codec.ChecksumTracker(save_data, checksum, profile.checksum_offset, profile.save_size)
+    return save_data, checksum_tracker
 
-    checksum = (checksum + 0x38) & 0xffffffff
+def read_save_from_file(save_filename, profile, wrong_save_error_message, wrong_checksum_error_message):
+    with open(save_filename, "rb") as f:
+        raw_save_data = f.read()
 
-    return checksum, expected_checksum
+    return decode_save(raw_save_data, profile, wrong_save_error_message, wrong_checksum_error_message)
 
-def read_save_from_file(save_filename, wrong_save_error_message, wrong_checksum_error_message):
-    with open(save_filename, "rb") as f:
-        save_data = bytearray(f.read())
+# fixes the checksum and masks save_data in place, returns what goes in the file
+def encode_save(save_data, profile, checksum_tracker=None):
+    if checksum_tracker is not None:
+        checksum = checksum_tracker.update(save_data)
+    else:
+        checksum, expected_checksum = calc_checksum_and_expected_checksum(save_data, profile)
 
-    mask_save(save_data)
-    if not is_correct_savegame(save_data):
-        error_pause_and_exit(f"{wrong_save_error_message} Got \"{game_str}\".")
+    game_profiles.CHECKSUM_STRUCT.pack_into(save_data, profile.checksum_offset, checksum)
 
-    checksum, expected_checksum = calc_checksum_and_expected_checksum(save_data)
+    mask_save(save_data, profile)
+    if profile.sram_start_offset != 0:
+        return bytes(profile.sram_start_offset) + save_data
+    else:
+        return save_data
 
-    if checksum != expected_checksum:
-        error_pause_and_exit(f"{wrong_checksum_error_message} Expected: 0x{expected_checksum:08x}, Actual: 0x{checksum:08x}.")
+def print_save_write_error(save_filepath, e):
+    # the emulator has the save open (Windows won't replace a file that's open)
+    if e.errno in (errno.EINVAL, errno.EACCES, errno.EPERM):
+        print(f"Cannot write to {save_filepath}, try closing any emulators/programs using the save.")
 
-    return save_data
+def write_save_to_file(save_data, save_filepath, profile, checksum_tracker=None, fsync=True):
+    try:
+        atomic_file.write_file_atomic(save_filepath, encode_save(save_data, profile, checksum_tracker), fsync)
+    except OSError as e:
+        print_save_write_error(save_filepath, e)
+        return False
 
-def write_save_to_file(save_data, save_filepath):
-    checksum, expected_checksum = calc_checksum_and_expected_checksum(save_data)
-    save_data[CHECKSUM_OFFSET:CHECKSUM_OFFSET+4] = struct.pack("<I", checksum)
+    return True
 
-    mask_save(save_data)
+# Like write_save_to_file, but leaves the save in a temp file for a BatchedFileCommitter to
+# move into place. Returns the temp file's path, or None if it couldn't be written.
+def stage_save_to_file(save_data, save_filepath, profile, checksum_tracker=None):
     try:
-        with open(save_filepath, "wb+") as f:
-            f.write(save_data)
+        return atomic_file.stage_file(save_filepath, encode_save(save_data, profile, checksum_tracker), fsync=False)
     except OSError as e:
-        if e.errno == errno.EINVAL:
-            print(f"Cannot write to {save_filepath}, try closing any emulators/programs using the save.")
+        print_save_write_error(save_filepath, e)
+        return None
 
 def error_pause_and_exit(error_msg):
     print(f"{error_msg}\n")
@@ -390,51 +235,178 @@ HELP_MESSAGE = """Don't run this program directly! This program has two modes:
 - Folder to Save: Drag a text file onto the executable. with your Navi on the first line and all 30 chips on the 2nd to 31st lines. This will add the save to the Tango saves directory.
 - Save to Folder: Drag a save file onto the executable. This will create a directory containing text folders for all 21 Navis."""
 
-def extract_save_folders(save_filepath):
-    save_basename = save_filepath.with_suffix("").name
-    if save_basename == "data":
-        error_pause_and_exit("Save cannot be named data!")
+@functools.lru_cache(maxsize=None)
+def load_extraction_tables(profile):
+    chip_db = chip_database.load_chip_db(profile)
+    exe45_chip_ids_to_chip_names = {chip_info.id: chip_name for chip_name, chip_info in chip_db.chips.items()}
+    return chip_db.navis, exe45_chip_ids_to_chip_names, chip_db.source_fingerprint.hex()
 
-    save_data = read_save_from_file(save_filepath, "Save isn't EXE4.5!", "Save has incorrect checksum (save potentially corrupted)!")
+# Returns ({navi name: folder text}, warnings) for a decoded save.
+def get_save_folder_texts(save_data, profile):
+    navis, exe45_chip_ids_to_chip_names, tables_fingerprint = load_extraction_tables(profile)
 
-    with open("data/navis.json", "r") as f:
-        navis = json.load(f)
+    folder_texts = {}
+    warnings = []
 
-    with open("data/exe45_chips.json", "r") as f:
-        exe45_chips = json.load(f)
-
-    exe45_chip_ids_to_chip_names = {chip_info["id"]: chip_name for chip_name, chip_info in exe45_chips.items()}
-
-    all_folders = {}
+    decoded_folders = folder_codec.decode_folders(save_data, profile, 0, max(navi.id for navi in navis.values()) + 1)
+    chip_code_strs = folder_codec.CHIP_CODE_STRS
 
     for navi_name, navi in navis.items():
         cur_folder = []
-        navi_id = navi["id"]
-        for chip_slot in range(30):
-            chip_name, chip_code = get_folder_chip(save_data, navi_id, chip_slot, exe45_chip_ids_to_chip_names)
-            cur_folder.append(f"{chip_name} {chip_code}")
-
-        reg_slot = get_reg(save_data, navi_id)
+        navi_id = navi.id
+        chip_ids, chip_codes_as_nums = decoded_folders.get_folder(navi_id)
+        for chip_slot, (chip_id, chip_code_as_num) in enumerate(zip(chip_ids, chip_codes_as_nums)):
+            chip_name = exe45_chip_ids_to_chip_names.get(chip_id)
+            if chip_name is None:
+                chip_name = f"BdChp{chip_id:03X}"
+            if not folder_codec.is_valid_chip_code_as_num(chip_code_as_num):
+                warnings.append(f"Invalid chip code detected for navi {navi_id} at chip slot {chip_slot} (0-in)!")
+            cur_folder.append(f"{chip_name} {chip_code_strs[chip_code_as_num]}")
+
+        reg_slot = get_reg(save_data, profile, navi_id)
         if reg_slot != 0xff:
             if not (0 <= reg_slot < 30):
-                print(f"Invalid reg slot {reg_slot} (0-in) for navi {navi_id}")
+                warnings.append(f"Invalid reg slot {reg_slot} (0-in) for navi {navi_id}")
             else:
                 cur_folder[reg_slot] += " [REG]"
 
-        all_folders[navi_name] = cur_folder
+        if profile.has_navi_line:
+            folder_texts[navi_name] = f"{navi_name}\n" + "\n".join(cur_folder) + "\n"
+        else:
+            folder_texts[navi_name] = "\n".join(cur_folder) + "\n"
+
+    return folder_texts, warnings
+
+# profile is detected from the save if None
+def read_raw_save_from_file(save_filepath, profile=None):
+    with open(save_filepath, "rb") as f:
+        raw_save_data = f.read()
+
+    if profile is None:
+        profile = game_profiles.detect_save_profile(raw_save_data)
+        if profile is None:
+            profile = game_profiles.DEFAULT_PROFILE
+
+    return profile, raw_save_data
+
+def decode_save_folder_texts(raw_save_data, profile):
+    save_data, checksum_tracker = decode_save(raw_save_data, profile, f"Save isn't {profile.display_name}!", "Save has incorrect checksum (save potentially corrupted)!")
+    return get_save_folder_texts(save_data, profile)
+
+# Returns (profile, {navi name: folder text}, warnings). profile is detected from the save if None.
+def read_save_folder_texts(save_filepath, profile=None):
+    profile, raw_save_data = read_raw_save_from_file(save_filepath, profile)
+    folder_texts, warnings = decode_save_folder_texts(raw_save_data, profile)
+    return profile, folder_texts, warnings
+
+# Hashes the folders and regs as they are in the save file, which only needs the mask byte
+# instead of decoding the whole save. None if the save is too small to have them.
+def get_save_folder_region_hash(raw_save_data, profile):
+    if len(raw_save_data) < profile.sram_start_offset + profile.save_size:
+        return None
+
+    navis, exe45_chip_ids_to_chip_names, tables_fingerprint = load_extraction_tables(profile)
+    sram_start_offset = profile.sram_start_offset
+    folder_start_offset = sram_start_offset + profile.folder_offset
+    folder_end_offset = folder_start_offset + game_profiles.FOLDER_STRUCT.size * (max(navi.id for navi in navis.values()) + 1)
 
-    output_text_folder_dirpath = pathlib.Path(sys.argv[0]).parent / save_basename
+    region_hash = hashlib.blake2b(digest_size=16)
+    region_hash.update(raw_save_data[sram_start_offset + profile.mask_offset:sram_start_offset + profile.mask_offset + 1])
+    region_hash.update(raw_save_data[folder_start_offset:folder_end_offset])
+    if profile.reg_structure_offset is not None:
+        region_hash.update(bytes(raw_save_data[sram_start_offset + profile.get_reg_offset(navi.id)] for navi in navis.values()))
+
+    return region_hash.hexdigest()
+
+def get_extracted_folder_filename(save_stem, navi_name):
+    return f"{save_stem}_{navi_name}.txt"
+
+# one listdir instead of a stat per navi
+def are_extracted_folders_present(output_text_folder_dirpath, save_filepath, navi_names):
+    try:
+        filenames = set(os.listdir(output_text_folder_dirpath))
+    except OSError:
+        return False
+
+    save_stem = save_filepath.stem
+    return all(get_extracted_folder_filename(save_stem, navi_name) in filenames for navi_name in navi_names)
+
+# With a manifest (see extraction_manifest), saves whose folders and regs haven't changed since
+# they were last extracted are skipped, and only the folder files whose text changed are rewritten.
+# A skipped save isn't checked again for a bad checksum.
+def extract_save_folders(save_filepath, profile=None, output_root_dirpath=None, verbose=True, manifest=None):
+    save_basename = save_filepath.with_suffix("").name
+    if save_basename == "data":
+        raise SaveError("Save cannot be named data!")
+
+    if output_root_dirpath is None:
+        output_root_dirpath = pathlib.Path(sys.argv[0]).parent
+
+    output_text_folder_dirpath = output_root_dirpath / save_basename
+
+    if manifest is not None:
+        save_key = extraction_manifest.get_save_key(save_filepath)
+        manifest_entry = manifest.get(save_key)
+        save_stat = os.stat(save_filepath)
+        # the profile is only known without reading the save if it's given, otherwise it's the one it was extracted with
+        if manifest_entry is not None:
+            entry_profile = profile if profile is not None else game_profiles.GAME_PROFILES.get(manifest_entry["profile"])
+        else:
+            entry_profile = None
+
+        if entry_profile is not None and manifest_entry["profile"] == entry_profile.name and manifest_entry["tables"] == load_extraction_tables(entry_profile)[2] and extraction_manifest.is_stat_unchanged(manifest_entry, save_stat) and are_extracted_folders_present(output_text_folder_dirpath, save_filepath, manifest_entry["folder_hashes"]):
+            manifest.num_unchanged += 1
+            return output_text_folder_dirpath
+
+    profile, raw_save_data = read_raw_save_from_file(save_filepath, profile)
+
+    if manifest is not None:
+        region_hash = get_save_folder_region_hash(raw_save_data, profile)
+        tables_fingerprint = load_extraction_tables(profile)[2]
+        if manifest_entry is not None and region_hash is not None and manifest_entry["region_hash"] == region_hash and manifest_entry["profile"] == profile.name and manifest_entry["tables"] == tables_fingerprint and are_extracted_folders_present(output_text_folder_dirpath, save_filepath, manifest_entry["folder_hashes"]):
+            manifest.add(save_key, dict(manifest_entry, **extraction_manifest.make_stat_fields(save_stat)))
+            manifest.num_same_folders += 1
+            return output_text_folder_dirpath
+
+    folder_texts, warnings = decode_save_folder_texts(raw_save_data, profile)
+    for warning in warnings:
+        print(warning)
 
     if not output_text_folder_dirpath.is_dir():
-        print(f"Creating folder text directory at {output_text_folder_dirpath}!")
-        output_text_folder_dirpath.mkdir(parents=True)
+        if verbose:
+            print(f"Creating folder text directory at {output_text_folder_dirpath}!")
+        output_text_folder_dirpath.mkdir(parents=True, exist_ok=True)
+
+    if manifest is not None and manifest_entry is not None:
+        old_folder_hashes = manifest_entry["folder_hashes"]
+    else:
+        old_folder_hashes = {}
 
-    for navi_name, folder in all_folders.items():
-        output_text_folder_filepath = output_text_folder_dirpath / f"{save_filepath.stem}_{navi_name}.txt"
-        print(f"Writing text folder to {output_text_folder_filepath}!")
-        folder_str_output = f"{navi_name}\n" + "\n".join(folder) + "\n"
+    folder_hashes = {}
+    num_files_written = 0
+
+    for navi_name, folder_text in folder_texts.items():
+        output_text_folder_filepath = output_text_folder_dirpath / get_extracted_folder_filename(save_filepath.stem, navi_name)
+        if manifest is not None:
+            folder_hash = extraction_manifest.hash_text(folder_text)
+            folder_hashes[navi_name] = folder_hash
+            if old_folder_hashes.get(navi_name) == folder_hash and output_text_folder_filepath.is_file():
+                continue
+
+        if verbose:
+            print(f"Writing text folder to {output_text_folder_filepath}!")
         with open(output_text_folder_filepath, "w+") as f:
-            f.write(folder_str_output)
+            f.write(folder_text)
+        num_files_written += 1
+
+    if manifest is not None:
+        manifest_entry = extraction_manifest.make_stat_fields(save_stat)
+        manifest_entry.update({"profile": profile.name, "tables": tables_fingerprint, "region_hash": region_hash, "folder_hashes": folder_hashes})
+        manifest.add(save_key, manifest_entry)
+        manifest.num_extracted += 1
+        manifest.num_files_written += num_files_written
+
+    return output_text_folder_dirpath
 
 def mb_to_max_chip_count(mb):
     if 0 <= mb <= 19:
@@ -450,6 +422,12 @@ def mb_to_max_chip_count(mb):
 
 get_most_similar_from_dict_func = get_most_similar_from_dict_lcs
 
+def make_name_matcher(all_names):
+    if get_most_similar_from_dict_func is get_most_similar_from_dict_lcs:
+        return name_matcher.LcsNameMatcher(all_names)
+    else:
+        return name_matcher.ScanNameMatcher(get_most_similar_from_dict_func, all_names)
+
 def debug_str(x):
     if False:
         return x
@@ -461,7 +439,30 @@ def is_code(code):
 
 DEBUG = False
 
-def convert_folder_to_save(input_folder_filepath):
+class ConversionContext:
+    __slots__ = ("profile", "saves_dirpath", "template_save_data", "template_checksum", "chip_db", "navis_uncased", "exe45_chips_uncased", "navi_matcher", "chip_matcher", "suggestion_cache")
+
+    def __init__(self, profile, saves_dirpath, template_save_data, template_checksum, chip_db, suggestion_cache=None):
+        self.profile = profile
+        self.saves_dirpath = saves_dirpath
+        self.template_save_data = template_save_data
+        self.template_checksum = template_checksum
+        self.chip_db = chip_db
+        self.navis_uncased = chip_db.navis_uncased
+        self.exe45_chips_uncased = chip_db.chips_uncased
+        self.navi_matcher = make_name_matcher(self.navis_uncased)
+        self.chip_matcher = make_name_matcher(self.exe45_chips_uncased)
+        self.suggestion_cache = suggestion_cache
+        if suggestion_cache is not None:
+            self.navi_matcher = name_matcher.CachedNameMatcher(self.navi_matcher, suggestion_cache, (profile.name, "navis"))
+            self.chip_matcher = name_matcher.CachedNameMatcher(self.chip_matcher, suggestion_cache, (profile.name, "chips"))
+
+    def new_save_data(self):
+        save_data = bytearray(self.template_save_data)
+        checksum_tracker = save_codec.ChecksumTracker(save_data, self.template_checksum, self.profile.checksum_offset, self.profile.save_size)
+        return save_data, checksum_tracker
+
+def get_tango_saves_dirpath():
     tango_config_filepath = get_tango_config_filepath()
     if not tango_config_filepath.is_file():
         error_pause_and_exit(f"Cannot find Tango config file. Make sure Tango is installed (https://tango.n1gp.net/).")
@@ -473,65 +474,171 @@ def convert_folder_to_save(input_folder_filepath):
     if data_path is None:
         error_pause_and_exit(f"Tango is installed, but Tango data folder is missing!")
 
-    save_data = read_save_from_file("data/exe45_us_pvp_template.sav", "Template save isn't EXE4.5!", "Template save has incorrect checksum (save potentially corrupted)!")
+    return pathlib.Path(data_path) / pathlib.Path("saves")
 
-    with open(input_folder_filepath, "r") as f:
-        folder_input_as_text = f.read()
+def get_suggestion_cache_filepath(profile):
+    return pathlib.Path(sys.argv[0]).parent / f"suggestion_cache_{profile.name}.json"
+
+# suggestions depend on the name tables and on how names are matched
+def get_suggestion_cache_fingerprint(chip_db):
+    fingerprint = hashlib.sha1(get_most_similar_from_dict_func.__name__.encode("ascii"))
+    fingerprint.update(chip_db.source_fingerprint)
+    return fingerprint.hexdigest()
+
+def load_suggestion_cache(chip_db, suggestion_cache_filepath):
+    suggestion_cache = name_matcher.SuggestionCache(suggestion_cache_filepath, get_suggestion_cache_fingerprint(chip_db))
+    suggestion_cache.load()
+    return suggestion_cache
+
+# loads everything that doesn't depend on the input folder, so it can be reused across folders
+def load_conversion_context(profile, saves_dirpath=None, suggestion_cache_filepath=None):
+    if profile.template_save_filename is None:
+        raise SaveError(f"There's no template save for {profile.display_name} ({profile.name}), so folders can't be converted to its saves!")
+
+    if saves_dirpath is None:
+        saves_dirpath = get_tango_saves_dirpath()
+
+    save_data, checksum_tracker = read_save_from_file(profile.template_save_filename, profile, f"Template save isn't {profile.display_name}!", "Template save has incorrect checksum (save potentially corrupted)!")
+
+    chip_db = chip_database.load_chip_db(profile)
+
+    if profile.sets_buster_levels:
+        for navi_name, navi in chip_db.navis.items():
+            edit_buster_level(save_data, profile, navi.id, navi.buster_level - 1)
+
+    template_checksum = checksum_tracker.update(save_data)
+
+    if suggestion_cache_filepath is not None:
+        suggestion_cache = load_suggestion_cache(chip_db, suggestion_cache_filepath)
+    else:
+        suggestion_cache = None
+
+    return ConversionContext(profile, saves_dirpath, bytes(save_data), template_checksum, chip_db, suggestion_cache)
+
+# For validate_folder_text only: loads just the chip tables, not the template save or Tango's config.
+def load_validation_context(profile, suggestion_cache_filepath=None):
+    chip_db = chip_database.load_chip_db(profile)
+
+    if suggestion_cache_filepath is not None:
+        suggestion_cache = load_suggestion_cache(chip_db, suggestion_cache_filepath)
+    else:
+        suggestion_cache = None
+
+    return ConversionContext(profile, None, None, None, chip_db, suggestion_cache)
+
+# What a folder's text says, found from the chip tables alone.
+# folder_chips maps chip slots on lines without errors to (chip id, chip code as num).
+class FolderValidation:
+    __slots__ = ("navi_id", "sets_navi", "folder_chips", "reg_slot", "diagnostics")
+
+    def __init__(self, navi_id, sets_navi, folder_chips, reg_slot, diagnostics):
+        self.navi_id = navi_id
+        self.sets_navi = sets_navi
+        self.folder_chips = folder_chips
+        self.reg_slot = reg_slot
+        self.diagnostics = diagnostics
+
+    @property
+    def has_errors(self):
+        return diagnostics.has_errors(self.diagnostics)
+
+    @property
+    def warnings(self):
+        return diagnostics.get_warnings(self.diagnostics)
+
+    def render_error_message(self):
+        return diagnostics.render_errors(self.diagnostics)
+
+class FolderConversionResult(FolderValidation):
+    __slots__ = ("save_data", "checksum_tracker")
+
+    def __init__(self, validation, save_data, checksum_tracker):
+        super().__init__(validation.navi_id, validation.sets_navi, validation.folder_chips, validation.reg_slot, validation.diagnostics)
+        self.save_data = save_data
+        self.checksum_tracker = checksum_tracker
+
+WORD_REGEX = re.compile(r"\S+")
+
+# columns of words first_word_index to end_word_index (exclusive) in line, as split by str.split()
+def get_word_span(line, first_word_index, end_word_index):
+    word_matches = list(WORD_REGEX.finditer(line))
+    return (word_matches[first_word_index].start(), word_matches[end_word_index - 1].end())
+
+# Doesn't need the template save, so context can come from load_validation_context.
+def validate_folder_text(folder_input_as_text, context):
+    profile = context.profile
+    folder_diagnostics = []
 
     folder_input = folder_input_as_text.strip().splitlines()
-    if len(folder_input) != 31:
-        print("Input folder should be 31 lines long (1 line for Navi + 30 lines for chips)!")
-
-    with open("data/navis.json", "r") as f:
-        navis_cased = json.load(f)
-
-    with open("data/exe45_chips.json", "r") as f:
-        exe45_chips_cased = json.load(f)
-
-    navis_uncased = {navi_name_uncased.casefold(): v for navi_name_uncased, v in navis_cased.items()}
-    exe45_chips_uncased = {chip_name.casefold(): v for chip_name, v in exe45_chips_cased.items()}
-
-    navi_name = folder_input[0].strip()
-    navi_name_uncased = navi_name.casefold()
-    navi = navis_uncased.get(navi_name_uncased)
-    error_messages = collections.defaultdict(list)
-
-    if navi is None:
-        most_similar_navi_name_uncased, most_similar_navi_name_ratio = get_most_similar_from_dict_func(navi_name_uncased, navis_uncased)
-        error_message_partial = f"Unknown navi {navi_name}!"
-        if most_similar_navi_name_uncased is not None:
-            navi = navis_uncased.get(most_similar_navi_name_uncased)
-            most_similar_navi_name_cased = navis_uncased.get(most_similar_navi_name_uncased)["name"]
-            error_message_partial += f" Did you mean \"{most_similar_navi_name_cased}\" or \"{most_similar_navi_name_uncased}\"?"
-            if DEBUG:
-                error_message_partial += f" (Ignore This: {most_similar_navi_name_ratio})"
-            navi_name_cased = most_similar_navi_name_cased
-            navi_name_uncased = most_similar_navi_name_uncased
+    if len(folder_input) != profile.num_folder_lines:
+        if profile.has_navi_line:
+            folder_diagnostics.append(diagnostics.warning(diagnostics.WRONG_LINE_COUNT, "Input folder should be 31 lines long (1 line for Navi + 30 lines for chips)!"))
         else:
-            navi = navis_uncased.get("megaman")
-            navi_name = "MegaMan"
-            navi_name_cased = "MegaMan"
-            navi_name_uncased = "megaman"
-        error_messages[1].append(error_message_partial)
+            folder_diagnostics.append(diagnostics.warning(diagnostics.WRONG_LINE_COUNT, "Input folder should be 30 lines long!"))
+
+    navis_uncased = context.navis_uncased
+    exe45_chips_uncased = context.exe45_chips_uncased
+
+    sets_navi = False
+
+    if not profile.has_navi_line:
+        navi = next(iter(navis_uncased.values()))
+        navi_name_cased = navi.name
+        folder_chip_lines = folder_input
+        first_chip_line_num = 1
     else:
-        # navi offset
-        navi_name_cased = navi["name"]
-        save_data[0x4ad1] = navi["id"]
+        folder_chip_lines = folder_input[1:]
+        first_chip_line_num = 2
+        navi_name = folder_input[0].strip()
+        navi_name_uncased = navi_name.casefold()
+        navi = navis_uncased.get(navi_name_uncased)
+        if navi is None:
+            most_similar_navi_name_uncased, most_similar_navi_name_ratio = context.navi_matcher.get_most_similar(navi_name_uncased)
+            error_message_partial = f"Unknown navi {navi_name}!"
+            navi_name_start = len(folder_input[0]) - len(folder_input[0].lstrip())
+            navi_name_suggestion = None
+            if most_similar_navi_name_uncased is not None:
+                navi = navis_uncased.get(most_similar_navi_name_uncased)
+                most_similar_navi_name_cased = navis_uncased.get(most_similar_navi_name_uncased).name
+                error_message_partial += f" Did you mean \"{most_similar_navi_name_cased}\" or \"{most_similar_navi_name_uncased}\"?"
+                if DEBUG:
+                    error_message_partial += f" (Ignore This: {most_similar_navi_name_ratio})"
+                navi_name_cased = most_similar_navi_name_cased
+                navi_name_uncased = most_similar_navi_name_uncased
+                navi_name_suggestion = most_similar_navi_name_cased
+            else:
+                navi = navis_uncased.get("megaman")
+                navi_name = "MegaMan"
+                navi_name_cased = "MegaMan"
+                navi_name_uncased = "megaman"
+            folder_diagnostics.append(diagnostics.error(diagnostics.UNKNOWN_NAVI, error_message_partial, 1, (navi_name_start, navi_name_start + len(navi_name)), navi_name_suggestion))
+        else:
+            navi_name_cased = navi.name
+            sets_navi = True
+
+    folder_chips = {}
+    reg_slot = None
 
     reg_line_num = -1
     collapsed_folder = collections.defaultdict(int)
     num_megas = 0
     num_gigas = 0
 
-    for line_num, chip in enumerate(folder_input[1:], 2):
+    for line_num, chip_line in enumerate(folder_chip_lines, first_chip_line_num):
         is_chip_guess = False
-        chip = chip.strip()
+        chip = chip_line.strip()
+        num_diagnostics_before_line = len(folder_diagnostics)
 
         chip_name_with_spaces = None
 
         chip_name_chip_code_reg = chip.split()
+        # which of those words are the name, code and reg, for diagnostic spans
+        num_chip_name_words = len(chip_name_chip_code_reg)
+        chip_code_word_index = None
+        chip_reg_word_index = None
+
         if len(chip_name_chip_code_reg) == 0:
-            error_messages[line_num].append("Line is empty!")
+            folder_diagnostics.append(diagnostics.error(diagnostics.EMPTY_LINE, "Line is empty!", line_num))
             continue
         elif len(chip_name_chip_code_reg) == 1:
             chip_name = chip
@@ -546,6 +653,8 @@ def convert_folder_to_save(input_folder_filepath):
             else:
                 chip_name, chip_code = chip_name_chip_code_reg
                 chip_reg = ""
+                num_chip_name_words = 1
+                chip_code_word_index = 1
         # try to catch people using spaces in chip names
         else:
             # four cases
@@ -559,17 +668,24 @@ def convert_folder_to_save(input_folder_filepath):
                 chip_code = chip_name_chip_code_reg[-1]
                 chip_reg = ""
                 chip_name_with_spaces = chip.rsplit(maxsplit=1)[0]
+                num_chip_name_words -= 1
+                chip_code_word_index = num_chip_name_words
             elif is_code(chip_name_chip_code_reg[-2]):
                 chip_name = "".join(chip_name_chip_code_reg[:-2])
                 chip_code = chip_name_chip_code_reg[-2]
                 chip_reg = chip_name_chip_code_reg[-1]
                 if len(chip_name_chip_code_reg) != 3:
                     chip_name_with_spaces = chip.rsplit(maxsplit=2)[0]
+                num_chip_name_words -= 2
+                chip_code_word_index = num_chip_name_words
+                chip_reg_word_index = num_chip_name_words + 1
             elif "reg" in chip_name_chip_code_reg[-1].lower() or any(c in chip_name_chip_code_reg[-1] for c in ("[", "]", "{", "}", "<", ">", "(", ")")):
                 chip_name = "".join(chip_name_chip_code_reg[:-1])
                 chip_code = None
                 chip_reg = chip_name_chip_code_reg[-1]
                 chip_name_with_spaces = chip.rsplit(maxsplit=1)[0]
+                num_chip_name_words -= 1
+                chip_reg_word_index = num_chip_name_words
             else:
                 chip_name = "".join(chip_name_chip_code_reg)
                 chip_code = None
@@ -577,10 +693,10 @@ def convert_folder_to_save(input_folder_filepath):
                 chip_name_with_spaces = chip
 
         if chip_name_with_spaces is not None:
-            error_messages[line_num].append(f"Spaces detected in chip name \"{chip_name_with_spaces}\"!")
+            folder_diagnostics.append(diagnostics.error(diagnostics.SPACES_IN_CHIP_NAME, f"Spaces detected in chip name \"{chip_name_with_spaces}\"!", line_num, get_word_span(chip_line, 0, num_chip_name_words), chip_name))
 
         if chip_code is None:
-            error_messages[line_num].append(f"Chip \"{chip_name_with_spaces if chip_name_with_spaces is not None else chip_name}\" has missing code!")
+            folder_diagnostics.append(diagnostics.error(diagnostics.MISSING_CHIP_CODE, f"Chip \"{chip_name_with_spaces if chip_name_with_spaces is not None else chip_name}\" has missing code!", line_num, get_word_span(chip_line, 0, num_chip_name_words)))
 
         chip_name_uncased = chip_name.casefold()
 
@@ -588,116 +704,638 @@ def convert_folder_to_save(input_folder_filepath):
 
         if chip_info is None:
             is_chip_guess = True
-            most_similar_chip_name_uncased, most_similar_navi_name_ratio = get_most_similar_from_dict_func(chip_name_uncased, exe45_chips_uncased, chip_code_tiebreak=chip_code, exe45_chips_uncased=exe45_chips_uncased)
+            most_similar_chip_name_uncased, most_similar_navi_name_ratio = context.chip_matcher.get_most_similar(chip_name_uncased, chip_code_tiebreak=chip_code, exe45_chips_uncased=exe45_chips_uncased)
             error_message_partial = f"Unknown chip {chip_name}!"
+            chip_name_suggestion = None
             if most_similar_chip_name_uncased is not None:
                 chip_info = exe45_chips_uncased.get(most_similar_chip_name_uncased)
-                most_similar_chip_name_cased = chip_info["name"]
+                most_similar_chip_name_cased = chip_info.name
                 error_message_partial += f" Did you mean \"{most_similar_chip_name_cased}\" or \"{most_similar_chip_name_uncased}\"?"
                 if DEBUG:
                     error_message_partial += f" (Ignore This: {most_similar_navi_name_ratio})"
                 chip_name_cased = most_similar_chip_name_cased
                 chip_name_uncased = most_similar_chip_name_uncased
+                chip_name_suggestion = most_similar_chip_name_cased
             else:
                 chip_name_cased = chip_name
 
-            error_messages[line_num].append(error_message_partial)
+            folder_diagnostics.append(diagnostics.error(diagnostics.UNKNOWN_CHIP, error_message_partial, line_num, get_word_span(chip_line, 0, num_chip_name_words), chip_name_suggestion))
         else:
-            chip_name_cased = chip_info["name"]
+            chip_name_cased = chip_info.name
 
         if chip_code is not None and chip_info is not None:
-            if chip_code.upper() not in chip_info["codes"]:
-                error_messages[line_num].append(f"{chip_name_cased} does not come in code {chip_code}!")
+            if chip_code.upper() not in chip_info.codes:
+                folder_diagnostics.append(diagnostics.error(diagnostics.WRONG_CHIP_CODE, f"{chip_name_cased} does not come in code {chip_code}!", line_num, get_word_span(chip_line, chip_code_word_index, chip_code_word_index + 1)))
 
         if chip_reg != "":
+            chip_reg_span = get_word_span(chip_line, chip_reg_word_index, chip_reg_word_index + 1)
             if chip_reg.casefold() != "[reg]":
-                error_messages[line_num].append(f"Unknown text \"{chip_reg}\" after chip! (Add [REG] after a chip to select a reg)")
+                folder_diagnostics.append(diagnostics.error(diagnostics.UNKNOWN_TEXT_AFTER_CHIP, f"Unknown text \"{chip_reg}\" after chip! (Add [REG] after a chip to select a reg)", line_num, chip_reg_span, "[REG]"))
             elif reg_line_num != -1:
-                error_messages[line_num].append(f"Reg already set on line {reg_line_num}!")
+                folder_diagnostics.append(diagnostics.error(diagnostics.REG_ALREADY_SET, f"Reg already set on line {reg_line_num}!", line_num, chip_reg_span))
             else:
                 reg_line_num = line_num
                 if chip_info is not None:
-                    if chip_info["mb"] > navi["mb"]:
-                        error_messages[line_num].append(f"{chip_name_cased} ({chip_info['mb']}MB) exceeds {navi_name_cased}'s reg capacity ({navi['mb']}MB)!")
+                    if chip_info.mb > navi.mb:
+                        folder_diagnostics.append(diagnostics.error(diagnostics.REG_OVER_CAPACITY, f"{chip_name_cased} ({chip_info.mb}MB) exceeds {navi_name_cased}'s reg capacity ({navi.mb}MB)!", line_num, chip_reg_span))
                     else:
-                        edit_reg(save_data, navi["id"], reg_line_num - 2)
+                        reg_slot = reg_line_num - first_chip_line_num
 
         if chip_info is not None:
             collapsed_folder[chip_name_uncased] += 1
-            if chip_info["library"] == "Mega":
+            if chip_info.library == "Mega":
                 num_megas += 1
-            elif chip_info["library"] == "Giga":
+            elif chip_info.library == "Giga":
                 num_gigas += 1
 
-        if error_messages.get(line_num) is None:
-            edit_folder_chip(save_data, navi["id"], line_num - 2, chip_info, chip_code)
+        chip_slot = line_num - first_chip_line_num
+        if len(folder_diagnostics) == num_diagnostics_before_line and chip_slot < game_profiles.NUM_FOLDER_CHIPS:
+            folder_chips[chip_slot] = (chip_info.id, folder_codec.chip_code_to_num(chip_code))
 
     if reg_line_num == -1:
-        edit_reg(save_data, navi["id"], 0xff)
-
-    folder_error_message = ""
-
-    if len(error_messages) != 0:
-        for line_num, error_messages_for_line in error_messages.items():
-            if len(error_messages_for_line) != 0:
-                folder_error_message += f"At line {line_num}:"
-                if len(error_messages_for_line) == 1:
-                    folder_error_message += f" {error_messages_for_line[0]}\n"
-                else:
-                    folder_error_message += "\n" + "".join(f"    {error_message}\n" for error_message in error_messages_for_line)
+        reg_slot = 0xff
 
     for chip_name_uncased, chip_count in collapsed_folder.items():
         chip_info = exe45_chips_uncased.get(chip_name_uncased)
-        chip_mb = chip_info["mb"]
+        chip_mb = chip_info.mb
         max_chip_count = mb_to_max_chip_count(chip_mb)
         if chip_count > max_chip_count:
-            folder_error_message += f"{chip_info['name']} ({chip_mb}MB) exceeds maximum allowed count of {max_chip_count}! (Folder has {chip_count})\n"
+            folder_diagnostics.append(diagnostics.error(diagnostics.TOO_MANY_COPIES, f"{chip_info.name} ({chip_mb}MB) exceeds maximum allowed count of {max_chip_count}! (Folder has {chip_count})"))
 
-    if num_megas > navi["megafolder"]:
-        folder_error_message += f"Folder exceeds {navi_name_cased}'s Mega Chip capacity of {navi['megafolder']}! (Folder has {num_megas})\n"
+    if num_megas > navi.megafolder:
+        folder_diagnostics.append(diagnostics.error(diagnostics.TOO_MANY_MEGAS, f"Folder exceeds {navi_name_cased}'s Mega Chip capacity of {navi.megafolder}! (Folder has {num_megas})"))
 
-    if num_gigas > navi["gigafolder"]:
-        folder_error_message += f"Folder exceeds {navi_name_cased}'s Giga Chip capacity of {navi['gigafolder']}! (Folder has {num_gigas})\n"
+    if num_gigas > navi.gigafolder:
+        folder_diagnostics.append(diagnostics.error(diagnostics.TOO_MANY_GIGAS, f"Folder exceeds {navi_name_cased}'s Giga Chip capacity of {navi.gigafolder}! (Folder has {num_gigas})"))
 
-    if folder_error_message != "":
-        folder_error_message = "Provided folder has errors:\n" + folder_error_message
-        error_pause_and_exit(folder_error_message)
+    return FolderValidation(navi.id, sets_navi, folder_chips, reg_slot, folder_diagnostics)
 
-    for navi_name, navi in navis_cased.items():
-        edit_buster_level(save_data, navi["id"], navi["busterLevel"] - 1)
+def convert_folder_text(folder_input_as_text, context):
+    validation = validate_folder_text(folder_input_as_text, context)
+    profile = context.profile
+    navi_id = validation.navi_id
+    save_data, checksum_tracker = context.new_save_data()
 
-    saves_dirpath = pathlib.Path(data_path) / pathlib.Path("saves")
+    if validation.sets_navi:
+        save_data[profile.navi_id_offset] = navi_id
+        checksum_tracker.mark_dirty(profile.navi_id_offset, profile.navi_id_offset + 1)
+
+    # slots without a valid chip keep what the template has
+    template_chip_ids, template_chip_codes_as_nums = folder_codec.decode_folders(save_data, profile, navi_id).get_folder(navi_id)
+    folder_chip_ids = list(template_chip_ids)
+    folder_chip_codes_as_nums = list(template_chip_codes_as_nums)
+    for chip_slot, (chip_id, chip_code_as_num) in validation.folder_chips.items():
+        folder_chip_ids[chip_slot] = chip_id
+        folder_chip_codes_as_nums[chip_slot] = chip_code_as_num
+
+    folder_codec.encode_folder(save_data, profile, navi_id, folder_chip_ids, folder_chip_codes_as_nums, validation.reg_slot, checksum_tracker)
+
+    return FolderConversionResult(validation, save_data, checksum_tracker)
+
+def get_folder_save_filepath(context, input_folder_filepath):
+    saves_dirpath = context.saves_dirpath
 
     if not saves_dirpath.is_dir():
         print("Creating Tango saves directory!")
-        saves_dirpath.mkdir(parents=True)
-
-    save_filepath = saves_dirpath / input_folder_filepath.with_suffix(".sav").name
-    write_save_to_file(save_data, save_filepath)
-
-    print(f"Successfully wrote save to {save_filepath}")
-
-def main():
-    #ap = configargparse.ArgumentParser(
-    #    allow_abbrev=False,
-    #    config_file_parser_class=configargparse.YAMLConfigFileParser,
-    #    config_file_open_func=lambda filename: open(
-    #        filename, "r", encoding="utf-8"
-    #    )
-    #)
-    #
-    #ap.add_argument("-cfg", "--config", dest="config", default=None, is_config_file=True, help="Alternative config file to put in command line arguments. Arguments provided on the command line will override arguments provided in the config file, if specified.")
-    #ap.add_argument("-i", "--input-folder-filename", dest="input_folder_filename", help="Folder filename", default=None)
-    ##ap.add_argument("-o", "--output-save-filename", dest="output_save_filename", help="Output save filename", required=True)
-    #args = ap.parse_args()
-
-    if len(sys.argv) == 1:
-        error_pause_and_exit(HELP_MESSAGE)
+        saves_dirpath.mkdir(parents=True, exist_ok=True)
+
+    return saves_dirpath / input_folder_filepath.with_suffix(".sav").name
+
+def write_folder_save(result, context, input_folder_filepath, fsync=True):
+    save_filepath = get_folder_save_filepath(context, input_folder_filepath)
+    wrote_save = write_save_to_file(result.save_data, save_filepath, context.profile, result.checksum_tracker, fsync)
+    return save_filepath, wrote_save
+
+def stage_folder_save(result, context, input_folder_filepath):
+    save_filepath = get_folder_save_filepath(context, input_folder_filepath)
+    temp_save_filepath = stage_save_to_file(result.save_data, save_filepath, context.profile, result.checksum_tracker)
+    return save_filepath, temp_save_filepath
+
+DIAGNOSTICS_FORMAT_TEXT = "text"
+DIAGNOSTICS_FORMAT_JSON = "json"
+DIAGNOSTICS_FORMATS = (DIAGNOSTICS_FORMAT_TEXT, DIAGNOSTICS_FORMAT_JSON)
+
+# In the JSON format everything goes in one object, extra_json has anything besides the diagnostics.
+def print_folder_diagnostics(folder_diagnostics, diagnostics_format, extra_json=None):
+    if diagnostics_format == DIAGNOSTICS_FORMAT_JSON:
+        output_json = {}
+        set_report_entry_diagnostics(output_json, folder_diagnostics)
+        if extra_json is not None:
+            output_json.update(extra_json)
+        print(json.dumps(output_json))
+        if not output_json["ok"]:
+            sys.exit(1)
+    else:
+        for warning in diagnostics.get_warnings(folder_diagnostics):
+            print(warning)
+
+        if diagnostics.has_errors(folder_diagnostics):
+            error_pause_and_exit(diagnostics.render_errors(folder_diagnostics))
+
+def convert_folder_to_save(input_folder_filepath, profile=game_profiles.DEFAULT_PROFILE, context=None, diagnostics_format=DIAGNOSTICS_FORMAT_TEXT):
+    if context is None:
+        context = load_conversion_context(profile, suggestion_cache_filepath=get_suggestion_cache_filepath(profile))
+
+    with open(input_folder_filepath, "r") as f:
+        folder_input_as_text = f.read()
+
+    result = convert_folder_text(folder_input_as_text, context)
+    if context.suggestion_cache is not None:
+        context.suggestion_cache.save()
+
+    if diagnostics_format == DIAGNOSTICS_FORMAT_JSON:
+        folder_diagnostics = result.diagnostics
+        extra_json = None
+        if not result.has_errors:
+            save_filepath, wrote_save = write_folder_save(result, context, input_folder_filepath)
+            extra_json = {"save": str(save_filepath)}
+            if not wrote_save:
+                folder_diagnostics = folder_diagnostics + [diagnostics.error(diagnostics.CANNOT_WRITE_SAVE, f"Cannot write to {save_filepath}")]
+        print_folder_diagnostics(folder_diagnostics, diagnostics_format, extra_json)
+        return
+
+    print_folder_diagnostics(result.diagnostics, diagnostics_format)
+
+    save_filepath, wrote_save = write_folder_save(result, context, input_folder_filepath)
+    if wrote_save:
+        print(f"Successfully wrote save to {save_filepath}")
+
+SAVE_SUFFIXES = (".sav", ".saveram")
+BATCH_INPUT_SUFFIXES = (".txt",) + SAVE_SUFFIXES
+
+def find_batch_filepaths(input_pathnames):
+    input_filepaths = []
+
+    for input_pathname in input_pathnames:
+        input_path = pathlib.Path(input_pathname)
+        if input_path.is_dir():
+            input_filepaths.extend(sorted(filepath for filepath in input_path.iterdir() if filepath.suffix.casefold() in BATCH_INPUT_SUFFIXES))
+        elif glob.has_magic(input_pathname):
+            input_filepaths.extend(sorted(pathlib.Path(pathname) for pathname in glob.glob(input_pathname)))
+        else:
+            input_filepaths.append(input_path)
+
+    folder_filepaths = [filepath for filepath in input_filepaths if filepath.suffix.casefold() not in SAVE_SUFFIXES]
+    save_filepaths = [filepath for filepath in input_filepaths if filepath.suffix.casefold() in SAVE_SUFFIXES]
+    return folder_filepaths, save_filepaths
+
+# "warnings", "line_errors" and "folder_errors" are the messages for reading, "diagnostics" has everything
+def set_report_entry_diagnostics(report_entry, folder_diagnostics):
+    report_entry["ok"] = not diagnostics.has_errors(folder_diagnostics)
+    report_entry["warnings"] = diagnostics.get_warnings(folder_diagnostics)
+    if not report_entry["ok"]:
+        report_entry["line_errors"] = diagnostics.get_line_errors(folder_diagnostics)
+        report_entry["folder_errors"] = diagnostics.get_folder_errors(folder_diagnostics)
+    report_entry["diagnostics"] = [diagnostic.to_json() for diagnostic in folder_diagnostics]
+
+# returns None if the folder can't be read, with the error in report_entry
+def read_folder_file_for_report(folder_filepath, report_entry):
+    try:
+        with open(folder_filepath, "r") as f:
+            return f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        set_report_entry_diagnostics(report_entry, [diagnostics.error(diagnostics.CANNOT_READ_FOLDER, f"Cannot read folder: {e}")])
+        return None
+
+def check_folder_file_for_report(folder_filepath, context):
+    report_entry = {"folder": str(folder_filepath)}
+
+    folder_input_as_text = read_folder_file_for_report(folder_filepath, report_entry)
+    if folder_input_as_text is None:
+        return report_entry
+
+    validation = validate_folder_text(folder_input_as_text, context)
+    set_report_entry_diagnostics(report_entry, validation.diagnostics)
+    return report_entry
+
+def convert_folder_file_for_report(folder_filepath, context, fsync_policy=atomic_file.FSYNC_ALWAYS):
+    report_entry = {"folder": str(folder_filepath)}
+
+    folder_input_as_text = read_folder_file_for_report(folder_filepath, report_entry)
+    if folder_input_as_text is None:
+        return report_entry
+
+    result = convert_folder_text(folder_input_as_text, context)
+    set_report_entry_diagnostics(report_entry, result.diagnostics)
 
-    input_folder_or_save_filename = sys.argv[1]
+    if not result.has_errors:
+        if fsync_policy == atomic_file.FSYNC_BATCH:
+            # committed by whoever collects the report entries
+            save_filepath, temp_save_filepath = stage_folder_save(result, context, folder_filepath)
+            wrote_save = temp_save_filepath is not None
+            if wrote_save:
+                report_entry["staged_save"] = str(temp_save_filepath)
+        else:
+            save_filepath, wrote_save = write_folder_save(result, context, folder_filepath, fsync_policy == atomic_file.FSYNC_ALWAYS)
+
+        report_entry["save"] = str(save_filepath)
+        if not wrote_save:
+            set_report_entry_diagnostics(report_entry, result.diagnostics + [diagnostics.error(diagnostics.CANNOT_WRITE_SAVE, f"Cannot write to {save_filepath}")])
+
+    return report_entry
+
+def extract_save_file_for_report(save_filepath, output_root_dirpath, manifest=None):
+    report_entry = {"save": str(save_filepath)}
+
+    try:
+        output_text_folder_dirpath = extract_save_folders(save_filepath, output_root_dirpath=output_root_dirpath, verbose=False, manifest=manifest)
+    except (SaveError, OSError) as e:
+        report_entry["ok"] = False
+        report_entry["error"] = str(e)
+    else:
+        report_entry["ok"] = True
+        report_entry["output"] = str(output_text_folder_dirpath)
+
+    return report_entry
+
+# Worker processes get the context once when they start (inherited on fork, pickled on spawn)
+# instead of with every folder.
+worker_conversion_context = None
+worker_fsync_policy = atomic_file.FSYNC_ALWAYS
+
+def init_conversion_worker(context, fsync_policy):
+    global worker_conversion_context, worker_fsync_policy
+    worker_conversion_context = context
+    worker_fsync_policy = fsync_policy
+
+worker_extraction_manifest = None
+
+def init_extraction_worker(manifest):
+    global worker_extraction_manifest
+    worker_extraction_manifest = manifest
+
+def take_worker_suggestion_cache_changes():
+    if worker_conversion_context.suggestion_cache is not None:
+        return worker_conversion_context.suggestion_cache.take_changes()
+    else:
+        return None
+
+def convert_folder_file_in_worker(folder_filepath):
+    report_entry = convert_folder_file_for_report(folder_filepath, worker_conversion_context, worker_fsync_policy)
+    return report_entry, take_worker_suggestion_cache_changes()
+
+def check_folder_file_in_worker(folder_filepath):
+    report_entry = check_folder_file_for_report(folder_filepath, worker_conversion_context)
+    return report_entry, take_worker_suggestion_cache_changes()
+
+def convert_folder_text_in_worker(folder_input_as_text):
+    result = convert_folder_text(folder_input_as_text, worker_conversion_context)
+    return result, take_worker_suggestion_cache_changes()
+
+def extract_save_file_in_worker(save_filepath, output_root_dirpath):
+    report_entry = extract_save_file_for_report(save_filepath, output_root_dirpath, worker_extraction_manifest)
+    if worker_extraction_manifest is not None:
+        return report_entry, worker_extraction_manifest.take_changes()
+    else:
+        return report_entry, None
+
+# results come back in the same order as items no matter how many jobs are used
+def map_jobs(func, items, jobs, initializer=None, initargs=()):
+    if jobs <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        yield from map(func, items)
+    else:
+        chunksize = max(1, len(items) // (jobs * 4))
+        with multiprocessing.Pool(jobs, initializer, initargs) as pool:
+            yield from pool.imap(func, items, chunksize)
+
+def print_batch_progress(num_done, num_total, report_entry, filepath):
+    print(f"[{num_done}/{num_total}] {'OK' if report_entry['ok'] else 'FAILED'}: {filepath}")
+
+def commit_staged_saves(save_committer):
+    for save_filepath, report_entry, e in save_committer.commit():
+        print_save_write_error(save_filepath, e)
+        error_message = f"Cannot write to {save_filepath}: {e}"
+        report_entry["ok"] = False
+        report_entry["line_errors"] = []
+        report_entry["folder_errors"] = [error_message]
+        report_entry["diagnostics"].append(diagnostics.error(diagnostics.CANNOT_WRITE_SAVE, error_message).to_json())
+
+def convert_folders_to_saves(folder_filepaths, context, jobs=1, verbose=True, fsync_policy=atomic_file.FSYNC_BATCH):
+    if not context.saves_dirpath.is_dir():
+        print("Creating Tango saves directory!")
+        context.saves_dirpath.mkdir(parents=True, exist_ok=True)
+    else:
+        # left behind by a run that was killed before it could move them into place
+        atomic_file.remove_stale_temp_files(context.saves_dirpath)
+
+    report_entries = []
+    if fsync_policy == atomic_file.FSYNC_BATCH:
+        save_committer = atomic_file.BatchedFileCommitter()
+    else:
+        save_committer = None
+
+    try:
+        for num_done, (report_entry, suggestion_cache_changes) in enumerate(map_jobs(convert_folder_file_in_worker, folder_filepaths, jobs, init_conversion_worker, (context, fsync_policy)), 1):
+            if suggestion_cache_changes is not None:
+                context.suggestion_cache.apply_changes(suggestion_cache_changes)
+
+            temp_save_filepath = report_entry.pop("staged_save", None)
+            if temp_save_filepath is not None:
+                save_committer.add(temp_save_filepath, report_entry["save"], report_entry)
+                if save_committer.is_full():
+                    commit_staged_saves(save_committer)
+
+            if verbose:
+                print_batch_progress(num_done, len(folder_filepaths), report_entry, report_entry["folder"])
+            report_entries.append(report_entry)
+
+        if save_committer is not None:
+            commit_staged_saves(save_committer)
+    except BaseException:
+        # never leave a save half committed, the old one is still in place
+        if save_committer is not None:
+            save_committer.discard()
+        raise
+
+    if context.suggestion_cache is not None:
+        context.suggestion_cache.save()
+
+    return report_entries
+
+def check_folders(folder_filepaths, context, jobs=1, verbose=True):
+    report_entries = []
+
+    for num_done, (report_entry, suggestion_cache_changes) in enumerate(map_jobs(check_folder_file_in_worker, folder_filepaths, jobs, init_conversion_worker, (context, atomic_file.FSYNC_NEVER)), 1):
+        if suggestion_cache_changes is not None:
+            context.suggestion_cache.apply_changes(suggestion_cache_changes)
+        if verbose:
+            print_batch_progress(num_done, len(folder_filepaths), report_entry, report_entry["folder"])
+        report_entries.append(report_entry)
+
+    if context.suggestion_cache is not None:
+        context.suggestion_cache.save()
+
+    return report_entries
+
+# returns (report entry, (profile name, folder texts, warnings) or None if the save couldn't be read)
+def read_save_folder_texts_for_report(save_filepath):
+    report_entry = {"save": str(save_filepath)}
+
+    try:
+        profile, folder_texts, warnings = read_save_folder_texts(save_filepath)
+    except (SaveError, OSError) as e:
+        report_entry["ok"] = False
+        report_entry["error"] = str(e)
+        return report_entry, None
+
+    report_entry["ok"] = True
+    report_entry["num_folders"] = len(folder_texts)
+    return report_entry, (profile.name, folder_texts, warnings)
+
+# Like extract_saves_folders, but all the folders go to one folder_stream writer.
+def extract_saves_to_stream(save_filepaths, folder_writer, jobs=1, verbose=True):
+    report_entries = []
+
+    for num_done, (save_filepath, (report_entry, save_folder_texts)) in enumerate(zip(save_filepaths, map_jobs(read_save_folder_texts_for_report, save_filepaths, jobs)), 1):
+        if save_folder_texts is None:
+            folder_writer.write_save_error(save_filepath, report_entry["error"])
+        else:
+            profile_name, folder_texts, warnings = save_folder_texts
+            folder_writer.write_save_folders(save_filepath, game_profiles.GAME_PROFILES[profile_name], folder_texts, warnings)
+
+        if verbose:
+            print_batch_progress(num_done, len(save_filepaths), report_entry, report_entry["save"])
+        report_entries.append(report_entry)
+
+    return report_entries
+
+def load_extraction_manifest(output_root_dirpath):
+    manifest = extraction_manifest.ExtractionManifest(output_root_dirpath / extraction_manifest.EXTRACTION_MANIFEST_FILENAME)
+    manifest.load()
+    return manifest
+
+def extract_saves_folders(save_filepaths, output_root_dirpath, jobs=1, verbose=True, manifest=None):
+    report_entries = []
+
+    for num_done, (report_entry, manifest_changes) in enumerate(map_jobs(functools.partial(extract_save_file_in_worker, output_root_dirpath=output_root_dirpath), save_filepaths, jobs, init_extraction_worker, (manifest,)), 1):
+        if manifest_changes is not None:
+            manifest.apply_changes(manifest_changes)
+        if verbose:
+            print_batch_progress(num_done, len(save_filepaths), report_entry, report_entry["save"])
+        report_entries.append(report_entry)
+
+    if manifest is not None:
+        manifest.save()
+
+    return report_entries
+
+def write_batch_report(folder_report_entries, save_report_entries, profile, report_filepath, suggestion_cache=None, manifest=None):
+    num_succeeded = sum(1 for report_entry in folder_report_entries if report_entry["ok"])
+    num_extracted = sum(1 for report_entry in save_report_entries if report_entry["ok"])
+    report = {
+        "profile": profile.name,
+        "num_folders": len(folder_report_entries),
+        "num_succeeded": num_succeeded,
+        "num_failed": len(folder_report_entries) - num_succeeded,
+        "results": folder_report_entries,
+        "num_saves": len(save_report_entries),
+        "num_extracted": num_extracted,
+        "extractions": save_report_entries
+    }
+    report["diagnostic_counts"] = diagnostics.count_diagnostic_codes(folder_report_entries)
+    if suggestion_cache is not None:
+        report["suggestion_cache"] = suggestion_cache.get_stats()
+    if manifest is not None:
+        report["extraction_manifest"] = manifest.get_stats()
+
+    with open(report_filepath, "w+") as f:
+        json.dump(report, f, indent=2)
+
+    if len(folder_report_entries) != 0:
+        print(f"Converted {num_succeeded}/{len(folder_report_entries)} folders")
+    if len(save_report_entries) != 0:
+        print(f"Extracted {num_extracted}/{len(save_report_entries)} saves")
+    if manifest is not None and len(save_report_entries) != 0:
+        print(f"Skipped {manifest.num_unchanged + manifest.num_same_folders} unchanged saves, wrote {manifest.num_files_written} folder files")
+    if suggestion_cache is not None:
+        print(f"Suggestion cache: {suggestion_cache.hits} hits, {suggestion_cache.misses} misses ({suggestion_cache.hit_rate:.0%} hit rate)")
+    print(f"Wrote report to {report_filepath}")
+
+# folder_writer is a folder_stream writer for the extracted folders, instead of a directory per save
+def run_batch(input_pathnames, profile, report_filepath, jobs, fsync_policy=atomic_file.FSYNC_BATCH, folder_writer=None, verbose=True):
+    folder_filepaths, save_filepaths = find_batch_filepaths(input_pathnames)
+    if len(folder_filepaths) == 0 and len(save_filepaths) == 0:
+        error_pause_and_exit("No text folders or saves found!")
+
+    if len(folder_filepaths) != 0:
+        context = load_conversion_context(profile, suggestion_cache_filepath=get_suggestion_cache_filepath(profile))
+        folder_report_entries = convert_folders_to_saves(folder_filepaths, context, jobs, verbose, fsync_policy)
+        suggestion_cache = context.suggestion_cache
+    else:
+        folder_report_entries = []
+        suggestion_cache = None
+
+    if folder_writer is not None:
+        save_report_entries = extract_saves_to_stream(save_filepaths, folder_writer, jobs, verbose)
+        manifest = None
+    else:
+        output_root_dirpath = pathlib.Path(sys.argv[0]).parent
+        manifest = load_extraction_manifest(output_root_dirpath)
+        save_report_entries = extract_saves_folders(save_filepaths, output_root_dirpath, jobs, verbose, manifest)
+    write_batch_report(folder_report_entries, save_report_entries, profile, report_filepath, suggestion_cache, manifest)
+
+def write_check_report(report_entries, profile, report_filepath, suggestion_cache=None):
+    num_valid = sum(1 for report_entry in report_entries if report_entry["ok"])
+    report = {
+        "profile": profile.name,
+        "num_folders": len(report_entries),
+        "num_valid": num_valid,
+        "num_invalid": len(report_entries) - num_valid,
+        "results": report_entries,
+        "diagnostic_counts": diagnostics.count_diagnostic_codes(report_entries)
+    }
+    if suggestion_cache is not None:
+        report["suggestion_cache"] = suggestion_cache.get_stats()
+
+    with open(report_filepath, "w+") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"Checked {len(report_entries)} folders: {num_valid} valid, {len(report_entries) - num_valid} with errors")
+    print(f"Wrote report to {report_filepath}")
+
+# Validates folders against the chip tables without making saves, so neither the template
+# save nor Tango are needed.
+def run_check(input_pathnames, profile, report_filepath, jobs, diagnostics_format=DIAGNOSTICS_FORMAT_TEXT):
+    folder_filepaths, save_filepaths = find_batch_filepaths(input_pathnames)
+    if len(folder_filepaths) == 0:
+        error_pause_and_exit("No text folders found!")
+
+    context = load_validation_context(profile, get_suggestion_cache_filepath(profile))
+
+    if not is_batch_input(input_pathnames):
+        folder_filepath = folder_filepaths[0]
+        if not folder_filepath.is_file():
+            error_pause_and_exit(f"Provided folder \"{folder_filepath}\" does not exist!")
+
+        with open(folder_filepath, "r") as f:
+            folder_input_as_text = f.read()
+
+        validation = validate_folder_text(folder_input_as_text, context)
+        context.suggestion_cache.save()
+        print_folder_diagnostics(validation.diagnostics, diagnostics_format)
+        if diagnostics_format == DIAGNOSTICS_FORMAT_TEXT:
+            print(f"{folder_filepath.name} is valid!")
+    else:
+        report_entries = check_folders(folder_filepaths, context, jobs)
+        write_check_report(report_entries, profile, report_filepath, context.suggestion_cache)
+
+def run_batch_to_stream(input_pathnames, profile, report_filepath, jobs, output_pathname, fsync_policy=atomic_file.FSYNC_BATCH, verbose=True):
+    folder_writer = folder_stream.open_folder_writer(output_pathname)
+    if output_pathname == folder_stream.STDOUT_PATHNAME:
+        # only the folders go to stdout
+        output_redirect = contextlib.redirect_stdout(sys.stderr)
+    else:
+        output_redirect = contextlib.nullcontext()
+
+    try:
+        with output_redirect:
+            run_batch(input_pathnames, profile, report_filepath, jobs, fsync_policy, folder_writer, verbose)
+    finally:
+        folder_writer.close()
+
+# what a converted folder changes in a save, as (offset, unmasked bytes)
+def get_folder_stamp_edits(result, profile):
+    save_data = result.save_data
+    navi_id = result.navi_id
+    edits = []
+
+    if profile.has_navi_line:
+        edits.append((profile.navi_id_offset, bytes(save_data[profile.navi_id_offset:profile.navi_id_offset+1])))
+
+    folder_offset = profile.get_folder_offset(navi_id)
+    edits.append((folder_offset, bytes(save_data[folder_offset:folder_offset+game_profiles.FOLDER_STRUCT.size])))
+
+    if profile.reg_structure_offset is not None:
+        reg_offset = profile.get_reg_offset(navi_id)
+        edits.append((reg_offset, bytes(save_data[reg_offset:reg_offset+1])))
+
+    return edits
+
+# Edits the save file in place through mmap, so only the folder's pages are touched.
+# Returns whether anything changed.
+def stamp_save_file(save_filepath, edits, profile):
+    with open(save_filepath, "r+b") as f:
+        if os.fstat(f.fileno()).st_size < profile.sram_start_offset + profile.save_size:
+            raise SaveError(f"Save isn't {profile.display_name}!")
+
+        with mmap.mmap(f.fileno(), 0) as raw_save_mmap:
+            save_profile = game_profiles.detect_save_profile(raw_save_mmap)
+            if save_profile is None or save_profile.get_save_layout() != profile.get_save_layout():
+                raise SaveError(f"Save isn't {profile.display_name}!")
+
+            # the checksum is patched by difference, so a bad checksum has to be caught before stamping
+            save_data = bytearray(raw_save_mmap[profile.sram_start_offset:profile.sram_start_offset + profile.save_size])
+            mask_save(save_data, profile)
+            checksum, expected_checksum = calc_checksum_and_expected_checksum(save_data, profile)
+            if checksum != expected_checksum:
+                raise SaveError(f"Save has incorrect checksum (save potentially corrupted)! Expected: 0x{expected_checksum:08x}, Actual: 0x{checksum:08x}.")
+
+            changed_ranges = save_codec.patch_masked_save(raw_save_mmap, profile.sram_start_offset, profile.mask_offset, profile.checksum_offset, edits)
+            save_codec.flush_mmap_ranges(raw_save_mmap, changed_ranges)
+
+    return len(changed_ranges) != 0
+
+def stamp_save_file_for_report(save_filepath, edits, profile):
+    report_entry = {"save": str(save_filepath)}
+
+    try:
+        changed = stamp_save_file(save_filepath, edits, profile)
+    except (SaveError, OSError, ValueError) as e:
+        report_entry["ok"] = False
+        report_entry["error"] = str(e)
+    else:
+        report_entry["ok"] = True
+        report_entry["changed"] = changed
+
+    return report_entry
+
+def run_stamp(folder_filename, input_pathnames, profile):
+    folder_filepath = pathlib.Path(folder_filename)
+    if not folder_filepath.is_file():
+        error_pause_and_exit(f"Provided folder \"{folder_filename}\" does not exist!")
+
+    folder_filepaths, save_filepaths = find_batch_filepaths(input_pathnames)
+    if len(save_filepaths) == 0:
+        error_pause_and_exit("No saves to stamp found!")
+
+    # stamped saves are edited in place, so Tango's saves folder isn't needed
+    context = load_conversion_context(profile, folder_filepath.parent)
+
+    with open(folder_filepath, "r") as f:
+        folder_input_as_text = f.read()
+
+    result = convert_folder_text(folder_input_as_text, context)
+    for warning in result.warnings:
+        print(warning)
+
+    if result.has_errors:
+        error_pause_and_exit(result.render_error_message())
+
+    edits = get_folder_stamp_edits(result, profile)
+    num_changed = 0
+    num_failed = 0
+
+    for num_done, save_filepath in enumerate(save_filepaths, 1):
+        report_entry = stamp_save_file_for_report(save_filepath, edits, profile)
+        print_batch_progress(num_done, len(save_filepaths), report_entry, save_filepath)
+        if not report_entry["ok"]:
+            print(f"    {report_entry['error']}")
+            num_failed += 1
+        elif report_entry["changed"]:
+            num_changed += 1
+
+    print(f"Stamped {folder_filepath.name}: {num_changed} saves changed, {len(save_filepaths) - num_changed - num_failed} already had it, {num_failed} failed")
+
+def is_batch_input(input_pathnames):
+    return len(input_pathnames) > 1 or pathlib.Path(input_pathnames[0]).is_dir() or glob.has_magic(input_pathnames[0])
+
+# context and output_root_dirpath are for a server that keeps the conversion context loaded
+def run_single(input_folder_or_save_filename, profile, context=None, output_root_dirpath=None, diagnostics_format=DIAGNOSTICS_FORMAT_TEXT):
     input_folder_or_save_filepath = pathlib.Path(input_folder_or_save_filename)
     input_suffix = input_folder_or_save_filepath.suffix.casefold()
-    input_is_save = input_suffix in (".sav", ".saveram")
+    input_is_save = input_suffix in SAVE_SUFFIXES
 
     if not input_folder_or_save_filepath.is_file():
         if input_is_save:
@@ -706,11 +1344,56 @@ def main():
             error_pause_and_exit(f"Provided folder \"{input_folder_or_save_filename}\" does not exist!")            
 
     if input_is_save:
-        extract_save_folders(input_folder_or_save_filepath)
+        extract_save_folders(input_folder_or_save_filepath, output_root_dirpath=output_root_dirpath)
     else:
-        convert_folder_to_save(input_folder_or_save_filepath)
+        convert_folder_to_save(input_folder_or_save_filepath, profile, context, diagnostics_format)
+
+def main(profile=game_profiles.DEFAULT_PROFILE):
+    ap = argparse.ArgumentParser(allow_abbrev=False)
+    ap.add_argument("inputs", nargs="*", help="Text folder or save to convert. Multiple text folders, directories or globs of text folders are converted in one batch.")
+    ap.add_argument("--report", dest="report_filename", default="batch_report.json", help="Where to write the JSON report of a batch conversion (default: batch_report.json)")
+    ap.add_argument("-j", "--jobs", dest="jobs", type=int, default=1, help="Number of processes to use for batch conversion. 0 uses all CPUs. (default: 1)")
+    ap.add_argument("--check", dest="check", action="store_true", help="Only check the text folders for errors, without making saves.")
+    ap.add_argument("--format", dest="diagnostics_format", choices=DIAGNOSTICS_FORMATS, default=DIAGNOSTICS_FORMAT_TEXT, help="How to print the errors in a single folder: text, or one JSON object with structured diagnostics (default: text)")
+    ap.add_argument("--stamp", dest="stamp_folder_filename", default=None, help="Write this text folder into every save given as input, editing the saves in place.")
+    ap.add_argument("--fsync", dest="fsync_policy", choices=atomic_file.FSYNC_POLICIES, default=atomic_file.FSYNC_BATCH, help=f"When a batch conversion flushes saves to disk: after every save (always), every {atomic_file.DEFAULT_FSYNC_BATCH_SIZE} saves (batch) or when the OS decides to (never). Saves are replaced atomically either way. (default: batch)")
+    ap.add_argument("--extract-to", dest="extract_output_pathname", default=None, help="Put the folders of all saves given as input into this one file instead of a directory per save: JSON lines, or a tar archive if it ends in .tar. - writes JSON lines to stdout.")
+    ap.add_argument("-q", "--quiet", dest="quiet", action="store_true", help="Don't print a line for every file in a batch.")
+    ap.add_argument("--serve", dest="serve", action="store_true", help="Keep running and convert or extract files sent by folder_client, which skips loading the program for every file.")
+    ap.add_argument("--port", dest="port", type=int, default=None, help="Port for --serve to listen on (localhost only)")
+    args = ap.parse_args()
+
+    if args.serve:
+        # imported here since the server imports this module
+        import folder_server
+        if args.port is not None:
+            folder_server.run_server(profile, args.port)
+        else:
+            folder_server.run_server(profile)
+        return
+
+    if len(args.inputs) == 0:
+        error_pause_and_exit(HELP_MESSAGE)
+
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count()
+
+    try:
+        if args.check:
+            run_check(args.inputs, profile, pathlib.Path(args.report_filename), jobs, args.diagnostics_format)
+        elif args.stamp_folder_filename is not None:
+            run_stamp(args.stamp_folder_filename, args.inputs, profile)
+        elif args.extract_output_pathname is not None:
+            run_batch_to_stream(args.inputs, profile, pathlib.Path(args.report_filename), jobs, args.extract_output_pathname, args.fsync_policy, not args.quiet)
+        elif is_batch_input(args.inputs):
+            run_batch(args.inputs, profile, pathlib.Path(args.report_filename), jobs, args.fsync_policy, verbose=not args.quiet)
+        else:
+            run_single(args.inputs[0], profile, diagnostics_format=args.diagnostics_format)
+    except SaveError as e:
+        error_pause_and_exit(str(e))
 
-    print("Done!")
+    if args.diagnostics_format == DIAGNOSTICS_FORMAT_TEXT and args.extract_output_pathname != folder_stream.STDOUT_PATHNAME:
+        print("Done!")
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
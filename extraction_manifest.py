@@ -0,0 +1,147 @@
+# =============================================================================
+# MIT License
+# 
+# Copyright (c) 2022 luckytyphlosion
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# =============================================================================
+
+# Remembers what each save looked like the last time its folders were extracted, so that
+# re-extracting a directory of saves only reads the saves that changed and only rewrites
+# the folder files whose text changed.
+
+import hashlib
+import json
+import os
+import time
+import atomic_file
+
+EXTRACTION_MANIFEST_FILENAME = "extraction_manifest.json"
+EXTRACTION_MANIFEST_VERSION = 1
+
+# A save written this close to when it was recorded could still change without its
+# size or mtime changing (mtimes are coarse on some filesystems), so its stat isn't trusted.
+RACY_MTIME_NS = 2 * 1000000000
+
+def hash_bytes(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def hash_text(text):
+    return hash_bytes(text.encode("utf-8"))
+
+def get_save_key(save_filepath):
+    return os.path.abspath(save_filepath)
+
+def make_stat_fields(stat_result):
+    if time.time_ns() - stat_result.st_mtime_ns < RACY_MTIME_NS:
+        mtime_ns = None
+    else:
+        mtime_ns = stat_result.st_mtime_ns
+
+    return {"size": stat_result.st_size, "mtime_ns": mtime_ns}
+
+def is_stat_unchanged(entry, stat_result):
+    return entry["mtime_ns"] is not None and entry["mtime_ns"] == stat_result.st_mtime_ns and entry["size"] == stat_result.st_size
+
+# An entry is {"size", "mtime_ns", "profile", "tables", "region_hash", "folder_hashes": {navi name: text hash}}.
+# tables identifies the chip and navi names the folder text was made with, and region_hash is
+# the hash of the save's folders and regs as they are in the file.
+class ExtractionManifest:
+    __slots__ = ("filepath", "entries", "new_entries", "num_unchanged", "num_same_folders", "num_extracted", "num_files_written", "dirty")
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.entries = {}
+        self.new_entries = []
+        self.num_unchanged = 0
+        self.num_same_folders = 0
+        self.num_extracted = 0
+        self.num_files_written = 0
+        self.dirty = False
+
+    def load(self):
+        try:
+            with open(self.filepath, "r") as f:
+                manifest_json = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if not isinstance(manifest_json, dict) or manifest_json.get("version") != EXTRACTION_MANIFEST_VERSION:
+            return
+
+        self.entries = manifest_json["saves"]
+        self.dirty = False
+
+    def save(self):
+        if not self.dirty:
+            return
+
+        manifest_json = {
+            "version": EXTRACTION_MANIFEST_VERSION,
+            "saves": self.entries
+        }
+
+        try:
+            atomic_file.write_file_atomic(self.filepath, json.dumps(manifest_json).encode("utf-8"), fsync=False)
+        except OSError:
+            # the next run just extracts everything again
+            return
+
+        self.dirty = False
+
+    def get(self, save_key):
+        return self.entries.get(save_key)
+
+    def store(self, save_key, entry):
+        self.entries[save_key] = entry
+        self.dirty = True
+
+    def add(self, save_key, entry):
+        self.store(save_key, entry)
+        self.new_entries.append((save_key, entry))
+
+    # Batch workers each have their own copy of the manifest, so they send back what changed
+    # and the main process applies it to its copy.
+    def take_changes(self):
+        changes = (self.new_entries, self.num_unchanged, self.num_same_folders, self.num_extracted, self.num_files_written)
+        self.new_entries = []
+        self.num_unchanged = 0
+        self.num_same_folders = 0
+        self.num_extracted = 0
+        self.num_files_written = 0
+        return changes
+
+    def apply_changes(self, changes):
+        new_entries, num_unchanged, num_same_folders, num_extracted, num_files_written = changes
+        for save_key, entry in new_entries:
+            self.store(save_key, entry)
+
+        self.num_unchanged += num_unchanged
+        self.num_same_folders += num_same_folders
+        self.num_extracted += num_extracted
+        self.num_files_written += num_files_written
+
+    def get_stats(self):
+        return {
+            "unchanged": self.num_unchanged,
+            "same_folders": self.num_same_folders,
+            "extracted": self.num_extracted,
+            "files_written": self.num_files_written,
+            "size": len(self.entries)
+        }
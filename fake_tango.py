@@ -0,0 +1,95 @@
+# =============================================================================
+# MIT License
+# 
+# Copyright (c) 2022 luckytyphlosion
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# =============================================================================
+
+# Stands in for the tango.exe replay commands chip_usage uses, so replay extraction can be
+# tried and benchmarked without Tango or real replays. Replays are made with write_fake_replay.
+#
+# usage: fake_tango.py <replay> wram
+#        fake_tango.py <replay> metadata
+#        fake_tango.py <replay> invert <output replay>
+#
+# FAKE_TANGO_DELAY (in seconds) is slept before every command, like the time tango takes
+# to play back the match.
+
+import json
+import os
+import struct
+import sys
+import time
+
+FAKE_REPLAY_MAGIC = b"FKTANGO1"
+# magic, metadata size, local wram size, remote wram size
+FAKE_REPLAY_HEADER_STRUCT = struct.Struct("<8sIII")
+FAKE_TANGO_DELAY_ENV_VAR = "FAKE_TANGO_DELAY"
+
+# metadata is like tango's: {"ts": ..., "local_side": {...}, "remote_side": {...}}
+def write_fake_replay(replay_filepath, metadata, local_wram, remote_wram):
+    metadata_data = json.dumps(metadata).encode("utf-8")
+    with open(replay_filepath, "wb+") as f:
+        f.write(FAKE_REPLAY_HEADER_STRUCT.pack(FAKE_REPLAY_MAGIC, len(metadata_data), len(local_wram), len(remote_wram)))
+        f.write(metadata_data)
+        f.write(local_wram)
+        f.write(remote_wram)
+
+def read_fake_replay(replay_filepath):
+    with open(replay_filepath, "rb") as f:
+        replay_data = f.read()
+
+    magic, metadata_size, local_wram_size, remote_wram_size = FAKE_REPLAY_HEADER_STRUCT.unpack_from(replay_data)
+    if magic != FAKE_REPLAY_MAGIC:
+        raise ValueError(f"{replay_filepath} isn't a fake replay!")
+
+    metadata_start = FAKE_REPLAY_HEADER_STRUCT.size
+    local_wram_start = metadata_start + metadata_size
+    remote_wram_start = local_wram_start + local_wram_size
+    metadata = json.loads(replay_data[metadata_start:local_wram_start])
+    return metadata, replay_data[local_wram_start:remote_wram_start], replay_data[remote_wram_start:remote_wram_start+remote_wram_size]
+
+def invert_fake_replay(replay_filepath, inverted_replay_filepath):
+    metadata, local_wram, remote_wram = read_fake_replay(replay_filepath)
+    inverted_metadata = dict(metadata, local_side=metadata["remote_side"], remote_side=metadata["local_side"])
+    write_fake_replay(inverted_replay_filepath, inverted_metadata, remote_wram, local_wram)
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[2] not in ("wram", "metadata", "invert") or sys.argv[2] == "invert" and len(sys.argv) < 4:
+        print("usage: fake_tango.py <replay> wram|metadata|invert <output replay>", file=sys.stderr)
+        sys.exit(1)
+
+    delay = float(os.environ.get(FAKE_TANGO_DELAY_ENV_VAR, "0"))
+    if delay > 0:
+        time.sleep(delay)
+
+    replay_filename = sys.argv[1]
+    command = sys.argv[2]
+    if command == "invert":
+        invert_fake_replay(replay_filename, sys.argv[3])
+    else:
+        metadata, local_wram, remote_wram = read_fake_replay(replay_filename)
+        if command == "wram":
+            sys.stdout.buffer.write(local_wram)
+        else:
+            sys.stdout.buffer.write(json.dumps(metadata).encode("utf-8"))
+
+if __name__ == "__main__":
+    main()
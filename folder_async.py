@@ -0,0 +1,168 @@
+# =============================================================================
+# MIT License
+# 
+# Copyright (c) 2022 luckytyphlosion
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# =============================================================================
+
+# Asyncio front end for validating and converting folders, e.g. for a chat bot checking
+# folders people paste. Name matching runs in an executor so the event loop stays free, and
+# saves are written from threads, since asyncio has no non-blocking file I/O of its own.
+#
+# serve() speaks JSON lines over TCP on localhost. Each request is a line like
+#   {"id": 1, "folder": "<folder text>", "save": "<optional save filename>"}
+# and gets a line back with the same id, in whatever order the requests finish.
+
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import pathlib
+
+import edit_folder
+import diagnostics
+import game_profiles
+import atomic_file
+
+DEFAULT_ASYNC_SERVER_PORT = 47046
+MAX_REQUEST_LINE_SIZE = 1 << 20
+
+class AsyncFolderService:
+    __slots__ = ("context", "jobs", "executor")
+
+    def __init__(self, context, jobs=1):
+        self.context = context
+        self.jobs = jobs
+        if jobs <= 1:
+            # a single thread, so conversions never touch the suggestion cache at the same time
+            self.executor = concurrent.futures.ThreadPoolExecutor(1)
+        else:
+            self.executor = concurrent.futures.ProcessPoolExecutor(jobs, initializer=edit_folder.init_conversion_worker, initargs=(context, atomic_file.FSYNC_ALWAYS))
+
+    async def validate(self, folder_input_as_text):
+        loop = asyncio.get_running_loop()
+        if self.jobs <= 1:
+            return await loop.run_in_executor(self.executor, edit_folder.convert_folder_text, folder_input_as_text, self.context)
+
+        result, suggestion_cache_changes = await loop.run_in_executor(self.executor, edit_folder.convert_folder_text_in_worker, folder_input_as_text)
+        if suggestion_cache_changes is not None:
+            self.context.suggestion_cache.apply_changes(suggestion_cache_changes)
+
+        return result
+
+    async def write_save(self, result, save_filepath, fsync=True):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, edit_folder.write_save_to_file, result.save_data, save_filepath, self.context.profile, result.checksum_tracker, fsync)
+
+    # save_filename is only a filename, the save goes in the Tango saves directory
+    async def convert(self, folder_input_as_text, save_filename=None):
+        result = await self.validate(folder_input_as_text)
+        report_entry = {}
+        edit_folder.set_report_entry_diagnostics(report_entry, result.diagnostics)
+
+        if result.has_errors:
+            report_entry["message"] = result.render_error_message()
+        elif save_filename is not None:
+            save_filepath = self.context.saves_dirpath / pathlib.Path(save_filename).with_suffix(".sav").name
+            wrote_save = await self.write_save(result, save_filepath)
+            report_entry["save"] = str(save_filepath)
+            if not wrote_save:
+                edit_folder.set_report_entry_diagnostics(report_entry, result.diagnostics + [diagnostics.error(diagnostics.CANNOT_WRITE_SAVE, f"Cannot write to {save_filepath}")])
+
+        return report_entry
+
+    def close(self):
+        self.executor.shutdown()
+        if self.context.suggestion_cache is not None:
+            self.context.suggestion_cache.save()
+
+async def handle_request(service, request_json, writer):
+    try:
+        response_json = await service.convert(request_json["folder"], request_json.get("save"))
+    except Exception as e:
+        response_json = {"ok": False, "folder_errors": [f"Internal error: {e}"]}
+
+    response_json["id"] = request_json.get("id")
+    writer.write(json.dumps(response_json).encode("utf-8") + b"\n")
+    try:
+        await writer.drain()
+    except ConnectionError:
+        pass
+
+async def handle_connection(service, reader, writer):
+    request_tasks = set()
+
+    try:
+        while True:
+            try:
+                request_line = await reader.readline()
+            except (ValueError, ConnectionError):
+                break
+            if len(request_line) == 0:
+                break
+
+            try:
+                request_json = json.loads(request_line)
+                if not isinstance(request_json, dict) or not isinstance(request_json.get("folder"), str):
+                    raise ValueError("Request must be an object with a \"folder\" string")
+            except ValueError as e:
+                # also hangs up on anything that isn't talking this protocol, like a web page
+                # posting to the port, before it gets to send a body
+                writer.write(json.dumps({"ok": False, "folder_errors": [f"Bad request: {e}"]}).encode("utf-8") + b"\n")
+                break
+
+            request_task = asyncio.create_task(handle_request(service, request_json, writer))
+            request_tasks.add(request_task)
+            request_task.add_done_callback(request_tasks.discard)
+
+        if len(request_tasks) != 0:
+            await asyncio.wait(request_tasks)
+        await writer.drain()
+    finally:
+        writer.close()
+
+async def serve(service, port=DEFAULT_ASYNC_SERVER_PORT, started_callback=None):
+    server = await asyncio.start_server(lambda reader, writer: handle_connection(service, reader, writer), "127.0.0.1", port, limit=MAX_REQUEST_LINE_SIZE)
+    async with server:
+        if started_callback is not None:
+            started_callback(server)
+        await server.serve_forever()
+
+def main():
+    ap = argparse.ArgumentParser(allow_abbrev=False)
+    ap.add_argument("--profile", dest="profile_name", choices=game_profiles.CONVERTIBLE_PROFILES.keys(), default=game_profiles.DEFAULT_PROFILE.name, help="Game to convert folders for")
+    ap.add_argument("--port", dest="port", type=int, default=DEFAULT_ASYNC_SERVER_PORT, help=f"Port to listen on (localhost only, default: {DEFAULT_ASYNC_SERVER_PORT})")
+    ap.add_argument("-j", "--jobs", dest="jobs", type=int, default=1, help="Number of processes to convert folders with (default: 1)")
+    args = ap.parse_args()
+
+    profile = game_profiles.CONVERTIBLE_PROFILES[args.profile_name]
+    context = edit_folder.load_conversion_context(profile, suggestion_cache_filepath=edit_folder.get_suggestion_cache_filepath(profile))
+    service = AsyncFolderService(context, args.jobs)
+
+    print(f"Validating {profile.display_name} folders on 127.0.0.1:{args.port}. Press Ctrl+C to stop.")
+    try:
+        asyncio.run(serve(service, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# =============================================================================
+# MIT License
+# 
+# Copyright (c) 2022 luckytyphlosion
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# =============================================================================
+
+# Thin client for folder_server. Dragging a file onto this converts or extracts it with a running
+# server, which already has everything loaded. If no server is running, it does the work itself.
+# Only imports what it needs to talk to the server, so it starts quickly.
+
+import json
+import multiprocessing
+import pathlib
+import socket
+import sys
+
+import game_profiles
+
+SERVER_HOST = "127.0.0.1"
+DEFAULT_SERVER_PORT = 47045
+SERVER_PROTOCOL_VERSION = 1
+# Browsers can't send custom headers to another site without a CORS preflight, which the server
+# never answers, so requiring this keeps web pages from using the server.
+SERVER_REQUEST_HEADER = "X-Folder-Editor-Version"
+SERVER_CONNECT_TIMEOUT = 0.5
+
+# Speaks just enough HTTP to talk to folder_server, since http.client takes longer to import
+# than the server takes to convert a folder. Returns (status, body).
+def post_json(port, path, request_json):
+    request_body = json.dumps(request_json).encode("utf-8")
+    request_head = (
+        f"POST {path} HTTP/1.0\r\n"
+        f"Host: {SERVER_HOST}:{port}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(request_body)}\r\n"
+        f"{SERVER_REQUEST_HEADER}: {SERVER_PROTOCOL_VERSION}\r\n"
+        "\r\n"
+    ).encode("ascii")
+
+    with socket.create_connection((SERVER_HOST, port), timeout=SERVER_CONNECT_TIMEOUT) as server_socket:
+        # conversions can take longer than connecting
+        server_socket.settimeout(None)
+        server_socket.sendall(request_head + request_body)
+        response_chunks = []
+        while True:
+            response_chunk = server_socket.recv(65536)
+            if len(response_chunk) == 0:
+                break
+            response_chunks.append(response_chunk)
+
+    response_head, separator, response_body = b"".join(response_chunks).partition(b"\r\n\r\n")
+    status = int(response_head.split(b" ", 2)[1])
+    return status, response_body
+
+# Returns (exit code, output), or None if there's no server for the profile.
+def request_run_single(input_filename, profile, output_root_dirpath, port=DEFAULT_SERVER_PORT):
+    request_json = {
+        "profile": profile.name,
+        "input": str(pathlib.Path(input_filename).absolute()),
+        "output_root": str(pathlib.Path(output_root_dirpath).absolute())
+    }
+
+    try:
+        status, response_body = post_json(port, "/run", request_json)
+    except (OSError, ValueError, IndexError):
+        return None
+
+    if status != 200:
+        return None
+
+    response_json = json.loads(response_body)
+    return response_json["exit_code"], response_json["output"]
+
+def main(profile=game_profiles.DEFAULT_PROFILE):
+    # anything other than a single dragged file goes straight to the full program
+    if len(sys.argv) == 2 and not sys.argv[1].startswith("-"):
+        result = request_run_single(sys.argv[1], profile, pathlib.Path(sys.argv[0]).parent)
+    else:
+        result = None
+
+    if result is None:
+        import edit_folder
+        edit_folder.main(profile)
+        return
+
+    exit_code, output = result
+    print(output, end="")
+    if exit_code != 0:
+        sys.exit(exit_code)
+
+    print("Done!")
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
@@ -0,0 +1,114 @@
+# =============================================================================
+# MIT License
+# 
+# Copyright (c) 2022 luckytyphlosion
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# =============================================================================
+
+import array
+import sys
+
+import game_profiles
+
+# Each folder slot is a little endian u16: the chip id in the low 9 bits and the code in the top 7.
+# The slots are split into their low and high bytes with strided slices, and the high bytes are
+# mapped to codes and to the top bit of the chip id with translate tables, so decoding does no
+# per-slot Python work.
+
+CHIP_ID_HIGH_BIT_TABLE = bytes(i & 1 for i in range(256))
+CHIP_CODE_TABLE = bytes(i >> 1 for i in range(256))
+ALL_CHIP_CODES = "ABCDEFGHIJKLMNOPQRSTUVWXYZ*"
+
+class DecodedFolders:
+    __slots__ = ("first_navi_id", "num_navis", "chip_ids", "chip_codes_as_nums")
+
+    # chip_ids is an array('H') and chip_codes_as_nums is bytes, both with NUM_FOLDER_CHIPS entries per navi
+    def __init__(self, first_navi_id, num_navis, chip_ids, chip_codes_as_nums):
+        self.first_navi_id = first_navi_id
+        self.num_navis = num_navis
+        self.chip_ids = chip_ids
+        self.chip_codes_as_nums = chip_codes_as_nums
+
+    def get_folder_start(self, navi_id):
+        if not (self.first_navi_id <= navi_id < self.first_navi_id + self.num_navis):
+            raise IndexError(f"Navi {navi_id} wasn't decoded!")
+
+        return (navi_id - self.first_navi_id) * game_profiles.NUM_FOLDER_CHIPS
+
+    def get_folder(self, navi_id):
+        folder_start = self.get_folder_start(navi_id)
+        folder_end = folder_start + game_profiles.NUM_FOLDER_CHIPS
+        return self.chip_ids[folder_start:folder_end], self.chip_codes_as_nums[folder_start:folder_end]
+
+def decode_folders(save_data, profile, first_navi_id=0, num_navis=1):
+    folders_start = profile.get_folder_offset(first_navi_id)
+    folders_end = folders_start + game_profiles.FOLDER_STRUCT.size * num_navis
+    if folders_end > len(save_data):
+        raise ValueError(f"Folders of navis {first_navi_id}-{first_navi_id + num_navis - 1} are past the end of the save!")
+
+    with memoryview(save_data) as save_data_view:
+        low_bytes = bytes(save_data_view[folders_start:folders_end:2])
+        high_bytes = bytes(save_data_view[folders_start+1:folders_end:2])
+
+    chip_ids_as_bytes = bytearray(len(low_bytes) * 2)
+    chip_ids_as_bytes[0::2] = low_bytes
+    chip_ids_as_bytes[1::2] = high_bytes.translate(CHIP_ID_HIGH_BIT_TABLE)
+    chip_ids = array.array("H")
+    chip_ids.frombytes(chip_ids_as_bytes)
+    if sys.byteorder != "little":
+        chip_ids.byteswap()
+
+    return DecodedFolders(first_navi_id, num_navis, chip_ids, high_bytes.translate(CHIP_CODE_TABLE))
+
+def is_valid_chip_code_as_num(chip_code_as_num):
+    return chip_code_as_num < len(ALL_CHIP_CODES)
+
+def format_chip_code(chip_code_as_num):
+    if is_valid_chip_code_as_num(chip_code_as_num):
+        return ALL_CHIP_CODES[chip_code_as_num]
+    else:
+        return f"Code_0x{chip_code_as_num:x}"
+
+# indexed by code as num, covers all 7 bits
+CHIP_CODE_STRS = tuple(format_chip_code(chip_code_as_num) for chip_code_as_num in range(0x80))
+
+def chip_code_to_num(chip_code):
+    chip_code_as_num = ALL_CHIP_CODES.find(chip_code.upper())
+    if chip_code_as_num == -1:
+        raise ValueError(f"Invalid chip code {chip_code}!")
+
+    return chip_code_as_num
+
+# Writes a whole folder (and the reg, unless reg_slot is None) in one pack.
+# chip_ids and chip_codes_as_nums must have NUM_FOLDER_CHIPS entries each.
+def encode_folder(save_data, profile, navi_id, chip_ids, chip_codes_as_nums, reg_slot=None, checksum_tracker=None):
+    if len(chip_ids) != game_profiles.NUM_FOLDER_CHIPS or len(chip_codes_as_nums) != game_profiles.NUM_FOLDER_CHIPS:
+        raise ValueError(f"Folder must have {game_profiles.NUM_FOLDER_CHIPS} chips!")
+
+    folder_offset = profile.get_folder_offset(navi_id)
+    game_profiles.FOLDER_STRUCT.pack_into(save_data, folder_offset, *[chip_id | chip_code_as_num << 9 for chip_id, chip_code_as_num in zip(chip_ids, chip_codes_as_nums)])
+    if checksum_tracker is not None:
+        checksum_tracker.mark_dirty(folder_offset, folder_offset + game_profiles.FOLDER_STRUCT.size)
+
+    if reg_slot is not None and profile.reg_structure_offset is not None:
+        reg_offset = profile.get_reg_offset(navi_id)
+        save_data[reg_offset] = reg_slot
+        if checksum_tracker is not None:
+            checksum_tracker.mark_dirty(reg_offset, reg_offset + 1)
@@ -0,0 +1,117 @@
+# =============================================================================
+# MIT License
+# 
+# Copyright (c) 2022 luckytyphlosion
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# =============================================================================
+
+# Keeps the chip tables, template save and name matchers loaded and converts or extracts
+# whatever folder_client sends it, so a conversion doesn't pay for starting up the program.
+# Only listens on localhost. Requests are handled one at a time, in the order they arrive.
+
+import contextlib
+import http.server
+import io
+import json
+import pathlib
+
+import edit_folder
+import folder_client
+
+class FolderEditorServer(http.server.HTTPServer):
+    def __init__(self, port, profile, context, verbose=False):
+        super().__init__((folder_client.SERVER_HOST, port), FolderEditorRequestHandler)
+        self.profile = profile
+        self.context = context
+        self.verbose = verbose
+
+    # Does what running the program on the file would do, returns (exit code, printed output)
+    def run_single(self, input_filename, output_root_dirpath):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            try:
+                edit_folder.run_single(input_filename, self.profile, self.context, output_root_dirpath)
+                exit_code = 0
+            except SystemExit as e:
+                exit_code = e.code
+            except edit_folder.SaveError as e:
+                print(f"{e}\n")
+                exit_code = 1
+
+        return exit_code, output.getvalue()
+
+class FolderEditorRequestHandler(http.server.BaseHTTPRequestHandler):
+    # the headers and body are sent separately, don't let the body wait for an ack
+    disable_nagle_algorithm = True
+
+    def send_json(self, status, response_json):
+        response_body = json.dumps(response_json).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response_body)))
+        self.end_headers()
+        self.wfile.write(response_body)
+
+    def do_POST(self):
+        if self.path != "/run":
+            self.send_json(404, {"error": f"Unknown endpoint {self.path}"})
+            return
+
+        if self.headers.get(folder_client.SERVER_REQUEST_HEADER) != str(folder_client.SERVER_PROTOCOL_VERSION):
+            self.send_json(403, {"error": f"Missing or unsupported {folder_client.SERVER_REQUEST_HEADER}"})
+            return
+
+        try:
+            request_json = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            profile_name = request_json["profile"]
+            input_filename = request_json["input"]
+            output_root_dirpath = pathlib.Path(request_json["output_root"])
+        except (ValueError, KeyError, TypeError) as e:
+            self.send_json(400, {"error": f"Bad request: {e}"})
+            return
+
+        server = self.server
+        if profile_name != server.profile.name:
+            self.send_json(409, {"error": f"Server is for {server.profile.name}, not {profile_name}"})
+            return
+
+        exit_code, output = server.run_single(input_filename, output_root_dirpath)
+        self.send_json(200, {"exit_code": exit_code, "output": output})
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+def run_server(profile, port=folder_client.DEFAULT_SERVER_PORT, verbose=False):
+    context = edit_folder.load_conversion_context(profile, suggestion_cache_filepath=edit_folder.get_suggestion_cache_filepath(profile))
+    edit_folder.load_extraction_tables(profile)
+
+    try:
+        server = FolderEditorServer(port, profile, context, verbose)
+    except OSError as e:
+        edit_folder.error_pause_and_exit(f"Cannot start server on port {port}: {e}")
+
+    print(f"Folder editor server for {profile.display_name} running on http://{folder_client.SERVER_HOST}:{server.server_port}. Press Ctrl+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
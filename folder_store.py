@@ -0,0 +1,298 @@
+# =============================================================================
+# MIT License
+# 
+# Copyright (c) 2022 luckytyphlosion
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# =============================================================================
+
+# A compact store of folders for chip usage stats, instead of the all folder info json.
+# Each column is a fixed width array over all folders, so the file can be memory mapped
+# and a column read without parsing anything per folder:
+#   timestamps   int64
+#   chips        NUM_FOLDER_CHIPS uint16 per folder, packed like in a save (chip id | code << 9)
+#   version_ids  uint16 index into the version table
+#   navi_ids     uint8
+#   reg_slots    uint8 (0xff for no reg)
+# After the columns, every chip in any folder has a bitmap with a bit set for each folder
+# that has the chip, so the number of folders with a chip is a popcount.
+# Folders are sorted by version and navi, and the header has where each (version, navi)
+# group starts, so limiting a count to some versions or navis is masking off bit ranges.
+
+import array
+import collections
+import mmap
+import struct
+import sys
+
+import game_profiles
+import atomic_file
+
+FOLDER_STORE_MAGIC = b"FLDSTOR1"
+# magic, number of folders, number of versions, number of groups, number of chip bitmaps
+FOLDER_STORE_HEADER_STRUCT = struct.Struct("<8sIHHH2x")
+FOLDER_STORE_VERSION_LEN_STRUCT = struct.Struct("<B")
+# version id, navi id, first folder, number of folders
+FOLDER_STORE_GROUP_STRUCT = struct.Struct("<HBxII")
+FOLDER_STORE_BITMAP_CHIP_ID_STRUCT = struct.Struct("<H")
+FOLDER_STORE_ALIGNMENT = 8
+
+NUM_FOLDER_CHIPS = game_profiles.NUM_FOLDER_CHIPS
+NO_REG = 0xff
+
+# limits of the header fields
+MAX_VERSION_LEN = 0xff
+MAX_NUM_VERSIONS = 0xffff
+MAX_NUM_GROUPS = 0xffff
+MAX_NUM_FOLDERS = 0xffffffff
+MAX_NAVI_ID = 0xff
+
+# (name, format, items per folder), in file order
+FOLDER_STORE_COLUMNS = (
+    ("timestamps", "q", 1),
+    ("chips", "H", NUM_FOLDER_CHIPS),
+    ("version_ids", "H", 1),
+    ("navi_ids", "B", 1),
+    ("reg_slots", "B", 1),
+)
+
+# int.bit_count is only in 3.10+
+if hasattr(int, "bit_count"):
+    popcount = int.bit_count
+else:
+    def popcount(x):
+        return bin(x).count("1")
+
+def align(offset):
+    return offset + -offset % FOLDER_STORE_ALIGNMENT
+
+def get_bitmap_size(num_folders):
+    return align((num_folders + 7) // 8)
+
+# Returns ([(column name, format, start, size)], where the chip bitmaps start)
+def get_column_layout(columns_start, num_folders):
+    column_layout = []
+    column_start = align(columns_start)
+    for column_name, column_format, items_per_folder in FOLDER_STORE_COLUMNS:
+        column_size = struct.calcsize(column_format) * items_per_folder * num_folders
+        column_layout.append((column_name, column_format, column_start, column_size))
+        column_start += column_size
+
+    return column_layout, align(column_start)
+
+# folder_records are (timestamp, version, navi id, reg slot or NO_REG, NUM_FOLDER_CHIPS chip words)
+def write_folder_store(filepath, folder_records):
+    version_ids = {}
+    sorted_folder_records = []
+    for timestamp, version, navi_id, reg_slot, chip_words in folder_records:
+        if len(chip_words) != NUM_FOLDER_CHIPS:
+            raise ValueError(f"Folder must have {NUM_FOLDER_CHIPS} chips!")
+        if not (0 <= navi_id <= MAX_NAVI_ID):
+            raise ValueError(f"Navi id {navi_id} doesn't fit in a folder store!")
+
+        version_id = version_ids.get(version)
+        if version_id is None:
+            if len(version.encode("utf-8")) > MAX_VERSION_LEN:
+                raise ValueError(f"Version {version!r} is longer than {MAX_VERSION_LEN} bytes!")
+            if len(version_ids) >= MAX_NUM_VERSIONS:
+                raise ValueError(f"More than {MAX_NUM_VERSIONS} versions, can't add version {version!r}!")
+            version_id = len(version_ids)
+            version_ids[version] = version_id
+
+        sorted_folder_records.append((version_id, navi_id, timestamp, reg_slot, chip_words))
+
+    sorted_folder_records.sort(key=lambda folder_record: (folder_record[0], folder_record[1]))
+    num_folders = len(sorted_folder_records)
+    if num_folders > MAX_NUM_FOLDERS:
+        raise ValueError(f"{num_folders} folders is more than a folder store can hold ({MAX_NUM_FOLDERS})!")
+    num_groups = len(set((version_id, navi_id) for version_id, navi_id, timestamp, reg_slot, chip_words in sorted_folder_records))
+    if num_groups > MAX_NUM_GROUPS:
+        raise ValueError(f"{num_groups} version and navi groups is more than a folder store can hold ({MAX_NUM_GROUPS})!")
+    bitmap_size = get_bitmap_size(num_folders)
+
+    columns = {column_name: array.array(column_format) for column_name, column_format, items_per_folder in FOLDER_STORE_COLUMNS}
+    groups = {}
+    chip_bitmaps = {}
+    for folder_index, (version_id, navi_id, timestamp, reg_slot, chip_words) in enumerate(sorted_folder_records):
+        columns["timestamps"].append(timestamp)
+        columns["chips"].extend(chip_words)
+        columns["version_ids"].append(version_id)
+        columns["navi_ids"].append(navi_id)
+        columns["reg_slots"].append(reg_slot)
+
+        group_key = (version_id, navi_id)
+        if group_key not in groups:
+            groups[group_key] = [folder_index, 0]
+        groups[group_key][1] += 1
+
+        folder_byte_index = folder_index >> 3
+        folder_bit = 1 << (folder_index & 7)
+        for chip_id in set(chip_word & 0x1ff for chip_word in chip_words):
+            chip_bitmap = chip_bitmaps.get(chip_id)
+            if chip_bitmap is None:
+                chip_bitmap = bytearray(bitmap_size)
+                chip_bitmaps[chip_id] = chip_bitmap
+            chip_bitmap[folder_byte_index] |= folder_bit
+
+    bitmap_chip_ids = sorted(chip_bitmaps.keys())
+
+    header_chunks = [FOLDER_STORE_HEADER_STRUCT.pack(FOLDER_STORE_MAGIC, num_folders, len(version_ids), len(groups), len(bitmap_chip_ids))]
+    for version in version_ids.keys():
+        encoded_version = version.encode("utf-8")
+        header_chunks.append(FOLDER_STORE_VERSION_LEN_STRUCT.pack(len(encoded_version)) + encoded_version)
+    for (version_id, navi_id), (group_start, group_size) in groups.items():
+        header_chunks.append(FOLDER_STORE_GROUP_STRUCT.pack(version_id, navi_id, group_start, group_size))
+    for chip_id in bitmap_chip_ids:
+        header_chunks.append(FOLDER_STORE_BITMAP_CHIP_ID_STRUCT.pack(chip_id))
+
+    header_data = b"".join(header_chunks)
+    column_layout, bitmaps_start = get_column_layout(len(header_data), num_folders)
+    store_data = bytearray(bitmaps_start + bitmap_size * len(bitmap_chip_ids))
+    store_data[:len(header_data)] = header_data
+    for column_name, column_format, column_start, column_size in column_layout:
+        column = columns[column_name]
+        if sys.byteorder != "little":
+            column.byteswap()
+        store_data[column_start:column_start+column_size] = column.tobytes()
+
+    for bitmap_index, chip_id in enumerate(bitmap_chip_ids):
+        bitmap_start = bitmaps_start + bitmap_index * bitmap_size
+        store_data[bitmap_start:bitmap_start+bitmap_size] = chip_bitmaps[chip_id]
+
+    atomic_file.write_file_atomic(filepath, store_data, fsync=False)
+
+class FolderStore:
+    __slots__ = ("store_mmap", "num_folders", "versions", "groups", "bitmap_chip_ids", "bitmaps_start", "bitmap_size", "columns")
+
+    def __init__(self, store_mmap):
+        self.store_mmap = store_mmap
+        magic, self.num_folders, num_versions, num_groups, num_bitmap_chips = FOLDER_STORE_HEADER_STRUCT.unpack_from(store_mmap)
+        if magic != FOLDER_STORE_MAGIC:
+            raise ValueError("Not a folder store!")
+
+        offset = FOLDER_STORE_HEADER_STRUCT.size
+        self.versions = []
+        for i in range(num_versions):
+            version_len = store_mmap[offset]
+            offset += FOLDER_STORE_VERSION_LEN_STRUCT.size
+            self.versions.append(store_mmap[offset:offset+version_len].decode("utf-8"))
+            offset += version_len
+
+        # (version id, navi id, first folder, number of folders)
+        self.groups = [FOLDER_STORE_GROUP_STRUCT.unpack_from(store_mmap, offset + i * FOLDER_STORE_GROUP_STRUCT.size) for i in range(num_groups)]
+        offset += num_groups * FOLDER_STORE_GROUP_STRUCT.size
+        self.bitmap_chip_ids = [FOLDER_STORE_BITMAP_CHIP_ID_STRUCT.unpack_from(store_mmap, offset + i * FOLDER_STORE_BITMAP_CHIP_ID_STRUCT.size)[0] for i in range(num_bitmap_chips)]
+        offset += num_bitmap_chips * FOLDER_STORE_BITMAP_CHIP_ID_STRUCT.size
+
+        column_layout, self.bitmaps_start = get_column_layout(offset, self.num_folders)
+        self.bitmap_size = get_bitmap_size(self.num_folders)
+        if len(store_mmap) < self.bitmaps_start + self.bitmap_size * num_bitmap_chips:
+            raise ValueError("Folder store is cut off!")
+
+        self.columns = {}
+        with memoryview(store_mmap) as store_view:
+            for column_name, column_format, column_start, column_size in column_layout:
+                if sys.byteorder != "little":
+                    column = array.array(column_format, store_view[column_start:column_start+column_size])
+                    column.byteswap()
+                    self.columns[column_name] = memoryview(column)
+                else:
+                    self.columns[column_name] = store_view[column_start:column_start+column_size].cast(column_format)
+
+    @classmethod
+    def open(cls, filepath):
+        with open(filepath, "rb") as f:
+            store_mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            return cls(store_mmap)
+        except BaseException:
+            store_mmap.close()
+            raise
+
+    def close(self):
+        for column in self.columns.values():
+            column.release()
+        self.columns.clear()
+        self.store_mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self.num_folders
+
+    def get_chip_words(self, folder_index):
+        return self.columns["chips"][folder_index*NUM_FOLDER_CHIPS:(folder_index+1)*NUM_FOLDER_CHIPS].tolist()
+
+    # version ids of the given version names, or all of them if versions is None
+    def get_version_ids(self, versions=None):
+        if versions is None:
+            return set(range(len(self.versions)))
+        else:
+            return set(version_id for version_id, version in enumerate(self.versions) if version in versions)
+
+    # The bits of a chip bitmap for the folders from start to end, with the bit for start at bit 0
+    def get_chip_bitmap_range(self, bitmap_index, start, end, range_mask):
+        bitmap_start = self.bitmaps_start + bitmap_index * self.bitmap_size
+        return (int.from_bytes(self.store_mmap[bitmap_start+(start >> 3):bitmap_start+((end + 7) >> 3)], "little") >> (start & 7)) & range_mask
+
+    # Counts the set bits of a chip bitmap for the folders from start to end
+    def count_chip_bitmap_range(self, bitmap_index, start, end, range_mask):
+        return popcount(self.get_chip_bitmap_range(bitmap_index, start, end, range_mask))
+
+    # Returns [(version, navi id, number of folders, {chip id: number of folders with the chip}, chip pairs)]
+    # for every (version, navi) group. Each chip bitmap is read once for all the groups, so
+    # any version or navi filter can be summed up from the groups afterwards.
+    # If count_pairs, chip pairs is {(chip id, other chip id): number of folders with both} with
+    # chip id < other chip id, counted by ANDing the bitmaps of each pair, otherwise it's None.
+    def count_chip_usage_by_group(self, count_pairs=False):
+        chip_usage_by_group = []
+
+        for version_id, navi_id, group_start, group_size in self.groups:
+            group_end = group_start + group_size
+            group_mask = (1 << group_size) - 1
+            chip_usage = collections.Counter()
+            # (chip id, bits of the group's folders with the chip)
+            group_chip_bitmaps = []
+
+            for bitmap_index, chip_id in enumerate(self.bitmap_chip_ids):
+                group_chip_bitmap = self.get_chip_bitmap_range(bitmap_index, group_start, group_end, group_mask)
+                if group_chip_bitmap != 0:
+                    chip_usage[chip_id] = popcount(group_chip_bitmap)
+                    group_chip_bitmaps.append((chip_id, group_chip_bitmap))
+
+            chip_pairs = count_chip_pairs(group_chip_bitmaps) if count_pairs else None
+            chip_usage_by_group.append((self.versions[version_id], navi_id, group_size, chip_usage, chip_pairs))
+
+        return chip_usage_by_group
+
+# chip_bitmaps is [(chip id, bitmap of the folders with the chip)] sorted by chip id
+def count_chip_pairs(chip_bitmaps):
+    chip_pairs = {}
+    for i, (chip_id, chip_bitmap) in enumerate(chip_bitmaps):
+        for other_chip_id, other_chip_bitmap in chip_bitmaps[i+1:]:
+            amount_used_together = popcount(chip_bitmap & other_chip_bitmap)
+            if amount_used_together != 0:
+                chip_pairs[(chip_id, other_chip_id)] = amount_used_together
+
+    return chip_pairs
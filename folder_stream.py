@@ -0,0 +1,145 @@
+# =============================================================================
+# MIT License
+# 
+# Copyright (c) 2022 luckytyphlosion
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# =============================================================================
+
+# Writers that put the folders extracted from many saves into one stream (a JSONL or tar file,
+# or stdout) instead of a directory of text files per save.
+
+import io
+import json
+import struct
+import sys
+import tarfile
+import time
+
+STREAM_FORMAT_JSONL = "jsonl"
+STREAM_FORMAT_TAR = "tar"
+STREAM_BUFFER_SIZE = 1 << 20
+STDOUT_PATHNAME = "-"
+
+class FolderWriter:
+    __slots__ = ("output_file", "owns_output_file")
+
+    def __init__(self, output_file, owns_output_file):
+        self.output_file = output_file
+        self.owns_output_file = owns_output_file
+
+    def finish(self):
+        pass
+
+    def close(self):
+        self.finish()
+        if self.owns_output_file:
+            self.output_file.close()
+        else:
+            # flushes, but leaves whatever it wraps (stdout) open
+            self.output_file.detach().flush()
+
+# One line per save: {"save": path, "profile": name, "folders": {navi name: folder text}, "warnings": [...]}
+# or {"save": path, "error": message} if it couldn't be extracted.
+class JsonlFolderWriter(FolderWriter):
+    __slots__ = ()
+
+    def write_save_folders(self, save_filepath, profile, folder_texts, warnings):
+        self.output_file.write(json.dumps({"save": str(save_filepath), "profile": profile.name, "folders": folder_texts, "warnings": warnings}).encode("utf-8") + b"\n")
+
+    def write_save_error(self, save_filepath, error_message):
+        self.output_file.write(json.dumps({"save": str(save_filepath), "error": error_message}).encode("utf-8") + b"\n")
+
+TAR_BLOCK_SIZE = tarfile.BLOCKSIZE
+TAR_RECORD_SIZE = tarfile.RECORDSIZE
+# name, mode, uid, gid, size, mtime, checksum, type, linkname, magic, version, uname, gname, devmajor, devminor, prefix
+TAR_HEADER_STRUCT = struct.Struct("<100s8s8s8s12s12s8sc100s6s2s32s32s8s8s155s12x")
+TAR_CHECKSUM_OFFSET = 148
+
+# tarfile takes longer to make a header than it takes to decode the save's folders,
+# so plain ustar headers are made here and tarfile is only used for names too long for them
+def make_tar_header(name, size, mtime):
+    encoded_name = name.encode("utf-8")
+    if len(encoded_name) > 100:
+        tar_info = tarfile.TarInfo(name)
+        tar_info.size = size
+        tar_info.mtime = mtime
+        return tar_info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+
+    header = bytearray(TAR_HEADER_STRUCT.pack(
+        encoded_name, b"0000644\0", b"0000000\0", b"0000000\0", b"%011o\0" % size, b"%011o\0" % mtime,
+        b" " * 8, tarfile.REGTYPE, b"", b"ustar\0", b"00", b"", b"", b"", b"", b""
+    ))
+    header[TAR_CHECKSUM_OFFSET:TAR_CHECKSUM_OFFSET+8] = b"%06o\0 " % sum(header)
+    return header
+
+# The same layout extraction makes on disk, <save name>/<save name>_<navi>.txt
+class TarFolderWriter(FolderWriter):
+    __slots__ = ("mtime", "num_bytes_written")
+
+    def __init__(self, output_file, owns_output_file):
+        super().__init__(output_file, owns_output_file)
+        self.mtime = int(time.time())
+        self.num_bytes_written = 0
+
+    def write_save_folders(self, save_filepath, profile, folder_texts, warnings):
+        save_basename = save_filepath.with_suffix("").name
+        tar_chunks = []
+        for navi_name, folder_text in folder_texts.items():
+            folder_data = folder_text.encode("utf-8")
+            tar_chunks.append(make_tar_header(f"{save_basename}/{save_filepath.stem}_{navi_name}.txt", len(folder_data), self.mtime))
+            tar_chunks.append(folder_data)
+            tar_chunks.append(bytes(-len(folder_data) % TAR_BLOCK_SIZE))
+
+        tar_data = b"".join(tar_chunks)
+        self.output_file.write(tar_data)
+        self.num_bytes_written += len(tar_data)
+
+    # errors are only in the batch report
+    def write_save_error(self, save_filepath, error_message):
+        pass
+
+    # two empty blocks end the archive, padded out to a whole record like tarfile does
+    def finish(self):
+        end_size = 2 * TAR_BLOCK_SIZE
+        end_size += -(self.num_bytes_written + end_size) % TAR_RECORD_SIZE
+        self.output_file.write(bytes(end_size))
+
+def get_stream_format(output_pathname):
+    if output_pathname != STDOUT_PATHNAME and output_pathname.casefold().endswith(".tar"):
+        return STREAM_FORMAT_TAR
+    else:
+        return STREAM_FORMAT_JSONL
+
+# "-" is stdout. The format comes from the file extension if not given.
+def open_folder_writer(output_pathname, stream_format=None):
+    if stream_format is None:
+        stream_format = get_stream_format(output_pathname)
+
+    if output_pathname == STDOUT_PATHNAME:
+        output_file = io.BufferedWriter(sys.stdout.buffer, STREAM_BUFFER_SIZE)
+        owns_output_file = False
+    else:
+        output_file = open(output_pathname, "wb", buffering=STREAM_BUFFER_SIZE)
+        owns_output_file = True
+
+    if stream_format == STREAM_FORMAT_TAR:
+        return TarFolderWriter(output_file, owns_output_file)
+    else:
+        return JsonlFolderWriter(output_file, owns_output_file)
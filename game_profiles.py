@@ -0,0 +1,219 @@
+# =============================================================================
+# MIT License
+# 
+# Copyright (c) 2022 luckytyphlosion
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# =============================================================================
+
+import json
+import struct
+
+NUM_FOLDER_CHIPS = 30
+
+CHIP_AND_CODE_STRUCT = struct.Struct("<H")
+FOLDER_STRUCT = struct.Struct(f"<{NUM_FOLDER_CHIPS}H")
+CHECKSUM_STRUCT = struct.Struct("<I")
+GAME_NAME_LEN = 20
+
+class RomLayout:
+    __slots__ = ("rom_filename", "chip_data_offset", "chip_data_size", "chip_names_pointers_offset", "chip_descriptions_pointers_offset", "navi_names_pointer_offset", "num_chips")
+
+    def __init__(self, rom_filename, chip_data_offset, chip_names_pointers_offset, num_chips, chip_descriptions_pointers_offset=None, navi_names_pointer_offset=None, chip_data_size=0x2c):
+        self.rom_filename = rom_filename
+        self.chip_data_offset = chip_data_offset
+        self.chip_data_size = chip_data_size
+        self.chip_names_pointers_offset = chip_names_pointers_offset
+        self.chip_descriptions_pointers_offset = chip_descriptions_pointers_offset
+        self.navi_names_pointer_offset = navi_names_pointer_offset
+        self.num_chips = num_chips
+
+    def get_chip_data_offset(self, chip_id):
+        return self.chip_data_offset + chip_id * self.chip_data_size
+
+class GameProfile:
+    __slots__ = ("name", "display_name", "patch_names", "game_names", "sram_start_offset", "mask_offset", "game_name_offset", "checksum_offset", "checksum_adjust", "save_size", "folder_offset", "reg_structure_offset", "navi_id_offset", "template_save_filename", "chips_filename", "navis_filename", "builtin_navis", "sets_buster_levels", "rom_layout")
+
+    def __init__(self, name, display_name, game_names, mask_offset, game_name_offset, checksum_offset, checksum_adjust, save_size, folder_offset, reg_structure_offset, chips_filename, template_save_filename=None, navis_filename=None, builtin_navis=None, navi_id_offset=None, sram_start_offset=0, sets_buster_levels=False, patch_names=(), rom_layout=None):
+        self.name = name
+        self.display_name = display_name
+        self.patch_names = patch_names
+        self.game_names = game_names
+        self.sram_start_offset = sram_start_offset
+        self.mask_offset = mask_offset
+        self.game_name_offset = game_name_offset
+        self.checksum_offset = checksum_offset
+        self.checksum_adjust = checksum_adjust
+        self.save_size = save_size
+        self.folder_offset = folder_offset
+        self.reg_structure_offset = reg_structure_offset
+        self.navi_id_offset = navi_id_offset
+        self.template_save_filename = template_save_filename
+        self.chips_filename = chips_filename
+        self.navis_filename = navis_filename
+        self.builtin_navis = builtin_navis
+        self.sets_buster_levels = sets_buster_levels
+        self.rom_layout = rom_layout
+
+    # games without navi select always use the builtin navi and have no navi line in text folders
+    @property
+    def has_navi_line(self):
+        return self.navi_id_offset is not None
+
+    @property
+    def num_folder_lines(self):
+        return NUM_FOLDER_CHIPS + 1 if self.has_navi_line else NUM_FOLDER_CHIPS
+
+    # offsets and checksum that don't depend on the game's name, e.g. EXE4.5 JP and US
+    def get_save_layout(self):
+        return (self.sram_start_offset, self.mask_offset, self.checksum_offset, self.checksum_adjust, self.save_size, self.folder_offset, self.reg_structure_offset, self.navi_id_offset)
+
+    def get_folder_offset(self, navi_id):
+        return self.folder_offset + FOLDER_STRUCT.size * navi_id
+
+    def get_folder_chip_offset(self, navi_id, chip_slot):
+        return self.folder_offset + FOLDER_STRUCT.size * navi_id + chip_slot * CHIP_AND_CODE_STRUCT.size
+
+    def get_reg_offset(self, navi_id):
+        return self.reg_structure_offset + 0x40 * navi_id + 0x2f
+
+    def get_buster_level_offset(self, navi_id):
+        return self.reg_structure_offset + 0x40 * navi_id + 0x5
+
+    def get_game_name(self, save_data):
+        return bytes(save_data[self.game_name_offset:self.game_name_offset+GAME_NAME_LEN])
+
+    def is_correct_savegame(self, save_data):
+        return self.get_game_name(save_data) in self.game_names
+
+    # save_data here is the file as is: still masked and including any data before SRAM
+    def is_raw_save(self, raw_save_data):
+        mask_byte_offset = self.sram_start_offset + self.mask_offset
+        game_name_offset = self.sram_start_offset + self.game_name_offset
+        if len(raw_save_data) < max(mask_byte_offset + 1, game_name_offset + GAME_NAME_LEN):
+            return False
+
+        mask_first_byte = raw_save_data[mask_byte_offset]
+        game_name = bytes(byte ^ mask_first_byte for byte in raw_save_data[game_name_offset:game_name_offset+GAME_NAME_LEN])
+        return game_name in self.game_names
+
+    def load_navis(self):
+        if self.navis_filename is not None:
+            with open(self.navis_filename, "r") as f:
+                return json.load(f)
+        else:
+            return {navi_name: dict(navi) for navi_name, navi in self.builtin_navis.items()}
+
+    def load_chips(self):
+        with open(self.chips_filename, "r") as f:
+            return json.load(f)
+
+EXE45_ROM_LAYOUT_KWARGS = {
+    "chip_data_offset": 0x1af0c,
+    "chip_names_pointers_offset": 0x3cb98,
+    "chip_descriptions_pointers_offset": 0x2165c,
+    "navi_names_pointer_offset": 0x5174c,
+    "num_chips": 389,
+}
+
+EXE45_SAVE_LAYOUT_KWARGS = {
+    "display_name": "EXE4.5",
+    "mask_offset": 0x3c84,
+    "game_name_offset": 0x4ba8,
+    "checksum_offset": 0x4b88,
+    "checksum_adjust": 0x38,
+    "save_size": 0xc7a8,
+    "folder_offset": 0x7500,
+    "reg_structure_offset": 0x8530,
+    "navi_id_offset": 0x4ad1,
+    "template_save_filename": "data/exe45_us_pvp_template.sav",
+    "chips_filename": "data/exe45_chips.json",
+    "navis_filename": "data/navis.json",
+    "sets_buster_levels": True,
+}
+
+EXE45_PVP = GameProfile(
+    name="exe45_pvp",
+    game_names=(b"ROCKMANEXE4RO 040607",),
+    patch_names=("exe45_pvp",),
+    rom_layout=RomLayout(rom_filename="exe45_pvp.gba", **EXE45_ROM_LAYOUT_KWARGS),
+    **EXE45_SAVE_LAYOUT_KWARGS
+)
+
+BN45_US_PVP = GameProfile(
+    name="bn45_us_pvp",
+    game_names=(b"ROCKMANEXE4RO 041217",),
+    patch_names=("bn45_us_pvp",),
+    rom_layout=RomLayout(rom_filename="exe45_us_pvp.gba", **EXE45_ROM_LAYOUT_KWARGS),
+    **EXE45_SAVE_LAYOUT_KWARGS
+)
+
+BN6_BUILTIN_NAVIS = {
+    "MegaMan": {
+        "id": 0,
+        "name": "MegaMan",
+        "mb": 30,
+        "megafolder": 4,
+        "gigafolder": 1
+    }
+}
+
+BN6_SAVE_LAYOUT_KWARGS = {
+    "display_name": "BN6",
+    "sram_start_offset": 0x100,
+    "mask_offset": 0x1064,
+    "game_name_offset": 0x1c70,
+    "checksum_offset": 0x1c6c,
+    "save_size": 0x6710,
+    "folder_offset": 0x2178,
+    # unknown for BN6, so regs and buster levels aren't edited
+    "reg_structure_offset": None,
+    "chips_filename": "bn6_chips.json",
+    "builtin_navis": BN6_BUILTIN_NAVIS,
+}
+
+BN6F = GameProfile(
+    name="bn6f",
+    game_names=(b"REXE6 F 20060110a US",),
+    checksum_adjust=0x18,
+    template_save_filename="data/bn6_template.sav",
+    rom_layout=RomLayout(rom_filename="bn6f.gba", chip_data_offset=0x21da8, chip_names_pointers_offset=0x42068, num_chips=411),
+    **BN6_SAVE_LAYOUT_KWARGS
+)
+
+BN6G = GameProfile(
+    name="bn6g",
+    game_names=(b"REXE6 G 20060110a US",),
+    checksum_adjust=0x72,
+    **BN6_SAVE_LAYOUT_KWARGS
+)
+
+GAME_PROFILES = {profile.name: profile for profile in (BN45_US_PVP, EXE45_PVP, BN6F, BN6G)}
+# folders can only be converted to saves of a profile with a template save to put them in
+CONVERTIBLE_PROFILES = {profile.name: profile for profile in GAME_PROFILES.values() if profile.template_save_filename is not None}
+PATCH_NAME_TO_PROFILE = {patch_name: profile for profile in GAME_PROFILES.values() for patch_name in profile.patch_names}
+
+DEFAULT_PROFILE = BN45_US_PVP
+
+def detect_save_profile(raw_save_data):
+    for profile in GAME_PROFILES.values():
+        if profile.is_raw_save(raw_save_data):
+            return profile
+
+    return None
@@ -1,6 +1,8 @@
 import struct
 import json
 
+import game_profiles
+
 charset_us = [" ", "0", "1", "2", "3", "4", "5", "6", "7", "8", "9", "A", "B", "C", "D", "E", "F", "G", "H", "I", "J", "K", "L", "M", "N", "O", "P", "Q", "R", "S", "T", "U", "V", "W", "X", "Y", "Z", "*", "a", "b", "c", "d", "e", "f", "g", "h", "i", "j", "k", "l", "m", "n", "o", "p", "q", "r", "s", "t", "u", "v", "w", "x", "y", "z", "ÿ", "Ÿ", "EX", "SP", "DS", "Œ", "œ", "?", "+", "-", "×", "À", "Á", "Â", "Ã", "Ä", "Å", "Æ", "Ç", "È", "É", "Ê", "Ë", "Ì", "Í", "Î", "Ï", "Ð", "Ñ", "Ò", "Ó", "Ô", "Õ", "Ö", "ý", "Ø", "Ù", "Ú", "Û", "Ü", "Ý", "Þ", "ß", "à", "á", "â", "ã", "ä", "å", "æ", "ç", "è", "é", "ê", "ë", "ì", "í", "î", "ï", "ð", "ñ", "ò", "ó", "ô", "õ", "ö", "þ", "ø", "ù", "ú", "û", "ü", "[×alt]", "÷", "XX", "V2", "V3", "¿", "@", "<", ">", "\\[", "\\]", "[-]", "[×]", "=", ":", "%", "¡", "[+]", "█", "[bat]", "ー", "!", "[V4]", "[V5]", "&", ",", "。", ".", "・", ";", "'", "\"", "~", "/", "(", ")", "「", "」", "α", "β", "Ω", "■", "_", "[z]", "[S]", "[M]", "[G]", "[1px]", "[MB]", "[Trophy1A]", "[Trophy1B]", "[Trophy2A]", "[Trophy2B]", "[TVShow1]", "[TVShow2]", "[Promise1]", "[Promise2]", "[Meal1]", "[Meal2]", "[School1]", "[School2]", "[Other1]", "[Other2]", "[bracket1]", "[bracket2]", "[8px]", "⋯", "$", "€", "£", "¥", "¢", "#", "←", "↑", "→", "↓", "[0lower]", "[1lower]", "[2lower]", "[3lower]", "[4lower]", "[5lower]", "[6lower]", "[7lower]", "[8lower]", "[9lower]", "[Alower]", "[Plower]", "[Mlower]", "[:lower]", "わ", "研", "げ", "ぐ", "ご", "が", "ぎ", "ぜ", "ず", "じ", "ぞ", "ざ", "で", "ど", "づ", "だ", "ぢ", "べ", "ば", "び", "ぼ", "ぶ", "ぽ", "ぷ", "ぴ", "ぺ", "ぱ", "ぅ", "ぁ", "ぃ", "ぉ", "ぇ", "ゅ", "ょ", "っ", "ゃ", "[Ω]", "[←]", "[↓]", "木", "[MB2]", "無", "現", "実", "[circle]", "[cross]", "[#]", "[⋯]", "不", "止", "彩", "[\\[]", "父", "集", "院", "一", "二", "三", "四", "五", "六", "七", "八", "陽", "十", "百", "千", "万", "脳", "上", "下", "左", "右", "手", "足", "日", "目", "月", "[\\]]", "[<]", "人", "入", "出", "山", "口", "光", "電", "気", "助", "科", "次", "名", "前", "学", "校", "省", "祐", "室", "世", "界", "燃", "朗", "枚", "島", "悪", "路", "闇", "大", "小", "中", "自", "分", "間", "系", "花", "問", "[>]", "[$]", "城", "王", "兄", "化", "行", "街", "屋", "水", "見", "終", "丁", "桜", "先", "生", "長", "今", "了", "点", "井", "子", "言", "太", "属", "風", "会", "性", "持", "時", "勝", "赤", "年", "火", "改", "計", "画", "体", "波", "回", "外", "地", "正", "造", "値", "合", "戦", "川", "秋", "原", "町", "所", "用", "金", "郎", "作", "数", "方", "社", "攻", "撃", "力", "同", "武", "何", "発", "少", "以", "白", "早", "暮", "面", "組", "後", "文", "字", "本", "階", "明", "才", "者", "立", "々", "ヶ", "連", "射", "綾", "切", "土", "炎", "伊"]
 
 charset_jp = [" ", "0", "1", "2", "3", "4", "5", "6", "7", "8", "9", "ア", "イ", "ウ", "エ", "オ", "カ", "キ", "ク", "ケ", "コ", "サ", "シ", "ス", "セ", "ソ", "タ", "チ", "ツ", "テ", "ト", "ナ", "ニ", "ヌ", "ネ", "ノ", "ハ", "ヒ", "フ", "ヘ", "ホ", "マ", "ミ", "ム", "メ", "モ", "ヤ", "ユ", "ヨ", "ラ", "リ", "ル", "レ", "ロ", "ワ", "熱", "斗", "ヲ", "ン", "ガ", "ギ", "グ", "ゲ", "ゴ", "ザ", "ジ", "ズ", "ゼ", "ゾ", "ダ", "ヂ", "ヅ", "デ", "ド", "バ", "ビ", "ブ", "ベ", "ボ", "パ", "ピ", "プ", "ペ", "ポ", "ァ", "ィ", "ゥ", "ェ", "ォ", "ッ", "ャ", "ュ", "ョ", "ヴ", "A", "B", "C", "D", "E", "F", "G", "H", "I", "J", "K", "L", "M", "N", "O", "P", "Q", "R", "S", "T", "U", "V", "W", "X", "Y", "Z", "*", "-", "×", "=", ":", "%", "?", "+", "÷", "�", "ー", "!", "現", "実", "&", "、", "。", ".", "・", ";", "’", "\"", "~", "/", "(", ")", "「", "」", "V2", "V3", "V4", "V5", "_", "[z]", "周", "あ", "い", "う", "え", "お", "か", "き", "く", "け", "こ", "さ", "し", "す", "せ", "そ", "た", "ち", "つ", "て", "と", "な", "に", "ぬ", "ね", "の", "は", "ひ", "ふ", "へ", "ほ", "ま", "み", "む", "め", "も", "や", "ゆ", "よ", "ら", "り", "る", "れ", "ろ", "わ", "研", "究", "を", "ん", "が", "ぎ", "ぐ", "げ", "ご", "ざ", "じ", "ず", "ぜ", "ぞ", "だ", "ぢ", "づ", "で", "ど", "ば", "び", "ぶ", "べ", "ぼ", "ぱ", "ぴ", "ぷ", "ぺ", "ぽ", "ぁ", "ぃ", "ぅ", "ぇ", "ぉ", "っ", "ゃ", "ゅ", "ょ", "a", "b", "c", "d", "e", "f", "g", "h", "i", "j", "k", "l", "m", "n", "o", "p", "q", "r", "s", "t", "u", "v", "w", "x", "y", "z", "容", "量", "内", "木", "[MB]", "無", "嵐", "[square]", "[circle]", "[cross]", "駅", "客", "不", "止", "彩", "起", "父", "集", "院", "一", "二", "三", "四", "五", "六", "七", "八", "陽", "十", "百", "千", "万", "脳", "上", "下", "左", "右", "手", "足", "日", "目", "月", "高", "各", "人", "入", "出", "山", "口", "光", "電", "気", "♯", "科", "$", "名", "前", "学", "校", "省", "¥", "室", "世", "界", "約", "朗", "枚", "女", "男", "路", "束", "大", "小", "中", "自", "分", "間", "村", "予", "問", "異", "門", "決", "定", "兄", "帯", "道", "行", "街", "屋", "水", "見", "終", "丁", "週", "先", "生", "長", "今", "了", "点", "緑", "子", "言", "太", "属", "風", "会", "性", "持", "時", "勝", "赤", "毎", "年", "火", "改", "計", "画", "休", "体", "波", "回", "外", "地", "病", "正", "造", "値", "合", "戦", "敗", "秋", "原", "町", "所", "用", "金", "習", "作", "数", "方", "社", "攻", "撃", "力", "同", "武", "何", "発", "少", "■", "以", "白", "早", "暮", "面", "組", "後", "文", "字", "本", "階", "明", "才", "者", "立", "泉", "々", "ヶ", "連", "射", "国", "綾", "切", "土", "炎", "伊"]
@@ -74,10 +76,13 @@ chip_library_id_to_name = {
     2: "Giga"
 }
 
-CHIP_DATA_OFFSET = 0x1af0c
-CHIP_DESCRIPTIONS_POINTERS_OFFSET = 0x2165c
-CHIP_NAMES_POINTERS_OFFSET = 0x3cb98
-NUM_CHIPS = 389
+# both ROMs share the same layout
+US_ROM_LAYOUT = game_profiles.BN45_US_PVP.rom_layout
+JP_ROM_LAYOUT = game_profiles.EXE45_PVP.rom_layout
+CHIP_DATA_OFFSET = US_ROM_LAYOUT.chip_data_offset
+CHIP_DESCRIPTIONS_POINTERS_OFFSET = US_ROM_LAYOUT.chip_descriptions_pointers_offset
+CHIP_NAMES_POINTERS_OFFSET = US_ROM_LAYOUT.chip_names_pointers_offset
+NUM_CHIPS = US_ROM_LAYOUT.num_chips
 
 def read_ptr_as_file_offset(f, offset):
     f.seek(offset)
@@ -118,7 +123,7 @@ missing_series = ChipSeries("<MISSINGCHIPSERIES>", False)
 elem_names = ("Fire", "Aqua", "Elec", "Wood", "Recovery", "Plus", "Sword", "Invisible", "Ground", "Summon", "Wind", "Break", "Null")
 
 def main():
-    with open("exe45_us_pvp.gba", "rb") as f:
+    with open(US_ROM_LAYOUT.rom_filename, "rb") as f:
         chip_names_pt1_ptr = read_ptr_as_file_offset(f, CHIP_NAMES_POINTERS_OFFSET)
         chip_names_pt2_ptr = read_ptr_as_file_offset(f, CHIP_NAMES_POINTERS_OFFSET + 4)
         chip_descs_pt1_ptr = read_ptr_as_file_offset(f, CHIP_DESCRIPTIONS_POINTERS_OFFSET)
@@ -132,7 +137,7 @@ def main():
     chip_names_us = chip_names_pt1 + chip_names_pt2
     chip_descs_us = chip_descs_pt1 + chip_descs_pt2
 
-    with open("exe45_pvp.gba", "rb") as f:
+    with open(JP_ROM_LAYOUT.rom_filename, "rb") as f:
         chip_names_pt1_ptr = read_ptr_as_file_offset(f, CHIP_NAMES_POINTERS_OFFSET)
         chip_names_pt2_ptr = read_ptr_as_file_offset(f, CHIP_NAMES_POINTERS_OFFSET + 4)
         chip_descs_pt1_ptr = read_ptr_as_file_offset(f, CHIP_DESCRIPTIONS_POINTERS_OFFSET)
@@ -190,7 +195,7 @@ def main():
 
     all_chip_infos = []
 
-    with open("exe45_us_pvp.gba", "rb") as f:
+    with open(US_ROM_LAYOUT.rom_filename, "rb") as f:
         chip_reader = ChipReader(f)
         for chip_id, (chip_name_us, chip_desc_us, chip_name_jp, chip_desc_jp) in enumerate(zip(chip_names_us, chip_descs_us, chip_names_jp, chip_descs_jp)):
             chip_reader.set_chip_id(chip_id)
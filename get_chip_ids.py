@@ -1,6 +1,8 @@
 import struct
 import json
 
+import game_profiles
+
 charset = [" ", "0", "1", "2", "3", "4", "5", "6", "7", "8", "9", "A", "B", "C", "D", "E", "F", "G", "H", "I", "J", "K", "L", "M", "N", "O", "P", "Q", "R", "S", "T", "U", "V", "W", "X", "Y", "Z", "*", "a", "b", "c", "d", "e", "f", "g", "h", "i", "j", "k", "l", "m", "n", "o", "p", "q", "r", "s", "t", "u", "v", "w", "x", "y", "z", "ÿ", "Ÿ", "EX", "SP", "DS", "Œ", "œ", "?", "+", "-", "×", "À", "Á", "Â", "Ã", "Ä", "Å", "Æ", "Ç", "È", "É", "Ê", "Ë", "Ì", "Í", "Î", "Ï", "Ð", "Ñ", "Ò", "Ó", "Ô", "Õ", "Ö", "ý", "Ø", "Ù", "Ú", "Û", "Ü", "Ý", "Þ", "ß", "à", "á", "â", "ã", "ä", "å", "æ", "ç", "è", "é", "ê", "ë", "ì", "í", "î", "ï", "ð", "ñ", "ò", "ó", "ô", "õ", "ö", "þ", "ø", "ù", "ú", "û", "ü", "[×alt]", "÷", "XX", "V2", "V3", "¿", "@", "<", ">", "\\[", "\\]", "[-]", "[×]", "=", ":", "%", "¡", "[+]", "█", "[bat]", "ー", "!", "[V4]", "[V5]", "&", ",", "。", ".", "・", ";", "'", "\"", "~", "/", "(", ")", "「", "」", "α", "β", "Ω", "■", "_", "[z]", "[S]", "[M]", "[G]", "[1px]", "[MB]", "[Trophy1A]", "[Trophy1B]", "[Trophy2A]", "[Trophy2B]", "[TVShow1]", "[TVShow2]", "[Promise1]", "[Promise2]", "[Meal1]", "[Meal2]", "[School1]", "[School2]", "[Other1]", "[Other2]", "[bracket1]", "[bracket2]", "[8px]", "⋯", "$", "€", "£", "¥", "¢", "#", "←", "↑", "→", "↓", "[0lower]", "[1lower]", "[2lower]", "[3lower]", "[4lower]", "[5lower]", "[6lower]", "[7lower]", "[8lower]", "[9lower]", "[Alower]", "[Plower]", "[Mlower]", "[:lower]", "わ", "研", "げ", "ぐ", "ご", "が", "ぎ", "ぜ", "ず", "じ", "ぞ", "ざ", "で", "ど", "づ", "だ", "ぢ", "べ", "ば", "び", "ぼ", "ぶ", "ぽ", "ぷ", "ぴ", "ぺ", "ぱ", "ぅ", "ぁ", "ぃ", "ぉ", "ぇ", "ゅ", "ょ", "っ", "ゃ", "[Ω]", "[←]", "[↓]", "木", "[MB2]", "無", "現", "実", "[circle]", "[cross]", "[#]", "[⋯]", "不", "止", "彩", "[\\[]", "父", "集", "院", "一", "二", "三", "四", "五", "六", "七", "八", "陽", "十", "百", "千", "万", "脳", "上", "下", "左", "右", "手", "足", "日", "目", "月", "[\\]]", "[<]", "人", "入", "出", "山", "口", "光", "電", "気", "助", "科", "次", "名", "前", "学", "校", "省", "祐", "室", "世", "界", "燃", "朗", "枚", "島", "悪", "路", "闇", "大", "小", "中", "自", "分", "間", "系", "花", "問", "[>]", "[$]", "城", "王", "兄", "化", "行", "街", "屋", "水", "見", "終", "丁", "桜", "先", "生", "長", "今", "了", "点", "井", "子", "言", "太", "属", "風", "会", "性", "持", "時", "勝", "赤", "年", "火", "改", "計", "画", "体", "波", "回", "外", "地", "正", "造", "値", "合", "戦", "川", "秋", "原", "町", "所", "用", "金", "郎", "作", "数", "方", "社", "攻", "撃", "力", "同", "武", "何", "発", "少", "以", "白", "早", "暮", "面", "組", "後", "文", "字", "本", "階", "明", "才", "者", "立", "々", "ヶ", "連", "射", "綾", "切", "土", "炎", "伊"]
 
 def dump_simple_text_script(f, offset, num_scripts):
@@ -34,17 +36,18 @@ chip_library_id_to_name = {
     2: "Giga"
 }
 
-CHIP_DATA_OFFSET = 0x1af0c
-CHIP_NAMES_POINTERS_OFFSET = 0x3cb98
-NAVI_NAMES_POINTER_OFFSET = 0x5174c
-NUM_CHIPS = 389
+ROM_LAYOUT = game_profiles.BN45_US_PVP.rom_layout
+CHIP_DATA_OFFSET = ROM_LAYOUT.chip_data_offset
+CHIP_NAMES_POINTERS_OFFSET = ROM_LAYOUT.chip_names_pointers_offset
+NAVI_NAMES_POINTER_OFFSET = ROM_LAYOUT.navi_names_pointer_offset
+NUM_CHIPS = ROM_LAYOUT.num_chips
 
 def read_ptr_as_file_offset(f, offset):
     f.seek(offset)
     return struct.unpack("<I", f.read(4))[0] - 0x8000000
 
 def main():
-    with open("exe45_us_pvp.gba", "rb") as f:
+    with open(ROM_LAYOUT.rom_filename, "rb") as f:
         chip_names_pt1_ptr = read_ptr_as_file_offset(f, CHIP_NAMES_POINTERS_OFFSET)
         chip_names_pt2_ptr = read_ptr_as_file_offset(f, CHIP_NAMES_POINTERS_OFFSET + 4)
         navi_names_ptr = read_ptr_as_file_offset(f, NAVI_NAMES_POINTER_OFFSET)
@@ -74,7 +77,7 @@ def main():
 
     chip_infos = {}
 
-    with open("exe45_us_pvp.gba", "rb") as f:
+    with open(ROM_LAYOUT.rom_filename, "rb") as f:
         for chip_id, chip_name in enumerate(chip_names):
             f.seek(CHIP_DATA_OFFSET + chip_id * 0x2c + 0x8)
             chip_library_as_num = ord(f.read(1))
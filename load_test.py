@@ -0,0 +1,170 @@
+# =============================================================================
+# MIT License
+# 
+# Copyright (c) 2022 luckytyphlosion
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# =============================================================================
+
+# Load test for folder_async: keeps `concurrency` requests in flight until all requests are done
+# and reports latency percentiles, either calling the service directly or over its TCP protocol.
+
+import argparse
+import asyncio
+import json
+import math
+import pathlib
+import random
+import tempfile
+import time
+
+import edit_folder
+import game_profiles
+import folder_async
+import testing_support
+
+def make_folder_texts(profile, num_folders, typo_rate, rng, tmp_dirpath):
+    template_folder_dirpath = edit_folder.extract_save_folders(pathlib.Path(profile.template_save_filename), profile, tmp_dirpath, verbose=False)
+    template_folder_texts = [template_folder_filepath.read_text() for template_folder_filepath in sorted(template_folder_dirpath.iterdir())]
+
+    folder_texts = []
+    for i in range(num_folders):
+        folder_lines = rng.choice(template_folder_texts).splitlines()
+        for line_index, line in enumerate(folder_lines):
+            if rng.random() < typo_rate:
+                chip_name, _, chip_code = line.rpartition(" ")
+                folder_lines[line_index] = f"{testing_support.make_typo(chip_name, rng, 1)} {chip_code}"
+        folder_texts.append("\n".join(folder_lines) + "\n")
+
+    return folder_texts
+
+def get_percentile(sorted_values, percent):
+    return sorted_values[max(0, math.ceil(len(sorted_values) * percent / 100) - 1)]
+
+class TcpFolderClient:
+    __slots__ = ("reader", "writer", "pending", "next_id", "read_task")
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.pending = {}
+        self.next_id = 0
+        self.read_task = asyncio.create_task(self.read_responses())
+
+    def fail_pending(self, error):
+        for response_future in self.pending.values():
+            if not response_future.done():
+                response_future.set_exception(error)
+        self.pending.clear()
+
+    async def read_responses(self):
+        while True:
+            response_line = await self.reader.readline()
+            if len(response_line) == 0:
+                self.fail_pending(ConnectionError("Server closed the connection!"))
+                break
+
+            response_json = json.loads(response_line)
+            response_future = self.pending.pop(response_json.get("id"), None)
+            if response_future is None:
+                # e.g. a bad request error, which has no id, so there's no telling which request it's for
+                self.fail_pending(RuntimeError(f"Response for no pending request: {response_json}"))
+            else:
+                response_future.set_result(response_json)
+
+    async def convert(self, folder_input_as_text, save_filename=None):
+        request_id = self.next_id
+        self.next_id += 1
+        response_future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = response_future
+        self.writer.write(json.dumps({"id": request_id, "folder": folder_input_as_text, "save": save_filename}).encode("utf-8") + b"\n")
+        await self.writer.drain()
+        return await response_future
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        self.read_task.cancel()
+
+async def run_load(service, folder_texts, concurrency, write_saves):
+    latencies = []
+    next_index = 0
+
+    async def run_requests():
+        nonlocal next_index
+        while next_index < len(folder_texts):
+            index = next_index
+            next_index += 1
+            start_time = time.perf_counter()
+            await service.convert(folder_texts[index], f"load_test_{index}.sav" if write_saves else None)
+            latencies.append(time.perf_counter() - start_time)
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(run_requests() for i in range(concurrency)))
+    return time.perf_counter() - start_time, sorted(latencies)
+
+async def run_load_tests(service, folder_texts, concurrencies, write_saves, use_tcp):
+    if use_tcp:
+        server_started = asyncio.get_running_loop().create_future()
+        server_task = asyncio.create_task(folder_async.serve(service, 0, server_started.set_result))
+        server = await server_started
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.sockets[0].getsockname()[1], limit=folder_async.MAX_REQUEST_LINE_SIZE)
+        client = TcpFolderClient(reader, writer)
+    else:
+        client = service
+
+    try:
+        for concurrency in concurrencies:
+            seconds, latencies = await run_load(client, folder_texts, concurrency, write_saves)
+            print(f"concurrency {concurrency: >4} | {len(latencies) / seconds: >8.1f} req/s | p50 {get_percentile(latencies, 50) * 1e3: >7.2f}ms | p99 {get_percentile(latencies, 99) * 1e3: >7.2f}ms | max {latencies[-1] * 1e3: >7.2f}ms")
+    finally:
+        if use_tcp:
+            await client.close()
+            server_task.cancel()
+
+def main():
+    ap = argparse.ArgumentParser(allow_abbrev=False)
+    ap.add_argument("-c", "--concurrency", dest="concurrencies", type=int, nargs="+", default=[1, 4, 16, 64], help="Numbers of requests to keep in flight, one run each (default: 1 4 16 64)")
+    ap.add_argument("-n", "--requests", dest="num_requests", type=int, default=500, help="Requests per run (default: 500)")
+    ap.add_argument("-j", "--jobs", dest="jobs", type=int, default=1, help="Processes the service converts folders with (default: 1)")
+    ap.add_argument("--typo-rate", dest="typo_rate", type=float, default=0.05, help="Chance of each line having a typo (default: 0.05)")
+    ap.add_argument("--write", dest="write_saves", action="store_true", help="Also write a save for each valid folder (to a temp directory)")
+    ap.add_argument("--tcp", dest="use_tcp", action="store_true", help="Send requests over the service's TCP protocol instead of calling it directly")
+    ap.add_argument("--profile", dest="profile_name", choices=game_profiles.CONVERTIBLE_PROFILES.keys(), default=game_profiles.DEFAULT_PROFILE.name)
+    args = ap.parse_args()
+
+    profile = game_profiles.CONVERTIBLE_PROFILES[args.profile_name]
+
+    with tempfile.TemporaryDirectory() as tmp_dirname:
+        tmp_dirpath = pathlib.Path(tmp_dirname)
+        folder_texts = make_folder_texts(profile, args.num_requests, args.typo_rate, random.Random(16), tmp_dirpath)
+        saves_dirpath = tmp_dirpath / "tango_saves"
+        saves_dirpath.mkdir()
+
+        # no suggestion cache, so every typo costs a real search
+        context = edit_folder.load_conversion_context(profile, saves_dirpath)
+        service = folder_async.AsyncFolderService(context, args.jobs)
+        print(f"{args.num_requests} folders, typo rate {args.typo_rate}, {args.jobs} job(s){', over TCP' if args.use_tcp else ''}{', writing saves' if args.write_saves else ''}")
+        try:
+            asyncio.run(run_load_tests(service, folder_texts, args.concurrencies, args.write_saves, args.use_tcp))
+        finally:
+            service.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+# =============================================================================
+# MIT License
+# 
+# Copyright (c) 2022 luckytyphlosion
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# =============================================================================
+
+import collections
+import json
+
+import atomic_file
+
+def make_char_masks(s):
+    char_masks = {}
+    for i, char in enumerate(s):
+        char_masks[char] = char_masks.get(char, 0) | (1 << i)
+
+    return char_masks
+
+# Bit-parallel LCS length (Allison-Dix, with Hyyro's update), where bit i of v
+# tracks whether row i of the LCS matrix stays the same in the current column.
+def lcs_length_with_masks(a, b_char_masks, b_len):
+    all_bits = (1 << b_len) - 1
+    v = all_bits
+    for char in a:
+        u = v & b_char_masks.get(char, 0)
+        v = ((v + u) | (v - u)) & all_bits
+
+    return b_len - bin(v).count("1")
+
+def lcs_length(a, b):
+    return lcs_length_with_masks(a, make_char_masks(b), len(b))
+
+# Bit-parallel optimal string alignment distance (Hyyro 2002), i.e. Levenshtein with adjacent
+# transpositions. Unlike unrestricted Damerau-Levenshtein, a transposed pair can't
+# be edited again, so e.g. "ca" -> "abc" is 3 instead of 2.
+def osa_distance(a, b):
+    b_len = len(b)
+    if b_len == 0:
+        return len(a)
+
+    b_char_masks = make_char_masks(b)
+    all_bits = (1 << b_len) - 1
+    last_bit = 1 << (b_len - 1)
+    vp = all_bits
+    vn = 0
+    d0 = 0
+    prev_pm = 0
+    distance = b_len
+
+    for char in a:
+        pm = b_char_masks.get(char, 0)
+        tr = (((~d0) & pm) << 1) & prev_pm
+        d0 = ((((pm & vp) + vp) ^ vp) | pm | vn | tr) & all_bits
+        hp = (vn | ~(d0 | vp)) & all_bits
+        hn = d0 & vp
+        if hp & last_bit:
+            distance += 1
+        elif hn & last_bit:
+            distance -= 1
+
+        hp = ((hp << 1) | 1) & all_bits
+        hn = (hn << 1) & all_bits
+        vp = (hn | ~(d0 | hp)) & all_bits
+        vn = hp & d0
+        prev_pm = pm
+
+    return distance
+
+# Given every name tied for the longest common subsequence with unknown_name (in dict order),
+# decide whether the match is close enough and break ties.
+def pick_most_similar_name(unknown_name, most_similar_names, most_similar_distance, chip_code_tiebreak=None, exe45_chips_uncased=None):
+    possible_most_similar_name_shortest_len = min(len(most_similar_name) for most_similar_name in most_similar_names)
+    unknown_name_len = len(unknown_name)
+
+    min_len = min(unknown_name_len, possible_most_similar_name_shortest_len)
+    min_len_minus_most_similar_distance = min_len - most_similar_distance
+    # some metric
+    # maybe will explain later
+    if min_len <= 4 and min_len_minus_most_similar_distance > 1 or min_len > 4 and min_len_minus_most_similar_distance > 2:
+        return None, (most_similar_distance, min_len_minus_most_similar_distance)
+    else:
+        if len(most_similar_names) == 1:
+            most_similar_name = most_similar_names[0]
+        else:
+            # tiebreak somehow
+            # pick the name with the least number of characters that do not appear in the unknown name
+            unknown_name_chars = set(unknown_name)
+            most_similar_names_round_2 = []
+            most_similar_name_num_uncommon_chars = 100
+
+            for most_similar_name_candidate in most_similar_names:
+                cur_similar_name_num_uncommon_chars = len(set(most_similar_name_candidate) - unknown_name_chars)
+                if cur_similar_name_num_uncommon_chars < most_similar_name_num_uncommon_chars:
+                    most_similar_names_round_2 = [most_similar_name_candidate]
+                    most_similar_name_num_uncommon_chars = cur_similar_name_num_uncommon_chars
+                elif cur_similar_name_num_uncommon_chars == most_similar_name_num_uncommon_chars:
+                    most_similar_names_round_2.append(most_similar_name_candidate)
+
+            if len(most_similar_names_round_2) != 1 and chip_code_tiebreak is not None:
+                most_similar_names_round_3 = []
+                for most_similar_name_candidate in most_similar_names_round_2:
+                    if chip_code_tiebreak in exe45_chips_uncased[most_similar_name_candidate].codes:
+                        most_similar_names_round_3.append(most_similar_name_candidate)
+
+                if len(most_similar_names_round_3) != 0:
+                    most_similar_names_round_2 = most_similar_names_round_3
+
+            most_similar_name = most_similar_names_round_2[0]
+
+            min_len = min(unknown_name_len, len(most_similar_name))
+            min_len_minus_most_similar_distance = min_len - most_similar_distance
+
+        return most_similar_name, (most_similar_distance, min_len_minus_most_similar_distance)
+
+class LcsNameMatcher:
+    __slots__ = ("names", "name_lens", "name_char_masks", "char_postings")
+
+    # Indexes each name by its character counts. The number of characters two strings have in
+    # common (counting repeats) is an upper bound on their LCS, so candidates can be visited from
+    # the highest bound down and the scan stopped once no remaining name can beat the best LCS.
+    def __init__(self, all_names):
+        self.names = list(all_names.keys())
+        self.name_lens = [len(name) for name in self.names]
+        self.name_char_masks = [make_char_masks(name) for name in self.names]
+        char_postings = collections.defaultdict(list)
+
+        for name_index, name in enumerate(self.names):
+            for char, char_count in collections.Counter(name).items():
+                char_postings[char].append((name_index, char_count))
+
+        self.char_postings = dict(char_postings)
+
+    def find_most_similar_names(self, unknown_name):
+        lcs_upper_bounds = [0] * len(self.names)
+        char_postings = self.char_postings
+
+        for char, unknown_char_count in collections.Counter(unknown_name).items():
+            for name_index, char_count in char_postings.get(char, ()):
+                lcs_upper_bounds[name_index] += char_count if char_count < unknown_char_count else unknown_char_count
+
+        most_similar_name_indices = []
+        most_similar_distance = 0
+
+        for name_index in sorted(range(len(self.names)), key=lcs_upper_bounds.__getitem__, reverse=True):
+            lcs_upper_bound = lcs_upper_bounds[name_index]
+            if lcs_upper_bound < most_similar_distance or lcs_upper_bound == 0:
+                break
+
+            cur_distance = lcs_length_with_masks(unknown_name, self.name_char_masks[name_index], self.name_lens[name_index])
+            if cur_distance > most_similar_distance:
+                most_similar_distance = cur_distance
+                most_similar_name_indices = [name_index]
+            elif cur_distance == most_similar_distance:
+                most_similar_name_indices.append(name_index)
+
+        # nothing in common with any name, so every name ties at 0 like in the full scan
+        if most_similar_distance == 0:
+            return list(self.names), 0
+
+        # ties are broken by dict order, so restore it
+        most_similar_name_indices.sort()
+        return [self.names[name_index] for name_index in most_similar_name_indices], most_similar_distance
+
+    def get_most_similar(self, unknown_name, chip_code_tiebreak=None, exe45_chips_uncased=None):
+        most_similar_names, most_similar_distance = self.find_most_similar_names(unknown_name)
+        return pick_most_similar_name(unknown_name, most_similar_names, most_similar_distance, chip_code_tiebreak, exe45_chips_uncased)
+
+# for the matching functions that don't have an index
+class ScanNameMatcher:
+    __slots__ = ("get_most_similar_from_dict_func", "all_names")
+
+    def __init__(self, get_most_similar_from_dict_func, all_names):
+        self.get_most_similar_from_dict_func = get_most_similar_from_dict_func
+        self.all_names = all_names
+
+    def get_most_similar(self, unknown_name, **kwargs):
+        return self.get_most_similar_from_dict_func(unknown_name, self.all_names, **kwargs)
+
+SUGGESTION_CACHE_VERSION = 1
+SUGGESTION_CACHE_MAX_SIZE = 4096
+
+def lists_to_tuples(value):
+    if isinstance(value, list):
+        return tuple(lists_to_tuples(element) for element in value)
+    else:
+        return value
+
+# Remembers the suggestions for names that didn't match exactly, across runs.
+# fingerprint identifies the name tables the suggestions were made against,
+# and the saved cache is thrown away if it doesn't match.
+class SuggestionCache:
+    __slots__ = ("filepath", "fingerprint", "max_size", "entries", "new_entries", "hits", "misses", "dirty")
+
+    def __init__(self, filepath, fingerprint, max_size=SUGGESTION_CACHE_MAX_SIZE):
+        self.filepath = filepath
+        self.fingerprint = fingerprint
+        self.max_size = max_size
+        self.entries = collections.OrderedDict()
+        self.new_entries = []
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+
+    def load(self):
+        try:
+            with open(self.filepath, "r") as f:
+                suggestion_cache_json = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if not isinstance(suggestion_cache_json, dict) or suggestion_cache_json.get("version") != SUGGESTION_CACHE_VERSION or suggestion_cache_json.get("fingerprint") != self.fingerprint:
+            return
+
+        for key, suggestion in suggestion_cache_json["entries"]:
+            self.store(lists_to_tuples(key), lists_to_tuples(suggestion))
+
+        self.dirty = False
+
+    def save(self):
+        if not self.dirty:
+            return
+
+        suggestion_cache_json = {
+            "version": SUGGESTION_CACHE_VERSION,
+            "fingerprint": self.fingerprint,
+            "entries": list(self.entries.items())
+        }
+
+        try:
+            # other processes may be loading or saving the cache at the same time
+            atomic_file.write_file_atomic(self.filepath, json.dumps(suggestion_cache_json).encode("utf-8"), fsync=False)
+        except OSError:
+            # the cache is only an optimization
+            return
+
+        self.dirty = False
+
+    def store(self, key, suggestion):
+        self.entries[key] = suggestion
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+        self.dirty = True
+
+    def lookup(self, key):
+        suggestion = self.entries.get(key)
+        if suggestion is None:
+            self.misses += 1
+        else:
+            self.entries.move_to_end(key)
+            self.hits += 1
+
+        return suggestion
+
+    def add(self, key, suggestion):
+        self.store(key, suggestion)
+        self.new_entries.append((key, suggestion))
+
+    # Batch workers each have their own copy of the cache, so they send back what changed
+    # and the main process applies it to its copy.
+    def take_changes(self):
+        changes = (self.new_entries, self.hits, self.misses)
+        self.new_entries = []
+        self.hits = 0
+        self.misses = 0
+        return changes
+
+    def apply_changes(self, changes):
+        new_entries, hits, misses = changes
+        for key, suggestion in new_entries:
+            self.store(key, suggestion)
+
+        self.hits += hits
+        self.misses += misses
+
+    @property
+    def hit_rate(self):
+        num_lookups = self.hits + self.misses
+        return self.hits / num_lookups if num_lookups != 0 else 0.0
+
+    def get_stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 4),
+            "size": len(self.entries)
+        }
+
+class CachedNameMatcher:
+    __slots__ = ("name_matcher", "suggestion_cache", "key_prefix")
+
+    def __init__(self, name_matcher, suggestion_cache, key_prefix):
+        self.name_matcher = name_matcher
+        self.suggestion_cache = suggestion_cache
+        self.key_prefix = key_prefix
+
+    def get_most_similar(self, unknown_name, chip_code_tiebreak=None, **kwargs):
+        key = self.key_prefix + (unknown_name, chip_code_tiebreak)
+        suggestion = self.suggestion_cache.lookup(key)
+        if suggestion is None:
+            if chip_code_tiebreak is not None:
+                kwargs["chip_code_tiebreak"] = chip_code_tiebreak
+            suggestion = self.name_matcher.get_most_similar(unknown_name, **kwargs)
+            self.suggestion_cache.add(key, suggestion)
+
+        return suggestion
@@ -1,3 +1,7 @@
 cd /D "%~dp0"
-call data\edit_folder.exe %1
+if exist data\folder_client.exe (
+    call data\folder_client.exe %1
+) else (
+    call data\edit_folder.exe %1
+)
 pause
\ No newline at end of file
@@ -0,0 +1,92 @@
+# =============================================================================
+# MIT License
+# 
+# Copyright (c) 2022 luckytyphlosion
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# =============================================================================
+
+# Remembers which replays chip_usage has already turned into folders, so a run only has to
+# extract the replays added since the last one.
+#
+# The ledger is a JSON lines file with one record per replay, appended to as replays are
+# extracted: {"hash": content hash, "replay": path, "size", "mtime_ns", "folders": {name: folder info}}
+# chip_usage keeps the chip usage counts in a separate file, along with how many ledger records they include.
+
+import json
+import os
+import extraction_manifest
+
+def hash_replay_file(replay_filepath):
+    with open(replay_filepath, "rb") as f:
+        return extraction_manifest.hash_bytes(f.read())
+
+class ReplayLedger:
+    __slots__ = ("filepath", "records", "records_by_replay")
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.records = {}
+        self.records_by_replay = {}
+
+    def load(self):
+        try:
+            with open(self.filepath, "r") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # cut off by a run that was killed while appending
+                        continue
+                    self.add_record(record)
+        except FileNotFoundError:
+            pass
+
+    def add_record(self, record):
+        self.records[record["hash"]] = record
+        self.records_by_replay[record["replay"]] = record
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, replay_hash):
+        return replay_hash in self.records
+
+    # Returns (hash, stat fields) of replay_filepath. Replays that are already recorded under
+    # the same path, size and mtime aren't read again.
+    def get_replay_hash(self, replay_filepath):
+        replay_stat = os.stat(replay_filepath)
+        record = self.records_by_replay.get(str(replay_filepath))
+        if record is not None and extraction_manifest.is_stat_unchanged(record, replay_stat):
+            return record["hash"], record
+
+        return hash_replay_file(replay_filepath), extraction_manifest.make_stat_fields(replay_stat)
+
+    # appended right away so a run that's killed keeps the replays it already extracted
+    def append(self, replay_hash, replay_filepath, stat_fields, folder_infos):
+        record = {"hash": replay_hash, "replay": str(replay_filepath), "size": stat_fields["size"], "mtime_ns": stat_fields["mtime_ns"], "folders": folder_infos}
+        with open(self.filepath, "a") as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+        self.add_record(record)
+        return record
+
+    def iter_folder_infos(self):
+        for record in self.records.values():
+            yield from record["folders"].values()
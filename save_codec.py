@@ -0,0 +1,230 @@
+# =============================================================================
+# MIT License
+# 
+# Copyright (c) 2022 luckytyphlosion
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# =============================================================================
+
+import functools
+import mmap
+import struct
+import zlib
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Each masking backend XORs the first `size` bytes of save_data with mask_byte in place.
+
+def mask_bytes_loop(save_data, mask_byte, size):
+    for i in range(size):
+        save_data[i] ^= mask_byte
+
+@functools.lru_cache(maxsize=256)
+def get_mask_translate_table(mask_byte):
+    return bytes(i ^ mask_byte for i in range(256))
+
+def mask_bytes_translate(save_data, mask_byte, size):
+    save_data[:size] = save_data[:size].translate(get_mask_translate_table(mask_byte))
+
+def mask_bytes_int(save_data, mask_byte, size):
+    masked_value = int.from_bytes(save_data[:size], "little") ^ int.from_bytes(bytes((mask_byte,)) * size, "little")
+    save_data[:size] = masked_value.to_bytes(size, "little")
+
+def mask_bytes_numpy(save_data, mask_byte, size):
+    save_data_as_array = numpy.frombuffer(save_data, dtype=numpy.uint8, count=size)
+    numpy.bitwise_xor(save_data_as_array, mask_byte, out=save_data_as_array)
+
+# in order of preference
+MASK_BACKENDS = {
+    "numpy": mask_bytes_numpy,
+    "translate": mask_bytes_translate,
+    "int": mask_bytes_int,
+    "loop": mask_bytes_loop,
+}
+
+def is_mask_backend_available(backend_name):
+    if backend_name == "numpy":
+        return numpy is not None
+    else:
+        return backend_name in MASK_BACKENDS
+
+def get_available_mask_backend_names():
+    return [backend_name for backend_name in MASK_BACKENDS.keys() if is_mask_backend_available(backend_name)]
+
+def get_mask_backend(backend_name=None):
+    if backend_name is None:
+        backend_name = get_available_mask_backend_names()[0]
+    elif not is_mask_backend_available(backend_name):
+        backend_name = "loop"
+
+    return MASK_BACKENDS[backend_name]
+
+default_mask_backend = get_mask_backend()
+
+def mask_save(save_data, mask_offset, save_size, mask_backend=None):
+    mask = save_data[mask_offset:mask_offset+4]
+    mask_first_byte = mask[0]
+
+    if mask_backend is None:
+        mask_backend = default_mask_backend
+
+    # "We only actually need to use the first byte of the mask, even though it's 32 bits long."
+    try:
+        mask_backend(save_data, mask_first_byte, save_size)
+    except (TypeError, ValueError, BufferError):
+        # buffer type not supported by the fast backend (e.g. read-only or resizing not allowed)
+        mask_bytes_loop(save_data, mask_first_byte, save_size)
+
+    save_data[mask_offset:mask_offset+4] = mask
+
+# The low half of Adler-32 is 1 + the byte sum mod 65521, which is exact
+# as long as the chunk is at most 256 bytes (256 * 0xff + 1 < 65521).
+ADLER32_EXACT_SUM_CHUNK_SIZE = 256
+
+def sum_bytes(data_view):
+    data_len = len(data_view)
+    if data_len <= ADLER32_EXACT_SUM_CHUNK_SIZE:
+        return (zlib.adler32(data_view) & 0xffff) - 1
+
+    return sum((zlib.adler32(data_view[i:i+ADLER32_EXACT_SUM_CHUNK_SIZE]) & 0xffff) for i in range(0, data_len, ADLER32_EXACT_SUM_CHUNK_SIZE)) - (data_len + ADLER32_EXACT_SUM_CHUNK_SIZE - 1) // ADLER32_EXACT_SUM_CHUNK_SIZE
+
+def calc_checksum(save_data, checksum_offset, save_size, checksum_adjust):
+    with memoryview(save_data) as save_data_view:
+        # the checksum field itself isn't part of the checksum
+        checksum = sum_bytes(save_data_view[:save_size]) - sum_bytes(save_data_view[checksum_offset:checksum_offset+4])
+
+    return (checksum + checksum_adjust) & 0xffffffff
+
+def calc_checksum_and_expected_checksum(save_data, checksum_offset, save_size, checksum_adjust):
+    checksum = calc_checksum(save_data, checksum_offset, save_size, checksum_adjust)
+    expected_checksum = struct.unpack_from("<I", save_data, checksum_offset)[0]
+    return checksum, expected_checksum
+
+CHECKSUM_DIFF_CHUNK_SIZE = 0x100
+
+def merge_ranges(ranges):
+    merged_ranges = []
+    for start, end in sorted(ranges):
+        if len(merged_ranges) != 0 and start <= merged_ranges[-1][1]:
+            merged_ranges[-1][1] = max(merged_ranges[-1][1], end)
+        else:
+            merged_ranges.append([start, end])
+
+    return [(start, end) for start, end in merged_ranges]
+
+class ChecksumTracker:
+    __slots__ = ("checksum", "checksum_offset", "save_size", "snapshot", "dirty_ranges")
+
+    # checksum must be the checksum of save_data as it is right now
+    def __init__(self, save_data, checksum, checksum_offset, save_size):
+        self.checksum = checksum
+        self.checksum_offset = checksum_offset
+        self.save_size = save_size
+        self.snapshot = bytearray(save_data[:save_size])
+        self.dirty_ranges = []
+
+    # If any ranges are marked, only those are diffed on the next update,
+    # so every write made since the last update must be covered by them.
+    def mark_dirty(self, start, end):
+        self.dirty_ranges.append((start, end))
+
+    def find_changed_ranges(self, save_data_view):
+        if len(self.dirty_ranges) != 0:
+            candidate_ranges = merge_ranges((max(start, 0), min(end, self.save_size)) for start, end in self.dirty_ranges)
+        else:
+            candidate_ranges = ((0, self.save_size),)
+
+        snapshot = self.snapshot
+        changed_ranges = []
+
+        for candidate_start, candidate_end in candidate_ranges:
+            for chunk_start in range(candidate_start, candidate_end, CHECKSUM_DIFF_CHUNK_SIZE):
+                chunk_end = min(chunk_start + CHECKSUM_DIFF_CHUNK_SIZE, candidate_end)
+                if save_data_view[chunk_start:chunk_end] != snapshot[chunk_start:chunk_end]:
+                    if len(changed_ranges) != 0 and changed_ranges[-1][1] == chunk_start:
+                        changed_ranges[-1] = (changed_ranges[-1][0], chunk_end)
+                    else:
+                        changed_ranges.append((chunk_start, chunk_end))
+
+        return changed_ranges
+
+    def update(self, save_data):
+        checksum_field_start = self.checksum_offset
+        checksum_field_end = self.checksum_offset + 4
+        snapshot = self.snapshot
+        checksum_delta = 0
+
+        with memoryview(save_data) as save_data_view:
+            for start, end in self.find_changed_ranges(save_data_view):
+                checksum_delta += sum_bytes(save_data_view[start:end]) - sum_bytes(snapshot[start:end])
+
+                overlap_start = max(start, checksum_field_start)
+                overlap_end = min(end, checksum_field_end)
+                if overlap_start < overlap_end:
+                    checksum_delta -= sum_bytes(save_data_view[overlap_start:overlap_end]) - sum_bytes(snapshot[overlap_start:overlap_end])
+
+                snapshot[start:end] = save_data_view[start:end]
+
+        self.dirty_ranges.clear()
+        self.checksum = (self.checksum + checksum_delta) & 0xffffffff
+        return self.checksum
+
+# Applies edits straight to a save that is still masked, e.g. an mmapped save file.
+# edits are (offset, new unmasked bytes) with offsets relative to the start of SRAM, and must not
+# touch the mask or the checksum. Only the edited bytes are unmasked and remasked, and the checksum
+# is patched by the difference in byte sums, so the rest of the save is never read.
+# Returns the changed ranges as offsets into raw_save_data.
+def patch_masked_save(raw_save_data, sram_start_offset, mask_offset, checksum_offset, edits):
+    mask_table = get_mask_translate_table(raw_save_data[sram_start_offset + mask_offset])
+    checksum_delta = 0
+    changed_ranges = []
+
+    for offset, new_data in edits:
+        end_offset = offset + len(new_data)
+        if offset < mask_offset + 4 and mask_offset < end_offset or offset < checksum_offset + 4 and checksum_offset < end_offset:
+            raise ValueError(f"Edit at 0x{offset:x}-0x{end_offset:x} overlaps the mask or checksum!")
+
+        raw_start = sram_start_offset + offset
+        raw_end = sram_start_offset + end_offset
+        old_data = bytes(raw_save_data[raw_start:raw_end]).translate(mask_table)
+        if old_data == new_data:
+            continue
+
+        checksum_delta += sum_bytes(new_data) - sum_bytes(old_data)
+        raw_save_data[raw_start:raw_end] = bytes(new_data).translate(mask_table)
+        changed_ranges.append((raw_start, raw_end))
+
+    if len(changed_ranges) != 0:
+        raw_checksum_start = sram_start_offset + checksum_offset
+        checksum = struct.unpack("<I", bytes(raw_save_data[raw_checksum_start:raw_checksum_start+4]).translate(mask_table))[0]
+        checksum = (checksum + checksum_delta) & 0xffffffff
+        raw_save_data[raw_checksum_start:raw_checksum_start+4] = struct.pack("<I", checksum).translate(mask_table)
+        changed_ranges.append((raw_checksum_start, raw_checksum_start + 4))
+
+    return changed_ranges
+
+# mmap.flush needs page aligned offsets
+def flush_mmap_ranges(save_mmap, ranges):
+    page_size = mmap.ALLOCATIONGRANULARITY
+    page_ranges = merge_ranges((start - start % page_size, min(end + (-end) % page_size, len(save_mmap))) for start, end in ranges)
+    for page_start, page_end in page_ranges:
+        save_mmap.flush(page_start, page_end - page_start)
@@ -0,0 +1,84 @@
+# =============================================================================
+# MIT License
+# 
+# Copyright (c) 2022 luckytyphlosion
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# =============================================================================
+
+import multiprocessing
+import os
+import pathlib
+import random
+import time
+
+import atomic_file
+import edit_folder
+import game_profiles
+import testing_support
+
+def test_write_file_atomic(tmp_path):
+    filepath = tmp_path / "file.bin"
+    atomic_file.write_file_atomic(filepath, b"old")
+    atomic_file.write_file_atomic(filepath, b"new", fsync=False)
+    assert filepath.read_bytes() == b"new"
+    assert [path.name for path in tmp_path.iterdir()] == ["file.bin"]
+
+def test_killed_writer_leaves_no_torn_saves(tmp_path):
+    profile = game_profiles.BN45_US_PVP
+    num_saves = 4
+    rng = random.Random(0)
+
+    # kill a writer at a random point while it rewrites the same saves over and over
+    for kill_num in range(8):
+        writer = multiprocessing.Process(target=testing_support.write_saves_forever, args=(tmp_path, profile, num_saves, True))
+        writer.start()
+        time.sleep(0.05 + rng.random() * 0.1)
+        writer.kill()
+        writer.join()
+
+        assert testing_support.count_torn_saves(tmp_path, profile) == 0
+        # a writer killed between staging and renaming leaves its temp file, which is all cleanup has to remove
+        for filepath in tmp_path.iterdir():
+            assert filepath.suffix == ".sav" or filepath.name.endswith(atomic_file.TEMP_FILE_SUFFIX), filepath
+
+        atomic_file.remove_stale_temp_files(tmp_path, 0)
+        assert sorted(filepath.name for filepath in tmp_path.iterdir()) == sorted(f"save_{i}.sav" for i in range(num_saves))
+
+    template_save_size = pathlib.Path(profile.template_save_filename).stat().st_size
+    for save_filepath in tmp_path.iterdir():
+        assert save_filepath.stat().st_size == template_save_size
+        edit_folder.read_save_from_file(save_filepath, profile, "", "")
+
+def test_remove_stale_temp_files(tmp_path):
+    stale_temp_filepath = atomic_file.stage_file(tmp_path / "stale.sav", b"stale", fsync=False)
+    old_mtime = time.time() - atomic_file.STALE_TEMP_FILE_AGE - 10
+    os.utime(stale_temp_filepath, (old_mtime, old_mtime))
+    fresh_temp_filepath = atomic_file.stage_file(tmp_path / "fresh.sav", b"fresh", fsync=False)
+    old_save_filepath = tmp_path / "old.sav"
+    old_save_filepath.write_bytes(b"old")
+    os.utime(old_save_filepath, (old_mtime, old_mtime))
+
+    assert atomic_file.remove_stale_temp_files(tmp_path) == [stale_temp_filepath]
+    # a temp file that may belong to a write that's still running and files that aren't temp files are kept
+    assert sorted(tmp_path.iterdir()) == sorted((fresh_temp_filepath, old_save_filepath))
+
+    assert atomic_file.remove_stale_temp_files(tmp_path, 0) == [fresh_temp_filepath]
+    assert list(tmp_path.iterdir()) == [old_save_filepath]
+    assert atomic_file.remove_stale_temp_files(tmp_path / "missing") == []
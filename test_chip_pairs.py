@@ -0,0 +1,118 @@
+# =============================================================================
+# MIT License
+# 
+# Copyright (c) 2022 luckytyphlosion
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# =============================================================================
+
+import pytest
+
+import chip_pairs
+import folder_store
+
+# 4 folders, by chip id:
+#   folder 0: 1, 2, 3
+#   folder 1: 1, 2
+#   folder 2: 2, 3
+#   folder 3: 4
+FOLDER_CHIP_BITMAPS = [(1, 0b0011), (2, 0b0111), (3, 0b0101), (4, 0b1000)]
+CHIP_USAGE = {1: 2, 2: 3, 3: 2, 4: 1}
+CHIP_PAIRS = {(1, 2): 2, (1, 3): 1, (2, 3): 2}
+
+def make_pair_counts():
+    pair_counts = chip_pairs.ChipPairCounts()
+    pair_counts.add_counts(4, CHIP_USAGE, CHIP_PAIRS)
+    return pair_counts
+
+def test_count_chip_pairs():
+    assert folder_store.count_chip_pairs(FOLDER_CHIP_BITMAPS) == CHIP_PAIRS
+
+def test_pair_counts():
+    pair_counts = make_pair_counts()
+
+    assert pair_counts.get_pair_count(1, 2) == 2
+    assert pair_counts.get_pair_count(2, 1) == 2
+    assert pair_counts.get_pair_count(3, 1) == 1
+    assert pair_counts.get_pair_count(1, 4) == 0
+    assert pair_counts.get_pair_count(2, 2) == 3
+    assert pair_counts.get_pair_count(5, 5) == 0
+
+    assert pair_counts.get_conditional_probability(1, 2) == 1.0
+    assert pair_counts.get_conditional_probability(2, 1) == pytest.approx(2 / 3)
+    assert pair_counts.get_conditional_probability(4, 1) == 0.0
+    assert pair_counts.get_conditional_probability(5, 1) == 0.0
+
+    # 1 and 2 are together in 2 of 4 folders, independently it'd be 2/4 * 3/4 of them
+    assert pair_counts.get_lift(1, 2) == pytest.approx(4 / 3)
+    assert pair_counts.get_lift(2, 1) == pytest.approx(4 / 3)
+    assert pair_counts.get_lift(1, 3) == pytest.approx(1.0)
+    assert pair_counts.get_lift(1, 4) == 0.0
+    assert pair_counts.get_lift(1, 5) == 0.0
+
+    assert sorted(pair_counts.iter_pair_stats()) == pytest.approx([
+        (1, 2, 2, 1.0, 2 / 3, 4 / 3),
+        (1, 3, 1, 0.5, 0.5, 1.0),
+        (2, 3, 2, 2 / 3, 1.0, 4 / 3),
+    ])
+    assert sorted(pair_stat[:3] for pair_stat in pair_counts.iter_pair_stats(2)) == [(1, 2, 2), (2, 3, 2)]
+
+    assert pair_counts.get_matrix([1, 2, 3, 4]) == [
+        [2, 2, 1, 0],
+        [2, 3, 2, 0],
+        [1, 2, 2, 0],
+        [0, 0, 0, 1],
+    ]
+    assert pair_counts.get_matrix([4, 1]) == [[1, 0], [0, 2]]
+
+def test_empty_pair_counts():
+    pair_counts = chip_pairs.ChipPairCounts()
+    pair_counts.add_counts(0, {}, {})
+
+    assert pair_counts.num_folders == 0
+    assert pair_counts.get_pair_count(1, 2) == 0
+    assert pair_counts.get_conditional_probability(1, 2) == 0.0
+    assert pair_counts.get_lift(1, 2) == 0.0
+    assert list(pair_counts.iter_pair_stats()) == []
+    assert pair_counts.get_matrix([1, 2]) == [[0, 0], [0, 0]]
+    assert pair_counts.get_matrix([]) == []
+
+def test_pair_stats_groups():
+    pair_stats = chip_pairs.ChipPairStats()
+    # folders 0 and 1, then folders 2 and 3, then a group with no folders
+    pair_stats.add_counts("0.6.0", 1, 2, {1: 2, 2: 2, 3: 1}, {(1, 2): 2, (1, 3): 1, (2, 3): 1})
+    pair_stats.add_counts("0.5.0", 2, 2, {2: 1, 3: 1, 4: 1}, {(2, 3): 1})
+    pair_stats.add_counts("0.6.0", 3, 0, {}, {})
+
+    assert pair_stats.get_versions() == ["0.6.0", "0.5.0"]
+    assert pair_stats.get_navi_ids() == [1, 2, 3]
+
+    all_pair_counts = pair_stats.get_pair_counts()
+    expected_pair_counts = make_pair_counts()
+    assert (all_pair_counts.num_folders, all_pair_counts.chip_usage, all_pair_counts.chip_pairs) == (expected_pair_counts.num_folders, expected_pair_counts.chip_usage, expected_pair_counts.chip_pairs)
+
+    version_pair_counts = pair_stats.get_pair_counts(versions=("0.5.0",))
+    assert version_pair_counts.num_folders == 2
+    assert version_pair_counts.get_lift(2, 3) == pytest.approx(2.0)
+    assert pair_stats.get_pair_counts(navi_ids=(1, 3)).get_matrix([1, 2]) == [[2, 2], [2, 2]]
+
+    empty_pair_counts = pair_stats.get_pair_counts(navi_ids=(3,))
+    assert empty_pair_counts.num_folders == 0
+    assert list(empty_pair_counts.iter_pair_stats()) == []
+    assert pair_stats.get_pair_counts(versions=("0.1.0",)).get_matrix([1]) == [[0]]
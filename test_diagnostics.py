@@ -0,0 +1,108 @@
+# =============================================================================
+# MIT License
+# 
+# Copyright (c) 2022 luckytyphlosion
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# =============================================================================
+
+import pathlib
+
+import diagnostics
+import edit_folder
+import game_profiles
+
+def make_diagnostics():
+    return [
+        diagnostics.error(diagnostics.UNKNOWN_CHIP, "Unknown chip Canon!", 3, (0, 5), "Cannon"),
+        diagnostics.warning(diagnostics.WRONG_LINE_COUNT, "Input folder should be 30 lines long!"),
+        diagnostics.error(diagnostics.TOO_MANY_MEGAS, "Too many megas!"),
+        diagnostics.error(diagnostics.EMPTY_LINE, "Line is empty!", 2),
+        diagnostics.error(diagnostics.MISSING_CHIP_CODE, "Missing code!", 3, (0, 5)),
+    ]
+
+def test_diagnostic_json():
+    folder_diagnostics = make_diagnostics()
+    assert folder_diagnostics[0].to_json() == {"code": "unknown-chip", "severity": "error", "message": "Unknown chip Canon!", "line": 3, "span": (0, 5), "suggestion": "Cannon"}
+    assert folder_diagnostics[1].to_json() == {"code": "wrong-line-count", "severity": "warning", "message": "Input folder should be 30 lines long!"}
+    assert folder_diagnostics[0].is_error
+    assert not folder_diagnostics[1].is_error
+
+def test_diagnostic_groups():
+    folder_diagnostics = make_diagnostics()
+    assert diagnostics.has_errors(folder_diagnostics)
+    assert not diagnostics.has_errors(folder_diagnostics[1:2])
+    assert not diagnostics.has_errors([])
+
+    assert diagnostics.get_line_errors(folder_diagnostics) == [
+        {"line": 2, "messages": ["Line is empty!"]},
+        {"line": 3, "messages": ["Unknown chip Canon!", "Missing code!"]},
+    ]
+    assert diagnostics.get_folder_errors(folder_diagnostics) == ["Too many megas!"]
+    assert diagnostics.get_warnings(folder_diagnostics) == ["Input folder should be 30 lines long!"]
+
+def test_render_errors():
+    assert diagnostics.render_errors(make_diagnostics()) == (
+        "Provided folder has errors:\n"
+        "At line 2: Line is empty!\n"
+        "At line 3:\n"
+        "    Unknown chip Canon!\n"
+        "    Missing code!\n"
+        "Too many megas!\n"
+    )
+
+def test_count_diagnostic_codes():
+    report_entries = [
+        {"diagnostics": [diagnostic.to_json() for diagnostic in make_diagnostics()]},
+        {"diagnostics": [diagnostics.error(diagnostics.EMPTY_LINE, "Line is empty!", 5).to_json()]},
+        {"ok": True},
+    ]
+    diagnostic_code_counts = diagnostics.count_diagnostic_codes(report_entries)
+    assert diagnostic_code_counts == {"empty-line": 2, "unknown-chip": 1, "wrong-line-count": 1, "too-many-megas": 1, "missing-chip-code": 1}
+    assert next(iter(diagnostic_code_counts)) == "empty-line"
+
+def get_line_diagnostics(folder_lines, context):
+    validation = edit_folder.validate_folder_text("\n".join(folder_lines), context)
+    return {(diagnostic.line, diagnostic.code): diagnostic for diagnostic in validation.diagnostics}
+
+def test_folder_diagnostic_spans(tmp_path):
+    profile = game_profiles.BN6F
+    context = edit_folder.load_conversion_context(profile, tmp_path)
+    template_save_filepath = pathlib.Path(profile.template_save_filename)
+    folder_lines = edit_folder.read_save_folder_texts(template_save_filepath, profile)[1]["MegaMan"].split("\n")
+    assert folder_lines[:3] == ["Cannon A", "Cannon A", "Cannon B"]
+
+    assert edit_folder.validate_folder_text("\n".join(folder_lines), context).diagnostics == []
+
+    folder_lines[0] = "Canon A"
+    folder_lines[1] = "  Cannon   Z"
+    folder_lines[2] = "Cannon B junk"
+    folder_lines[3] = ""
+    line_diagnostics = get_line_diagnostics(folder_lines, context)
+    assert set(line_diagnostics.keys()) == {(1, diagnostics.UNKNOWN_CHIP), (2, diagnostics.WRONG_CHIP_CODE), (3, diagnostics.UNKNOWN_TEXT_AFTER_CHIP), (4, diagnostics.EMPTY_LINE)}
+
+    # spans are columns of the line as written
+    for (line_num, code), diagnostic in line_diagnostics.items():
+        if diagnostic.span is not None:
+            span_start, span_end = diagnostic.span
+            assert folder_lines[line_num - 1][span_start:span_end] == {diagnostics.UNKNOWN_CHIP: "Canon", diagnostics.WRONG_CHIP_CODE: "Z", diagnostics.UNKNOWN_TEXT_AFTER_CHIP: "junk"}[code]
+
+    assert line_diagnostics[(1, diagnostics.UNKNOWN_CHIP)].suggestion == "Cannon"
+    assert line_diagnostics[(3, diagnostics.UNKNOWN_TEXT_AFTER_CHIP)].suggestion == "[REG]"
+    assert line_diagnostics[(4, diagnostics.EMPTY_LINE)].span is None
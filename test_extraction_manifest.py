@@ -0,0 +1,149 @@
+# =============================================================================
+# MIT License
+# 
+# Copyright (c) 2022 luckytyphlosion
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# =============================================================================
+
+import os
+import shutil
+import time
+
+import edit_folder
+import extraction_manifest
+import game_profiles
+
+HOUR_NS = 3600 * 1000000000
+
+def copy_template_save(tmp_path, profile):
+    save_filepath = tmp_path / "exe6f.sav"
+    shutil.copyfile(profile.template_save_filename, save_filepath)
+    return save_filepath
+
+def set_mtime_ns(filepath, mtime_ns):
+    os.utime(filepath, ns=(mtime_ns, mtime_ns))
+
+def test_racy_stat_isnt_trusted(tmp_path):
+    save_filepath = tmp_path / "save.sav"
+    save_filepath.write_bytes(b"folder")
+
+    # just written, so the same mtime doesn't mean the same contents
+    save_stat = os.stat(save_filepath)
+    entry = extraction_manifest.make_stat_fields(save_stat)
+    assert entry == {"size": 6, "mtime_ns": None}
+    assert not extraction_manifest.is_stat_unchanged(entry, save_stat)
+
+    old_mtime_ns = time.time_ns() - HOUR_NS
+    set_mtime_ns(save_filepath, old_mtime_ns)
+    save_stat = os.stat(save_filepath)
+    entry = extraction_manifest.make_stat_fields(save_stat)
+    assert entry == {"size": 6, "mtime_ns": old_mtime_ns}
+    assert extraction_manifest.is_stat_unchanged(entry, save_stat)
+
+    save_filepath.write_bytes(b"folder")
+    assert not extraction_manifest.is_stat_unchanged(entry, os.stat(save_filepath))
+
+    save_filepath.write_bytes(b"folders")
+    set_mtime_ns(save_filepath, old_mtime_ns)
+    assert not extraction_manifest.is_stat_unchanged(entry, os.stat(save_filepath))
+
+def extract_with_manifest(save_filepath, output_root_dirpath, manifest):
+    output_text_folder_dirpath = edit_folder.extract_save_folders(save_filepath, output_root_dirpath=output_root_dirpath, verbose=False, manifest=manifest)
+    stats = manifest.get_stats()
+    manifest.take_changes()
+    return output_text_folder_dirpath, stats
+
+def test_same_second_edit_is_extracted(tmp_path):
+    profile = game_profiles.BN6F
+    save_filepath = copy_template_save(tmp_path, profile)
+    output_root_dirpath = tmp_path / "folders"
+    manifest = extraction_manifest.ExtractionManifest(tmp_path / extraction_manifest.EXTRACTION_MANIFEST_FILENAME)
+
+    output_text_folder_dirpath, stats = extract_with_manifest(save_filepath, output_root_dirpath, manifest)
+    assert (stats["extracted"], stats["files_written"]) == (1, 1)
+    folder_filepath = output_text_folder_dirpath / "exe6f_MegaMan.txt"
+    old_folder_text = folder_filepath.read_text()
+
+    # edited within the same mtime tick, so the size and mtime are the same as when it was extracted
+    save_mtime_ns = os.stat(save_filepath).st_mtime_ns
+    edits = [(profile.get_folder_offset(0), b"\x01\x02")]
+    assert edit_folder.stamp_save_file(save_filepath, edits, profile)
+    set_mtime_ns(save_filepath, save_mtime_ns)
+
+    output_text_folder_dirpath, stats = extract_with_manifest(save_filepath, output_root_dirpath, manifest)
+    assert (stats["unchanged"], stats["same_folders"], stats["extracted"], stats["files_written"]) == (0, 0, 1, 1)
+    assert folder_filepath.read_text() != old_folder_text
+
+def test_old_save_is_skipped(tmp_path):
+    profile = game_profiles.BN6F
+    save_filepath = copy_template_save(tmp_path, profile)
+    set_mtime_ns(save_filepath, time.time_ns() - HOUR_NS)
+    output_root_dirpath = tmp_path / "folders"
+    manifest_filepath = tmp_path / extraction_manifest.EXTRACTION_MANIFEST_FILENAME
+    manifest = extraction_manifest.ExtractionManifest(manifest_filepath)
+
+    output_text_folder_dirpath, stats = extract_with_manifest(save_filepath, output_root_dirpath, manifest)
+    assert stats["extracted"] == 1
+    manifest.save()
+
+    # a new run loads the manifest from disk
+    manifest = extraction_manifest.ExtractionManifest(manifest_filepath)
+    manifest.load()
+    output_text_folder_dirpath, stats = extract_with_manifest(save_filepath, output_root_dirpath, manifest)
+    assert (stats["unchanged"], stats["extracted"], stats["size"]) == (1, 0, 1)
+
+    # a missing folder file is written again even though the save didn't change
+    (output_text_folder_dirpath / "exe6f_MegaMan.txt").unlink()
+    output_text_folder_dirpath, stats = extract_with_manifest(save_filepath, output_root_dirpath, manifest)
+    assert (stats["unchanged"], stats["same_folders"], stats["files_written"]) == (0, 0, 1)
+    assert (output_text_folder_dirpath / "exe6f_MegaMan.txt").is_file()
+
+def test_manifest_load(tmp_path):
+    manifest_filepath = tmp_path / extraction_manifest.EXTRACTION_MANIFEST_FILENAME
+    manifest = extraction_manifest.ExtractionManifest(manifest_filepath)
+    manifest.load()
+    assert manifest.entries == {}
+
+    manifest.add("save.sav", {"size": 1, "mtime_ns": None})
+    manifest.save()
+    assert not manifest.dirty
+
+    loaded_manifest = extraction_manifest.ExtractionManifest(manifest_filepath)
+    loaded_manifest.load()
+    assert loaded_manifest.entries == {"save.sav": {"size": 1, "mtime_ns": None}}
+
+    # a manifest from another version is ignored
+    manifest_filepath.write_text('{"version": 0, "saves": {"save.sav": {}}}')
+    loaded_manifest = extraction_manifest.ExtractionManifest(manifest_filepath)
+    loaded_manifest.load()
+    assert loaded_manifest.entries == {}
+
+def test_manifest_changes():
+    worker_manifest = extraction_manifest.ExtractionManifest(None)
+    worker_manifest.add("save.sav", {"size": 1, "mtime_ns": None})
+    worker_manifest.num_extracted += 1
+    worker_manifest.num_files_written += 2
+
+    manifest = extraction_manifest.ExtractionManifest(None)
+    manifest.apply_changes(worker_manifest.take_changes())
+    assert manifest.entries == {"save.sav": {"size": 1, "mtime_ns": None}}
+    assert manifest.dirty
+    assert manifest.get_stats() == {"unchanged": 0, "same_folders": 0, "extracted": 1, "files_written": 2, "size": 1}
+    assert worker_manifest.take_changes() == ([], 0, 0, 0, 0)
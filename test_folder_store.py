@@ -0,0 +1,122 @@
+# =============================================================================
+# MIT License
+# 
+# Copyright (c) 2022 luckytyphlosion
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# =============================================================================
+
+import pytest
+
+import chip_usage
+import folder_store
+import game_profiles
+import testing_support
+
+def make_chip_words(*chip_ids):
+    return [chip_ids[chip_slot % len(chip_ids)] | (chip_slot % 27) << 9 for chip_slot in range(game_profiles.NUM_FOLDER_CHIPS)]
+
+def read_folder_records(store):
+    columns = store.columns
+    return [(columns["timestamps"][i], store.versions[columns["version_ids"][i]], columns["navi_ids"][i], columns["reg_slots"][i], store.get_chip_words(i)) for i in range(len(store))]
+
+def test_folder_store_round_trip(tmp_path):
+    store_filepath = tmp_path / "folders.fldstore"
+    folder_records = [
+        (3, "0.6.0", 2, folder_store.NO_REG, make_chip_words(1, 2, 0x1ff)),
+        (1, "0.2.0", 5, 0, make_chip_words(2, 3)),
+        (2, "0.6.0", 2, 29, make_chip_words(3)),
+        (-1, "0.2.0", 0, 7, make_chip_words(1, 3)),
+    ]
+    folder_store.write_folder_store(store_filepath, folder_records)
+
+    with folder_store.FolderStore.open(store_filepath) as store:
+        assert len(store) == 4
+        assert store.versions == ["0.6.0", "0.2.0"]
+        assert store.bitmap_chip_ids == [1, 2, 3, 0x1ff]
+        # sorted by version and navi, and stable within a group
+        assert read_folder_records(store) == sorted(folder_records, key=lambda folder_record: (store.versions.index(folder_record[1]), folder_record[2]))
+        assert store.get_version_ids(("0.2.0", "0.1.0")) == {1}
+
+        chip_usage_by_group = {(version, navi_id): (num_folders, chip_usage, chip_pairs) for version, navi_id, num_folders, chip_usage, chip_pairs in store.count_chip_usage_by_group(True)}
+        assert chip_usage_by_group == {
+            ("0.6.0", 2): (2, {1: 1, 2: 1, 3: 1, 0x1ff: 1}, {(1, 2): 1, (1, 0x1ff): 1, (2, 0x1ff): 1}),
+            ("0.2.0", 0): (1, {1: 1, 3: 1}, {(1, 3): 1}),
+            ("0.2.0", 5): (1, {2: 1, 3: 1}, {(2, 3): 1}),
+        }
+
+def test_empty_folder_store(tmp_path):
+    store_filepath = tmp_path / "folders.fldstore"
+    folder_store.write_folder_store(store_filepath, [])
+
+    with folder_store.FolderStore.open(store_filepath) as store:
+        assert len(store) == 0
+        assert store.count_chip_usage_by_group(True) == []
+
+def test_not_a_folder_store(tmp_path):
+    store_filepath = tmp_path / "folders.fldstore"
+    store_filepath.write_bytes(bytes(folder_store.FOLDER_STORE_HEADER_STRUCT.size))
+
+    with pytest.raises(ValueError):
+        folder_store.FolderStore.open(store_filepath)
+
+def test_folder_store_header_limits(tmp_path):
+    store_filepath = tmp_path / "folders.fldstore"
+    chip_words = make_chip_words(1)
+
+    with pytest.raises(ValueError):
+        folder_store.write_folder_store(store_filepath, [(0, "v" * (folder_store.MAX_VERSION_LEN + 1), 0, 0, chip_words)])
+    with pytest.raises(ValueError):
+        folder_store.write_folder_store(store_filepath, [(0, "0.6.0", folder_store.MAX_NAVI_ID + 1, 0, chip_words)])
+    with pytest.raises(ValueError):
+        folder_store.write_folder_store(store_filepath, [(0, "0.6.0", 0, 0, chip_words[1:])])
+    with pytest.raises(ValueError):
+        folder_store.write_folder_store(store_filepath, ((0, str(i), 0, 0, chip_words) for i in range(folder_store.MAX_NUM_VERSIONS + 1)))
+    # every version fits, but there's a group for each version and navi
+    with pytest.raises(ValueError):
+        folder_store.write_folder_store(store_filepath, ((0, str(i >> 1), i & 1, 0, chip_words) for i in range(folder_store.MAX_NUM_GROUPS + 1)))
+    assert not store_filepath.exists()
+
+    # right at the limits is fine
+    long_version = "v" * folder_store.MAX_VERSION_LEN
+    folder_store.write_folder_store(store_filepath, [(0, long_version, folder_store.MAX_NAVI_ID, 0, chip_words)])
+    with folder_store.FolderStore.open(store_filepath) as store:
+        assert store.versions == [long_version]
+        assert store.groups == [(0, folder_store.MAX_NAVI_ID, 0, 1)]
+
+def test_popcount():
+    for x in (0, 1, 0xff, 1 << 100, (1 << 200) - 1, 0x5555):
+        assert folder_store.popcount(x) == bin(x).count("1")
+
+def test_folder_store_stats_match_json(tmp_path):
+    folder_info_tables = chip_usage.load_folder_info_tables()
+    folder_records = testing_support.make_fake_folder_records(2000, *folder_info_tables, num_distinct_folders=300)
+    all_folder_info = {f"replay_{i}": testing_support.folder_record_to_folder_info(folder_record, *folder_info_tables) for i, folder_record in enumerate(folder_records)}
+    json_stats = chip_usage.count_chip_usage_stats(all_folder_info)
+
+    store_filepath = tmp_path / chip_usage.FOLDER_STORE_FILENAME
+    chip_usage.dump_folder_store(all_folder_info, store_filepath)
+    with folder_store.FolderStore.open(store_filepath) as store:
+        assert sorted(read_folder_records(store)) == sorted(folder_records)
+        store_stats = chip_usage.count_folder_store_chip_usage_stats(store, *folder_info_tables)
+
+    assert store_stats.to_json() == json_stats.to_json()
+    for versions in (None, ("0.2.0",), ("0.3.0", "0.6.0"), ("0.1.0",)):
+        assert store_stats.get_total_folders_by_navi(versions) == json_stats.get_total_folders_by_navi(versions)
+        assert store_stats.get_chip_usage_by_navi(versions) == json_stats.get_chip_usage_by_navi(versions)
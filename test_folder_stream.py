@@ -0,0 +1,100 @@
+# =============================================================================
+# MIT License
+# 
+# Copyright (c) 2022 luckytyphlosion
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# =============================================================================
+
+import io
+import json
+import pathlib
+import tarfile
+
+import folder_stream
+import game_profiles
+
+SAVE_FOLDER_TEXTS = {
+    "MegaMan": "Cannon A\nCannon B\n",
+    "ProtoMan": "",
+    "ShadowMan": "A" * (folder_stream.TAR_BLOCK_SIZE + 1),
+}
+
+def test_tar_header_round_trip():
+    for name, size in (("save/save_MegaMan.txt", 0), ("a" * 100, 1234), ("s\u00e4ve/s\u00e4ve_MegaMan.txt", folder_stream.TAR_BLOCK_SIZE)):
+        header = folder_stream.make_tar_header(name, size, 1660000000)
+        assert len(header) == folder_stream.TAR_BLOCK_SIZE
+
+        # frombuf checks the checksum
+        tar_info = tarfile.TarInfo.frombuf(bytes(header), "utf-8", "surrogateescape")
+        assert (tar_info.name, tar_info.size, tar_info.mtime, tar_info.mode, tar_info.type) == (name, size, 1660000000, 0o644, tarfile.REGTYPE)
+        assert header[257:265] == b"ustar\x0000"
+
+def write_tar_stream(save_filepaths):
+    output_file = io.BytesIO()
+    folder_writer = folder_stream.TarFolderWriter(output_file, False)
+    for save_filepath in save_filepaths:
+        folder_writer.write_save_folders(save_filepath, game_profiles.BN6F, SAVE_FOLDER_TEXTS, [])
+    folder_writer.write_save_error(pathlib.Path("broken.sav"), "Save isn't BN6 Falzar!")
+    folder_writer.finish()
+    return output_file.getvalue()
+
+def test_tar_stream_round_trip():
+    # the long save name needs a pax header
+    save_filepaths = [pathlib.Path("saves/exe6f.sav"), pathlib.Path("saves/" + "x" * 80 + ".sav")]
+    tar_data = write_tar_stream(save_filepaths)
+    assert len(tar_data) % folder_stream.TAR_RECORD_SIZE == 0
+
+    with tarfile.open(fileobj=io.BytesIO(tar_data), mode="r:") as tar_file:
+        members = tar_file.getmembers()
+        expected_names = [f"{save_filepath.stem}/{save_filepath.stem}_{navi_name}.txt" for save_filepath in save_filepaths for navi_name in SAVE_FOLDER_TEXTS.keys()]
+        assert [member.name for member in members] == expected_names
+        assert len(expected_names[-1].encode("utf-8")) > 100
+
+        for member, folder_text in zip(members, list(SAVE_FOLDER_TEXTS.values()) * len(save_filepaths)):
+            assert member.isfile()
+            assert tar_file.extractfile(member).read() == folder_text.encode("utf-8")
+
+def test_empty_tar_stream():
+    tar_data = write_tar_stream([])
+    assert len(tar_data) == folder_stream.TAR_RECORD_SIZE
+
+    with tarfile.open(fileobj=io.BytesIO(tar_data), mode="r:") as tar_file:
+        assert tar_file.getmembers() == []
+
+def test_jsonl_stream(tmp_path):
+    output_filepath = tmp_path / "folders.jsonl"
+    folder_writer = folder_stream.open_folder_writer(str(output_filepath))
+    assert isinstance(folder_writer, folder_stream.JsonlFolderWriter)
+    folder_writer.write_save_folders(pathlib.Path("exe6f.sav"), game_profiles.BN6F, SAVE_FOLDER_TEXTS, ["warning"])
+    folder_writer.write_save_error(pathlib.Path("broken.sav"), "Save isn't BN6 Falzar!")
+    folder_writer.close()
+
+    with open(output_filepath, "r") as f:
+        lines = [json.loads(line) for line in f]
+
+    assert lines == [
+        {"save": "exe6f.sav", "profile": game_profiles.BN6F.name, "folders": SAVE_FOLDER_TEXTS, "warnings": ["warning"]},
+        {"save": "broken.sav", "error": "Save isn't BN6 Falzar!"},
+    ]
+
+def test_stream_format():
+    assert folder_stream.get_stream_format("folders.TAR") == folder_stream.STREAM_FORMAT_TAR
+    assert folder_stream.get_stream_format("folders.jsonl") == folder_stream.STREAM_FORMAT_JSONL
+    assert folder_stream.get_stream_format(folder_stream.STDOUT_PATHNAME) == folder_stream.STREAM_FORMAT_JSONL
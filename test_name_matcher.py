@@ -0,0 +1,79 @@
+# =============================================================================
+# MIT License
+# 
+# Copyright (c) 2022 luckytyphlosion
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# =============================================================================
+
+import itertools
+import random
+
+import game_profiles
+import name_matcher
+import testing_support
+
+def get_chip_names():
+    return [chip_name.casefold() for chip_name in game_profiles.BN45_US_PVP.load_chips().keys()]
+
+def make_random_name(rng, chars, name_len):
+    return "".join(rng.choice(chars) for i in range(name_len))
+
+def get_name_pairs():
+    rng = random.Random(7)
+    chip_names = get_chip_names()
+    typo_names = [testing_support.make_typo(chip_name, rng, rng.randrange(1, 4)) for chip_name in chip_names]
+    # past 64 chars the masks no longer fit in one machine word
+    long_names = [make_random_name(rng, "abcde", name_len) for name_len in (63, 64, 65, 100, 200)]
+    long_names += [chip_name * 8 for chip_name in rng.sample(chip_names, 4)]
+    non_ascii_names = ["ソード", "ワイドソード", "ｿｰﾄﾞ", "épée", "ÉPÉE", "Straße", "strasse", "α→β", "😀😀", "💥bomb"]
+    non_ascii_names += [make_random_name(rng, "aéあ😀ß", rng.randrange(1, 80)) for i in range(20)]
+
+    names = [""] + chip_names + typo_names + long_names + non_ascii_names
+    # every name against some of the chip names, plus the unusual names against each other
+    unusual_names = [""] + long_names + non_ascii_names
+    return list(itertools.product(names, [""] + rng.sample(chip_names, 50))) + list(itertools.product(unusual_names, unusual_names))
+
+def test_lcs_length_matches_reference():
+    for a, b in get_name_pairs():
+        assert name_matcher.lcs_length(a, b) == testing_support.lcs_length_reference(a, b), (a, b)
+
+def test_lcs_length_with_masks_reuses_masks():
+    chip_names = get_chip_names()
+    for b in chip_names[:40] + ["", "é" * 70]:
+        b_char_masks = name_matcher.make_char_masks(b)
+        for a in chip_names + ["", "ßé" * 40]:
+            assert name_matcher.lcs_length_with_masks(a, b_char_masks, len(b)) == testing_support.lcs_length_reference(a, b), (a, b)
+
+def test_osa_distance_matches_reference():
+    for a, b in get_name_pairs():
+        assert name_matcher.osa_distance(a, b) == testing_support.osa_distance_reference(a, b), (a, b)
+
+def test_empty_strings():
+    assert name_matcher.lcs_length("", "") == 0
+    assert name_matcher.osa_distance("", "") == 0
+    assert name_matcher.lcs_length("cannon", "") == 0
+    assert name_matcher.lcs_length("", "cannon") == 0
+    assert name_matcher.osa_distance("cannon", "") == 6
+    assert name_matcher.osa_distance("", "cannon") == 6
+
+def test_osa_distance_transpositions():
+    assert name_matcher.osa_distance("cnanon", "cannon") == 1
+    # a transposed pair can't be edited again
+    assert name_matcher.osa_distance("ca", "abc") == 3
@@ -0,0 +1,120 @@
+# =============================================================================
+# MIT License
+# 
+# Copyright (c) 2022 luckytyphlosion
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# =============================================================================
+
+import random
+
+import pytest
+
+import edit_folder
+import game_profiles
+import save_codec
+import testing_support
+
+# there's no Gregar template, but the Falzar one checksums the same way with a different adjust
+CHECKSUM_VARIANTS = (
+    (game_profiles.BN45_US_PVP, game_profiles.BN45_US_PVP),
+    (game_profiles.BN6F, game_profiles.BN6F),
+    (game_profiles.BN6G, game_profiles.BN6F),
+)
+
+def load_unmasked_template_save(profile, template_profile):
+    with open(template_profile.template_save_filename, "rb") as f:
+        save_data = bytearray(f.read())[profile.sram_start_offset:]
+
+    save_codec.mask_save(save_data, profile.mask_offset, profile.save_size)
+    return save_data
+
+def test_checksum_adjusts():
+    assert sorted(profile.checksum_adjust for profile, template_profile in CHECKSUM_VARIANTS) == [0x18, 0x38, 0x72]
+
+def test_sum_bytes():
+    rng = random.Random(0x5b)
+    for data_len in (0, 1, 255, 256, 257, 511, 512, 513, 0x7c00):
+        data = bytes(rng.randrange(256) for i in range(data_len))
+        assert save_codec.sum_bytes(data) == sum(data)
+        assert save_codec.sum_bytes(b"\xff" * data_len) == 0xff * data_len
+
+def test_checksum_matches_reference():
+    for profile, template_profile in CHECKSUM_VARIANTS:
+        save_data = load_unmasked_template_save(profile, template_profile)
+        checksum_args = (profile.checksum_offset, profile.save_size, profile.checksum_adjust)
+
+        reference_result = testing_support.calc_checksum_and_expected_checksum_reference(save_data, *checksum_args)
+        assert save_codec.calc_checksum_and_expected_checksum(save_data, *checksum_args) == reference_result, profile.name
+
+        # random contents, so the checksum isn't just the template's
+        rng = random.Random(profile.checksum_adjust)
+        random_save_data = bytearray(rng.randrange(256) for i in range(len(save_data)))
+        assert save_codec.calc_checksum_and_expected_checksum(random_save_data, *checksum_args) == testing_support.calc_checksum_and_expected_checksum_reference(random_save_data, *checksum_args), profile.name
+
+def check_checksum_tracker(profile, template_profile, mark_dirty):
+    save_data = load_unmasked_template_save(profile, template_profile)
+    checksum_offset = profile.checksum_offset
+    checksum_args = (checksum_offset, profile.save_size, profile.checksum_adjust)
+    checksum = save_codec.calc_checksum(save_data, *checksum_args)
+    checksum_tracker = save_codec.ChecksumTracker(save_data, checksum, checksum_offset, profile.save_size)
+    rng = random.Random(profile.checksum_adjust + mark_dirty)
+
+    # scattered edits, including ones touching the checksum field and bytes past the checksummed area
+    for edit_num in range(100):
+        edit_size = rng.randint(1, 64)
+        edit_offset = rng.randrange(0, len(save_data) - edit_size)
+        if edit_num % 20 == 0:
+            edit_offset = checksum_offset - rng.randint(0, 3)
+        save_data[edit_offset:edit_offset+edit_size] = bytes(rng.randrange(256) for i in range(edit_size))
+        if mark_dirty:
+            checksum_tracker.mark_dirty(edit_offset, edit_offset + edit_size)
+
+        if edit_num % 3 == 0 or edit_num == 99:
+            assert checksum_tracker.update(save_data) == testing_support.calc_checksum_and_expected_checksum_reference(save_data, *checksum_args)[0], f"{profile.name} after edit {edit_num}"
+
+def test_checksum_tracker_dirty_ranges():
+    for profile, template_profile in CHECKSUM_VARIANTS:
+        check_checksum_tracker(profile, template_profile, True)
+
+def test_checksum_tracker_full_diff():
+    for profile, template_profile in CHECKSUM_VARIANTS:
+        check_checksum_tracker(profile, template_profile, False)
+
+def test_stamp_rejects_bad_checksum(tmp_path):
+    profile = game_profiles.BN6F
+    save_filepath = tmp_path / "save.sav"
+    with open(profile.template_save_filename, "rb") as f:
+        raw_save_data = bytearray(f.read())
+
+    folder_offset = profile.get_folder_offset(0)
+    edits = [(folder_offset, b"\x01\x02")]
+
+    save_filepath.write_bytes(raw_save_data)
+    assert edit_folder.stamp_save_file(save_filepath, edits, profile)
+    save_data, checksum_tracker = edit_folder.read_save_from_file(save_filepath, profile, "", "")
+    assert save_data[folder_offset:folder_offset+2] == b"\x01\x02"
+
+    # corrupting a byte outside the edits has to stop the stamp, not get folded into the new checksum
+    raw_save_data[profile.sram_start_offset + folder_offset + 0x10] ^= 0xff
+    save_filepath.write_bytes(raw_save_data)
+    with pytest.raises(edit_folder.SaveError):
+        edit_folder.stamp_save_file(save_filepath, edits, profile)
+
+    assert save_filepath.read_bytes() == raw_save_data
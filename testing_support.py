@@ -0,0 +1,165 @@
+# =============================================================================
+# MIT License
+# 
+# Copyright (c) 2022 luckytyphlosion
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# =============================================================================
+
+# Reference implementations and helpers shared by the tests, benchmark.py and load_test.py
+
+import itertools
+import random
+import struct
+
+import edit_folder
+import folder_codec
+import folder_store
+import game_profiles
+
+# the original per-byte implementation, kept as the reference for the fast engine
+def calc_checksum_and_expected_checksum_reference(save_data, checksum_offset, save_size, checksum_adjust):
+    checksum = 0
+
+    for byte in itertools.islice(save_data, save_size):
+        checksum = (checksum + byte) & 0xffffffff
+
+    expected_checksum = struct.unpack("<I", save_data[checksum_offset:checksum_offset+4])[0]
+    for i in range(4):
+        checksum = (checksum - save_data[checksum_offset+i]) & 0xffffffff
+
+    checksum = (checksum + checksum_adjust) & 0xffffffff
+
+    return checksum, expected_checksum
+
+# the original per-slot folder accessors, kept as the baseline for the bulk folder codec
+def edit_folder_chip_reference(save_data, profile, navi_id, chip_slot, chip_info, chip_code):
+    chip_code_as_num = 26 if chip_code == "*" else ord(chip_code.casefold()) - ord("a")
+    if chip_code_as_num > 26 or chip_code_as_num < 0:
+        raise RuntimeError()
+
+    game_profiles.CHIP_AND_CODE_STRUCT.pack_into(save_data, profile.get_folder_chip_offset(navi_id, chip_slot), chip_info.id | chip_code_as_num << 9)
+
+def get_folder_chip_reference(save_data, profile, navi_id, chip_slot, chip_ids_to_chip_names):
+    chip_and_code_packed = game_profiles.CHIP_AND_CODE_STRUCT.unpack_from(save_data, profile.get_folder_chip_offset(navi_id, chip_slot))[0]
+    chip_id = chip_and_code_packed & 0x1ff
+    chip_code_as_num = chip_and_code_packed >> 9
+
+    chip_name = chip_ids_to_chip_names.get(chip_id, f"BdChp{chip_id:03X}")
+    if chip_code_as_num < 0 or chip_code_as_num > 26:
+        print(f"Invalid chip code detected for navi {navi_id} at chip slot {chip_slot} (0-in)!")
+        chip_code = f"Code_0x{chip_code_as_num:x}"
+    else:
+        chip_code = folder_codec.ALL_CHIP_CODES[chip_code_as_num]
+    return chip_name, chip_code
+
+def make_typo(name, rng, num_typos):
+    name_chars = list(name)
+    for i in range(num_typos):
+        typo_kind = rng.randrange(3)
+        typo_index = rng.randrange(len(name_chars) + 1)
+        if typo_kind == 0 or len(name_chars) == 0:
+            name_chars.insert(typo_index, rng.choice("abcdefghijklmnopqrstuvwxyz0123456789 -"))
+        elif typo_kind == 1:
+            del name_chars[min(typo_index, len(name_chars) - 1)]
+        else:
+            name_chars[min(typo_index, len(name_chars) - 1)] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+
+    return "".join(name_chars)
+
+# the original matrix implementation, kept as the reference for the bit-parallel kernel
+# Taken from https://rosettacode.org/wiki/Longest_common_subsequence#Dynamic_Programming_7
+def lcs_length_reference(a, b):
+    # generate matrix of length of longest common subsequence for substrings of both words
+    lengths = [[0] * (len(b)+1) for _ in range(len(a)+1)]
+    for i, x in enumerate(a):
+        for j, y in enumerate(b):
+            if x == y:
+                lengths[i+1][j+1] = lengths[i][j] + 1
+            else:
+                lengths[i+1][j+1] = max(lengths[i+1][j], lengths[i][j+1])
+
+    # read a substring from the matrix
+    result = ''
+    j = len(b)
+    for i in range(1, len(a)+1):
+        if lengths[i][j] != lengths[i-1][j]:
+            result += a[i-1]
+
+    return len(result)
+
+def osa_distance_reference(a, b):
+    distances = [[0] * (len(b)+1) for _ in range(len(a)+1)]
+    for i in range(len(a)+1):
+        distances[i][0] = i
+    for j in range(len(b)+1):
+        distances[0][j] = j
+
+    for i in range(1, len(a)+1):
+        for j in range(1, len(b)+1):
+            cost = 0 if a[i-1] == b[j-1] else 1
+            distances[i][j] = min(distances[i-1][j] + 1, distances[i][j-1] + 1, distances[i-1][j-1] + cost)
+            if i > 1 and j > 1 and a[i-1] == b[j-2] and a[i-2] == b[j-1]:
+                distances[i][j] = min(distances[i][j], distances[i-2][j-2] + 1)
+
+    return distances[len(a)][len(b)]
+
+def write_saves_forever(saves_dirpath, profile, num_saves, atomic):
+    template_save_data, checksum_tracker = edit_folder.read_save_from_file(profile.template_save_filename, profile, "", "")
+    folder_offset = profile.get_folder_offset(0)
+
+    for i in itertools.count():
+        save_data = bytearray(template_save_data)
+        save_data[folder_offset] = i & 0xff
+        save_filepath = saves_dirpath / f"save_{i % num_saves}.sav"
+        if atomic:
+            edit_folder.write_save_to_file(save_data, save_filepath, profile, fsync=False)
+        else:
+            with open(save_filepath, "wb") as f:
+                f.write(edit_folder.encode_save(save_data, profile))
+
+def count_torn_saves(saves_dirpath, profile):
+    num_torn_saves = 0
+    for save_filepath in saves_dirpath.glob("*.sav"):
+        try:
+            edit_folder.read_save_from_file(save_filepath, profile, "", "")
+        except edit_folder.SaveError:
+            num_torn_saves += 1
+
+    return num_torn_saves
+
+# folder store records and the matching folder infos of the all folder info json
+FAKE_FOLDER_VERSIONS = ("0.2.0", "0.3.0", "0.5.0", "0.6.0")
+
+def make_fake_folder_records(num_folders, exe45_chip_ids_to_chip_names, exe45_navi_ids_to_navis, num_distinct_folders=1000):
+    rng = random.Random(45)
+    chip_ids = list(exe45_chip_ids_to_chip_names.keys())
+    navi_ids = list(exe45_navi_ids_to_navis.keys())
+    distinct_folders = []
+    for i in range(num_distinct_folders):
+        # real folders have a few copies of most chips
+        folder_chip_ids = rng.sample(chip_ids, 12)
+        distinct_folders.append([rng.choice(folder_chip_ids) | rng.randrange(len(folder_codec.ALL_CHIP_CODES)) << 9 for chip_slot in range(game_profiles.NUM_FOLDER_CHIPS)])
+
+    return [(1660000000000 + i, rng.choice(FAKE_FOLDER_VERSIONS), rng.choice(navi_ids), rng.choice((rng.randrange(game_profiles.NUM_FOLDER_CHIPS), folder_store.NO_REG)), distinct_folders[i % num_distinct_folders]) for i in range(num_folders)]
+
+def folder_record_to_folder_info(folder_record, exe45_chip_ids_to_chip_names, exe45_navi_ids_to_navis):
+    timestamp, version, navi_id, reg_slot, chip_words = folder_record
+    contents = [{"id": chip_word & 0x1ff, "name": exe45_chip_ids_to_chip_names[chip_word & 0x1ff], "code": folder_codec.CHIP_CODE_STRS[chip_word >> 9], "is_reg": chip_slot == reg_slot} for chip_slot, chip_word in enumerate(chip_words)]
+    return {"ts": timestamp, "version": version, "navi": {"id": navi_id, "name": exe45_navi_ids_to_navis[navi_id]["name"]}, "reg": reg_slot, "contents": contents}